@@ -0,0 +1,46 @@
+// Clientside date-range filtering for the bar and multiline plots.
+// Used when the dashboard runs with DASHBOARD_CLIENTSIDE_FILTERING=1: the year
+// plot data arrives once in the 'year-plot-store' dcc.Store and every date picker
+// change only swaps the x/y arrays of the figure already on the page.
+
+function filterYearFigure(plotType, startDate, endDate, storeData, figure) {
+    if (!storeData || !figure || !figure.data) {
+        return window.dash_clientside.no_update;
+    }
+
+    const startYear = parseInt(String(startDate).slice(0, 4), 10);
+    const endYear = parseInt(String(endDate).slice(0, 4), 10);
+
+    const columns = storeData.columns;
+    const traceColumns = storeData.trace_columns[plotType];
+
+    const keep = [];
+    columns.year.forEach(function(year, index) {
+        if (year >= startYear && year <= endYear) {
+            keep.push(index);
+        }
+    });
+
+    const years = keep.map(function(index) { return columns.year[index]; });
+
+    const data = figure.data.map(function(trace, traceIndex) {
+        const values = columns[traceColumns[traceIndex]];
+        return Object.assign({}, trace, {
+            x: years,
+            y: keep.map(function(index) { return values[index]; })
+        });
+    });
+
+    return Object.assign({}, figure, {data: data});
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    yearFilter: {
+        filterBarFigure: function(startDate, endDate, storeData, figure) {
+            return filterYearFigure('bar', startDate, endDate, storeData, figure);
+        },
+        filterMultilineFigure: function(startDate, endDate, storeData, figure) {
+            return filterYearFigure('multiline', startDate, endDate, storeData, figure);
+        }
+    }
+});
@@ -1,46 +1,247 @@
-import pandas as pd 
-import numpy as np 
+import os
+import logging
+from functools import partial
 
-from utils.data_transfer import (pull_kaggle_data,
-                                 get_create_sql_table_command,
-                                 get_sql_insert_commands,
-                                 SQLiteDataObject)
+from utils.data_transfer import (get_kaggle_file_path,
+                                 parse_saledate,
+                                 SQLiteDataObject,
+                                 VEHICLE_SALES_DTYPES,
+                                 VEHICLE_SALES_INDEXES)
+from utils.sales_summaries import refresh_sales_summaries
+from utils.columnar_store import export_parquet_store
+from utils.schema_inference import optimize_dataframe_dtypes
+from utils.transforms import apply_transforms, clean_vehicle_sales, strip_rank_prefixes
+from utils.etl_executor import ETLExecutor
+from utils.price_model import get_default_model_path, train_price_model_from_database
+from utils.comparables_index import get_default_index_path, update_comparables_index
+from utils.price_index import update_price_indices
+from utils.dimension_tables import (DimensionEncoder,
+                                    get_fact_index_specs,
+                                    FACT_TABLE_NAME,
+                                    VIEW_NAME)
 
-vehicle_df    = pull_kaggle_data(kaggle_path = "syedanwarafridi/vehicle-sales-data",
-                                 file_path_suffix = "/car_prices.csv")
+logging.basicConfig(level = logging.INFO,
+                    format = '%(asctime)s %(levelname)s %(name)s: %(message)s')
 
-ford_stock_df = pd.read_csv("data_folder/ford_stock_df.csv")
+# Rows of car_prices.csv held in memory at once while streaming into SQLite
+CSV_CHUNKSIZE = int(os.environ.get('ETL_CSV_CHUNKSIZE', 100000))
 
-auto_sales_df = pd.read_csv("data_folder/2024_us_auto_sales.csv")
+# 'incremental' skips sources whose file hash matches the stored watermark,
+# 'full' reloads every source regardless
+ETL_MODE = os.environ.get('ETL_MODE', 'incremental')
 
-vehicle_create_table_command    = get_create_sql_table_command(df = vehicle_df, 
-                                                               table_name = 'vehicle_sales_data',
-                                                               primary_key_columns = ['vin', 'saledate', 'sellingprice', 'odometer'])
+# Set to '1' to narrow car_prices columns before loading: whole-number floats become
+# integers and saledate is stored as sortable epoch seconds. Changes the stored
+# saledate representation, so only enable it when building a new tool_data.db
+SCHEMA_INFERENCE = os.environ.get('ETL_SCHEMA_INFERENCE') == '1'
 
-ford_stock_create_table_command = get_create_sql_table_command(df = ford_stock_df, 
-                                                                table_name = 'ford_stock_data',
-                                                                primary_key_columns = ['year'])
+# Set to '1' to store car_prices as a vehicle_sales_fact table with integer keys into
+# dim_make, dim_model, ... lookup tables instead of the flat vehicle_sales_data table.
+# Downstream summaries and exports then read the vehicle_sales_view view
+NORMALIZED = os.environ.get('ETL_NORMALIZED') == '1'
 
-auto_sales_create_table_command = get_create_sql_table_command(df = auto_sales_df, 
-                                                               table_name = 'auto_sales_comparison',
-                                                               primary_key_columns = ['year', 'Manufacturer'])
+# Set to '1' to also maintain the year-partitioned Parquet copy of vehicle_sales_data
+PARQUET_STORE = os.environ.get('ETL_PARQUET_STORE') == '1'
 
-vehicle_insert_commands    = get_sql_insert_commands(df = vehicle_df.copy(deep=True),
-                                                     table_name = 'vehicle_sales_data')
+# Threads available to download/export stages running alongside the SQLite writer
+IO_WORKERS = int(os.environ.get('ETL_IO_WORKERS', 4))
 
-ford_stock_insert_commands = get_sql_insert_commands(df = ford_stock_df.copy(deep=True),
-                                                     table_name = 'ford_stock_data')
+# Set to '1' to trim and lowercase the car_prices text columns (make, model, body, ...)
+# so that differently-cased spellings group together
+CLEAN_TEXT = os.environ.get('ETL_CLEAN_TEXT') == '1'
 
-auto_sales_insert_commands = get_sql_insert_commands(df = auto_sales_df.copy(deep=True),
-                                                     table_name = 'auto_sales_comparison')
+# Set ETL_DATASET_DIR to a directory holding car_prices.csv to use it instead of the
+# Kaggle download, or ETL_OFFLINE=1 to reuse the last recorded download without network
+DATASET_DIR = os.environ.get('ETL_DATASET_DIR')
+OFFLINE = os.environ.get('ETL_OFFLINE') == '1'
+
+# Hours a Kaggle download is reused without asking Kaggle for a newer version; set
+# ETL_DOWNLOAD_MAX_AGE_HOURS=0 to check on every run
+DOWNLOAD_MAX_AGE_HOURS = float(os.environ.get('ETL_DOWNLOAD_MAX_AGE_HOURS', 24))
+
+# Processes that clean and type car_prices chunks while the writer loads earlier ones
+TRANSFORM_WORKERS = int(os.environ.get('ETL_TRANSFORM_WORKERS', os.cpu_count() or 1))
+
+# Set ETL_PRICE_MODEL=0 to skip retraining the price estimation model after a load
+PRICE_MODEL = os.environ.get('ETL_PRICE_MODEL', '1') != '0'
+
+# Set ETL_COMPARABLES_INDEX=0 to skip updating the comparable-sales index after a load
+COMPARABLES_INDEX = os.environ.get('ETL_COMPARABLES_INDEX', '1') != '0'
+
+# Set ETL_PRICE_INDEX=0 to skip adding new sales to the monthly and weekly price indices
+PRICE_INDEX = os.environ.get('ETL_PRICE_INDEX', '1') != '0'
 
 sqlite_object = SQLiteDataObject(database_name = "tool_data")
 
+# Model years present in new or changed car_prices rows, used to refresh only
+# the affected groups of the summary tables
+touched_years = set()
+
+# Row-level car_prices transforms, run across TRANSFORM_WORKERS processes, so each one
+# must be a module-level function or a partial of one
+vehicle_transforms = []
+if CLEAN_TEXT:
+    vehicle_transforms.append(clean_vehicle_sales)
+if SCHEMA_INFERENCE:
+    vehicle_transforms.append(partial(optimize_dataframe_dtypes,
+                                      date_columns = {'saledate' : parse_saledate}))
+
+if NORMALIZED:
+    vehicle_table_name  = FACT_TABLE_NAME
+    vehicle_index_specs = get_fact_index_specs(index_specs = VEHICLE_SALES_INDEXES)
+    sales_source_name   = VIEW_NAME
+else:
+    vehicle_table_name  = 'vehicle_sales_data'
+    vehicle_index_specs = VEHICLE_SALES_INDEXES
+    sales_source_name   = 'vehicle_sales_data'
+
+# STAGES -----------------------------------------------------------------------------------
+
+def download_car_prices():
+
+    return get_kaggle_file_path(kaggle_path = "syedanwarafridi/vehicle-sales-data",
+                                file_path_suffix = "/car_prices.csv",
+                                local_dir = DATASET_DIR,
+                                offline = OFFLINE,
+                                max_age_seconds = DOWNLOAD_MAX_AGE_HOURS * 3600)
+
+def load_vehicle_sales(vehicle_file_path):
+
+    # The encoder writes new dimension values as it goes, so it runs in this process
+    dimension_encoder = DimensionEncoder(sqlite_object = sqlite_object) if NORMALIZED else None
+
+    row_count = sqlite_object.incremental_load_csv(file_path = vehicle_file_path,
+                                                   table_name = vehicle_table_name,
+                                                   primary_key_columns = ['vin', 'saledate', 'sellingprice', 'odometer'],
+                                                   read_chunksize = CSV_CHUNKSIZE,
+                                                   dtype = VEHICLE_SALES_DTYPES,
+                                                   saledate_column = 'saledate',
+                                                   parallel_transform = partial(apply_transforms, transforms = vehicle_transforms) if vehicle_transforms else None,
+                                                   transform_workers = TRANSFORM_WORKERS,
+                                                   transform = dimension_encoder.encode if NORMALIZED else None,
+                                                   chunk_callback = lambda chunk_df: touched_years.update(chunk_df['year'].dropna().astype(int)),
+                                                   index_specs = vehicle_index_specs,
+                                                   force = ETL_MODE == 'full')
+
+    if NORMALIZED:
+        dimension_encoder.create_view()
+
+    return row_count
+
+def load_ford_stock():
+
+    return sqlite_object.incremental_load_csv(file_path = "data_folder/ford_stock_df.csv",
+                                              table_name = 'ford_stock_data',
+                                              primary_key_columns = ['year'],
+                                              force = ETL_MODE == 'full')
+
+def load_auto_sales():
+
+    return sqlite_object.incremental_load_csv(file_path = "data_folder/2024_us_auto_sales.csv",
+                                              table_name = 'auto_sales_comparison',
+                                              primary_key_columns = ['year', 'Manufacturer'],
+                                              transform = strip_rank_prefixes,
+                                              force = ETL_MODE == 'full')
+
+def refresh_summaries(vehicle_row_count):
+
+    refresh_sales_summaries(sqlite_object = sqlite_object,
+                            years = touched_years if ETL_MODE == 'incremental' else None,
+                            source_table = sales_source_name)
+
+def export_parquet(vehicle_row_count):
+
+    return export_parquet_store(sqlite_object = sqlite_object,
+                                table_name = sales_source_name,
+                                years = touched_years if ETL_MODE == 'incremental' else None)
+
+def train_price_model(vehicle_row_count):
+
+    model_path = get_default_model_path(sqlite_object = sqlite_object)
+    if ETL_MODE == 'incremental' and not vehicle_row_count and os.path.exists(model_path):
+        return model_path
+
+    return train_price_model_from_database(sqlite_object = sqlite_object,
+                                           model_path = model_path,
+                                           source_table = sales_source_name)
+
+def update_comparables(vehicle_row_count):
+
+    if (ETL_MODE == 'incremental' and not vehicle_row_count and
+            os.path.exists(get_default_index_path(sqlite_object = sqlite_object))):
+        return 0
+
+    return update_comparables_index(sqlite_object = sqlite_object,
+                                    source_table = sales_source_name,
+                                    years = touched_years if ETL_MODE == 'incremental' else None)
+
+def update_price_index(vehicle_row_count):
+
+    # New sales are found by rowid, so a full run rebuilds the indices to pick up
+    # rows that upserts changed in place
+    return update_price_indices(sqlite_object = sqlite_object,
+                                source_table = sales_source_name,
+                                full = ETL_MODE == 'full')
+
+# PIPELINE ---------------------------------------------------------------------------------
+
+executor = ETLExecutor(max_io_workers = IO_WORKERS)
+
+executor.add_stage(name = 'download_car_prices',
+                   func = download_car_prices,
+                   kind = 'io')
+
+executor.add_stage(name = 'load_vehicle_sales',
+                   func = load_vehicle_sales,
+                   depends_on = ['download_car_prices'],
+                   kind = 'write')
+
+executor.add_stage(name = 'load_ford_stock',
+                   func = load_ford_stock,
+                   kind = 'write')
+
+executor.add_stage(name = 'load_auto_sales',
+                   func = load_auto_sales,
+                   kind = 'write')
+
+executor.add_stage(name = 'refresh_summaries',
+                   func = refresh_summaries,
+                   depends_on = ['load_vehicle_sales'],
+                   kind = 'write')
+
+if PARQUET_STORE:
+    executor.add_stage(name = 'export_parquet',
+                       func = export_parquet,
+                       depends_on = ['load_vehicle_sales'],
+                       kind = 'io')
+
+# The model and comparables stages are CPU-heavy but run on threads on purpose:
+# they read touched_years, which the load stage fills in this process, and a
+# 'cpu' worker re-imports this module and would see it empty. Their NumPy and
+# SQLite work releases the GIL, so they still overlap with the other stages
+if PRICE_MODEL:
+    executor.add_stage(name = 'train_price_model',
+                       func = train_price_model,
+                       depends_on = ['load_vehicle_sales'],
+                       kind = 'io')
+
+if COMPARABLES_INDEX:
+    executor.add_stage(name = 'update_comparables_index',
+                       func = update_comparables,
+                       depends_on = ['load_vehicle_sales'],
+                       kind = 'io')
+
+if PRICE_INDEX:
+    executor.add_stage(name = 'update_price_index',
+                       func = update_price_index,
+                       depends_on = ['load_vehicle_sales'],
+                       kind = 'write')
+
+if __name__ == '__main__':
+
+    # WAL lets the read-only dashboard connections keep serving while the ETL writes
+    sqlite_object.enable_wal()
 
-sqlite_object.execute_sqlite_commands(commands = [vehicle_create_table_command])
-sqlite_object.execute_sqlite_commands(commands = [ford_stock_create_table_command])
-sqlite_object.execute_sqlite_commands(commands = [auto_sales_create_table_command])
+    executor.run()
 
-sqlite_object.execute_sqlite_commands(commands = vehicle_insert_commands)
-sqlite_object.execute_sqlite_commands(commands = ford_stock_insert_commands)
-sqlite_object.execute_sqlite_commands(commands = auto_sales_insert_commands)
\ No newline at end of file
+    sqlite_object.close()
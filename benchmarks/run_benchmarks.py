@@ -0,0 +1,330 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The dashboard and SQL helpers resolve sql_scripts/ and data_folder/ relative to the
+# working directory, as when the tool is run from the repository root
+os.chdir(REPO_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from utils.data_transfer import (SQLiteDataObject,
+                                 track_stage,
+                                 get_peak_rss_mb,
+                                 get_create_sql_table_command,
+                                 get_sql_insert_commands,
+                                 VEHICLE_SALES_DTYPES,
+                                 VEHICLE_SALES_INDEXES)
+from utils.sales_summaries import refresh_sales_summaries
+from utils.price_model import train_price_model_from_database, load_price_model
+from utils.comparables_index import update_comparables_index, load_comparables_index, get_default_index_path
+from utils.price_index import update_price_indices
+from benchmarks.synthetic_data import write_synthetic_csv
+
+DEFAULT_ROW_COUNTS = [10000, 100000, 1000000]
+
+# The row-at-a-time legacy insert path is only timed on this many rows
+LEGACY_INSERT_ROWS = 20000
+
+# Vehicles scored per batch by the price model benchmark
+PRICE_MODEL_BATCH_ROWS = 10000
+
+# Single-vehicle comparable-sales lookups timed against the comparables index
+COMPARABLES_LOOKUPS = 1000
+
+# Raw rows drawn for the per-sale scatter figure
+SCATTER_SAMPLE_ROWS = 100000
+
+VEHICLE_PRIMARY_KEY = ['vin', 'saledate', 'sellingprice', 'odometer']
+
+
+@contextmanager
+def measure(results, benchmark, row_count, trace_memory = False):
+    """
+    Times a benchmark with track_stage() and appends its statistics to results.
+
+    Args:
+        results (list): Result records, appended to on exit.
+        benchmark (str): Benchmark name.
+        row_count (int): Dataset size the benchmark runs against.
+        trace_memory (bool, optional): Also record the peak Python-heap allocation
+            inside the block with tracemalloc, at some cost in speed. Defaults to False.
+
+    Yields:
+        dict: The track_stage() statistics; set 'rows' to the rows processed.
+
+    Notes:
+        - 'process_peak_rss_mb' is the process-wide high-water mark so far, shared by
+          every later benchmark once one has raised it; 'peak_rss_growth_mb' is how
+          far this benchmark raised it, 0 when it stayed below an earlier peak
+    """
+    start_peak_rss_mb = get_peak_rss_mb()
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        with track_stage(f"{benchmark} ({row_count} rows)") as stage_stats:
+            yield stage_stats
+    finally:
+        peak_traced_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2 if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    results.append({'benchmark'           : benchmark,
+                    'dataset_rows'        : row_count,
+                    'rows'                : stage_stats['rows'],
+                    'seconds'             : stage_stats['seconds'],
+                    'rows_per_second'     : stage_stats['rows_per_second'],
+                    'process_peak_rss_mb' : stage_stats['peak_rss_mb'],
+                    'peak_rss_growth_mb'  : stage_stats['peak_rss_mb'] - start_peak_rss_mb,
+                    'peak_traced_mb'      : peak_traced_mb})
+
+
+def run_suite(row_count, work_dir, seed = 0, trace_memory = False):
+    """
+    Runs every benchmark against a freshly generated dataset of row_count rows.
+
+    Args:
+        row_count (int): Synthetic car_prices rows.
+        work_dir (str): Scratch directory for the CSV and the SQLite database.
+        seed (int, optional): Generator seed. Defaults to 0.
+        trace_memory (bool, optional): See measure(). Defaults to False.
+
+    Returns:
+        list: One result record per benchmark.
+    """
+    from plotly_dashboard import PlotObject, DASHBOARD_QUERY, SCATTER_POINTS_QUERY, PRICE_INDEX_QUERY, prepare_scatter_points
+
+    results = []
+    csv_path = os.path.join(work_dir, f"car_prices_{row_count}.csv")
+
+    sqlite_object = SQLiteDataObject(database_name = f"benchmark_{row_count}")
+    sqlite_object.base_dir = work_dir
+
+    with measure(results, 'generate_csv', row_count, trace_memory) as stats:
+        stats['rows'] = write_synthetic_csv(file_path = csv_path, n_rows = row_count, seed = seed)
+
+    with measure(results, 'ingest_csv', row_count, trace_memory) as stats:
+        stats['rows'] = sqlite_object.incremental_load_csv(file_path = csv_path,
+                                                           table_name = 'vehicle_sales_data',
+                                                           primary_key_columns = VEHICLE_PRIMARY_KEY,
+                                                           dtype = VEHICLE_SALES_DTYPES,
+                                                           saledate_column = 'saledate',
+                                                           index_specs = VEHICLE_SALES_INDEXES,
+                                                           force = True)
+
+    legacy_df = pd.read_csv(csv_path, dtype = VEHICLE_SALES_DTYPES, nrows = LEGACY_INSERT_ROWS)
+    sqlite_object.execute_sqlite_commands(commands = [get_create_sql_table_command(df = legacy_df,
+                                                                                   table_name = 'legacy_insert_data',
+                                                                                   primary_key_columns = VEHICLE_PRIMARY_KEY)])
+    with measure(results, 'ingest_legacy_insert_commands', row_count, trace_memory) as stats:
+        sqlite_object.execute_sqlite_commands(commands = get_sql_insert_commands(df = legacy_df,
+                                                                                 table_name = 'legacy_insert_data'))
+        stats['rows'] = len(legacy_df)
+
+    sqlite_object.incremental_load_csv(file_path = "data_folder/ford_stock_df.csv",
+                                       table_name = 'ford_stock_data',
+                                       primary_key_columns = ['year'],
+                                       force = True)
+
+    with measure(results, 'refresh_summaries', row_count, trace_memory) as stats:
+        refresh_sales_summaries(sqlite_object = sqlite_object)
+        stats['rows'] = row_count
+
+    with measure(results, 'query_dashboard', row_count, trace_memory) as stats:
+        year_plot_df = sqlite_object.query_from_database(query = DASHBOARD_QUERY)
+        stats['rows'] = len(year_plot_df)
+
+    with measure(results, 'query_year_columns', row_count, trace_memory) as stats:
+        year_columns = sqlite_object.query_to_columns(query = """SELECT make, model, sellingprice, mmr, odometer, condition
+                                                                 FROM vehicle_sales_data WHERE year = ?""",
+                                                      params = (2012,))
+        stats['rows'] = len(year_columns)
+
+    with measure(results, 'aggregate_sql_raw', row_count, trace_memory) as stats:
+        sql_aggregate_df = sqlite_object.query_from_database(query = """SELECT year, AVG(sellingprice) AS sellingprice, AVG(mmr) AS mmr,
+                                                                               AVG(odometer) AS odometer, AVG(condition) AS condition
+                                                                        FROM vehicle_sales_data GROUP BY year""")
+        stats['rows'] = row_count
+
+    with measure(results, 'aggregate_api_year_make', row_count, trace_memory) as stats:
+        sqlite_object.aggregate(group_by = ['year', 'make'],
+                                measures = {'sellingprice' : ['mean'], 'price_difference' : ['mean']},
+                                filters = {'year_range' : (2005, 2015)})
+        stats['rows'] = row_count
+
+    with measure(results, 'aggregate_pandas', row_count, trace_memory) as stats:
+        raw_df = sqlite_object.query_from_database(query = "SELECT year, sellingprice, mmr, odometer, condition FROM vehicle_sales_data")
+        pandas_aggregate_df = raw_df.groupby('year', as_index = False).mean()
+        stats['rows'] = len(raw_df)
+    del raw_df
+
+    with measure(results, 'price_model_train', row_count, trace_memory) as stats:
+        price_model = load_price_model(model_path = train_price_model_from_database(sqlite_object = sqlite_object))
+        stats['rows'] = price_model.metadata['training_rows']
+
+    inventory_df = sqlite_object.query_from_database(query = f"""SELECT make, model, year, condition, odometer, state
+                                                                FROM vehicle_sales_data
+                                                                LIMIT {PRICE_MODEL_BATCH_ROWS}""")
+    with measure(results, 'price_model_predict_batch', row_count, trace_memory) as stats:
+        price_model.predict_frame(df = inventory_df)
+        stats['rows'] = len(inventory_df)
+
+    with measure(results, 'comparables_build', row_count, trace_memory) as stats:
+        stats['rows'] = update_comparables_index(sqlite_object = sqlite_object)
+
+    comparables_index = load_comparables_index(index_path = get_default_index_path(sqlite_object = sqlite_object))
+    lookup_rows = inventory_df.dropna().head(COMPARABLES_LOOKUPS).to_dict('records')
+    with measure(results, 'comparables_query', row_count, trace_memory) as stats:
+        for row in lookup_rows:
+            comparables_index.query(make = row['make'],
+                                    model = row['model'],
+                                    year = row['year'],
+                                    odometer = row['odometer'],
+                                    condition = row['condition'])
+        stats['rows'] = len(lookup_rows)
+
+    with measure(results, 'price_index_build', row_count, trace_memory) as stats:
+        stats['rows'] = update_price_indices(sqlite_object = sqlite_object,
+                                             full = True)
+
+    with measure(results, 'figure_price_index', row_count, trace_memory) as stats:
+        price_index_df = sqlite_object.query_from_database(query = PRICE_INDEX_QUERY,
+                                                           params = ('week', 'all', 'all'))
+        PlotObject(df = price_index_df).create_price_index_plot().to_json()
+        stats['rows'] = len(price_index_df)
+
+    plot_object = PlotObject(df = year_plot_df)
+    for figure_method in ['create_bar_plot', 'create_multiline_plot', 'create_scatter_plot']:
+        with measure(results, f"figure_{figure_method[len('create_'):]}", row_count, trace_memory) as stats:
+            getattr(plot_object, figure_method)().to_json()
+            stats['rows'] = len(year_plot_df)
+
+    with measure(results, 'figure_scatter_raw_sample', row_count, trace_memory) as stats:
+        sample_df = sqlite_object.query_from_database(query = f"""SELECT sellingprice, odometer, condition
+                                                                  FROM vehicle_sales_data
+                                                                  LIMIT {SCATTER_SAMPLE_ROWS}""")
+        PlotObject(df = sample_df).create_scatter_plot().to_json()
+        stats['rows'] = len(sample_df)
+
+    with measure(results, 'figure_scatter_raw_binned', row_count, trace_memory) as stats:
+        scatter_points_df = prepare_scatter_points(df = sqlite_object.query_from_database(query = SCATTER_POINTS_QUERY.format(sales_source = 'vehicle_sales_data')))
+        PlotObject(df = scatter_points_df).create_raw_scatter_plot().to_json()
+        stats['rows'] = len(scatter_points_df)
+
+    sqlite_object.close()
+
+    return results
+
+
+def get_metadata(seed):
+    """
+    Returns the environment details stored alongside benchmark results.
+    """
+    try:
+        git_commit = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                    capture_output = True, text = True, cwd = REPO_DIR).stdout.strip() or None
+    except OSError:
+        git_commit = None
+
+    return {'timestamp'      : datetime.now(timezone.utc).isoformat(),
+            'git_commit'     : git_commit,
+            'python_version' : platform.python_version(),
+            'pandas_version' : pd.__version__,
+            'numpy_version'  : np.__version__,
+            'platform'       : platform.platform(),
+            'cpu_count'      : os.cpu_count(),
+            'seed'           : seed}
+
+
+def compare_results(results, baseline_results, tolerance = 0.2):
+    """
+    Compares benchmark timings against a baseline run.
+
+    Args:
+        results (list): Current result records.
+        baseline_results (list): Result records of the baseline run.
+        tolerance (float, optional): Allowed relative slowdown before a benchmark counts
+            as a regression. Defaults to 0.2 (20%).
+
+    Returns:
+        list: (benchmark, dataset_rows, baseline seconds, current seconds, ratio,
+            regressed flag) for every benchmark present in both runs.
+    """
+    baseline_seconds = {(record['benchmark'], record['dataset_rows']) : record['seconds']
+                        for record in baseline_results}
+
+    comparisons = []
+    for record in results:
+        key = (record['benchmark'], record['dataset_rows'])
+        if key not in baseline_seconds or not baseline_seconds[key]:
+            continue
+        ratio = record['seconds'] / baseline_seconds[key]
+        comparisons.append((*key, baseline_seconds[key], record['seconds'], ratio, ratio > 1 + tolerance))
+
+    return comparisons
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = "Benchmark ingestion, queries, aggregation and figures on synthetic car_prices data")
+    parser.add_argument('--rows', type = int, nargs = '+', default = DEFAULT_ROW_COUNTS,
+                        help = "dataset sizes to run, e.g. --rows 10000 1000000 10000000")
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--output', help = "write the JSON results to this file instead of stdout")
+    parser.add_argument('--work-dir', help = "scratch directory for CSVs and databases (kept after the run)")
+    parser.add_argument('--trace-memory', action = 'store_true',
+                        help = "record per-benchmark peak Python-heap allocations with tracemalloc")
+    parser.add_argument('--compare', help = "baseline results file; exit with status 1 on regressions")
+    parser.add_argument('--tolerance', type = float, default = 0.2,
+                        help = "allowed relative slowdown against --compare (default 0.2)")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix = 'vehicle_sales_bench_')
+    os.makedirs(work_dir, exist_ok = True)
+
+    try:
+        results = []
+        for row_count in args.rows:
+            results.extend(run_suite(row_count = row_count,
+                                     work_dir = work_dir,
+                                     seed = args.seed,
+                                     trace_memory = args.trace_memory))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors = True)
+
+    report = {'metadata' : get_metadata(seed = args.seed),
+              'results'  : results}
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent = 2)
+    else:
+        print(json.dumps(report, indent = 2))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline_report = json.load(baseline_file)
+
+        comparisons = compare_results(results = results,
+                                      baseline_results = baseline_report['results'],
+                                      tolerance = args.tolerance)
+        for benchmark, dataset_rows, baseline_seconds, seconds, ratio, regressed in comparisons:
+            print(f"{benchmark:<32} {dataset_rows:>10} {baseline_seconds:>9.3f}s -> {seconds:>9.3f}s "
+                  f"({ratio:.2f}x){'  REGRESSION' if regressed else ''}",
+                  file = sys.stderr)
+
+        if any(comparison[-1] for comparison in comparisons):
+            sys.exit(1)
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+
+# Most common car_prices makes with their approximate share of sales; the remaining
+# share is spread over SYNTHETIC_TAIL_MAKES rare makes
+MAKE_WEIGHTS = {'Ford'          : 0.170, 'Chevrolet'  : 0.110, 'Nissan'     : 0.100,
+                'Toyota'        : 0.070, 'Dodge'      : 0.060, 'Honda'      : 0.050,
+                'Hyundai'       : 0.040, 'BMW'        : 0.040, 'Kia'        : 0.033,
+                'Chrysler'      : 0.032, 'Mercedes-Benz' : 0.030, 'Jeep'    : 0.028,
+                'Infiniti'      : 0.027, 'Volkswagen' : 0.023, 'Lexus'      : 0.021,
+                'GMC'           : 0.019, 'Mazda'      : 0.015, 'Cadillac'   : 0.014,
+                'Acura'         : 0.011, 'Audi'       : 0.011, 'Lincoln'    : 0.010,
+                'Buick'         : 0.009, 'Subaru'     : 0.009, 'Ram'        : 0.008,
+                'Pontiac'       : 0.008, 'Mitsubishi' : 0.007, 'Volvo'      : 0.006,
+                'Mini'          : 0.005, 'Saturn'     : 0.005, 'Mercury'    : 0.004}
+
+SYNTHETIC_TAIL_MAKES = 30
+
+# Distinct models across all makes in car_prices is close to 1,000 (60 makes x 16)
+MODELS_PER_MAKE = 16
+
+TRIMS = ['Base', 'LX', 'EX', 'SE', 'LE', 'S', 'SV', 'SL', 'LT', 'LS', 'XLE', 'XLT', 'Limited',
+         'Sport', 'Touring', 'Premium', 'Platinum', 'Lariat', 'SXT', 'GT', 'i', 'xDrive28i',
+         '2.5 S', '3.5 SL', 'Hybrid', 'Laredo', 'Sahara', 'Denali', 'Titanium', 'Signature']
+
+BODIES = ['Sedan', 'SUV', 'Hatchback', 'Minivan', 'Coupe', 'Crew Cab', 'Wagon', 'Convertible',
+          'SuperCrew', 'Quad Cab', 'Extended Cab', 'G Sedan', 'Regular Cab', 'Van',
+          'sedan', 'suv', 'hatchback', 'minivan', 'coupe', 'crew cab', 'wagon']
+
+STATES = ['fl', 'ca', 'pa', 'tx', 'ga', 'nj', 'il', 'nc', 'oh', 'tn', 'mo', 'mi', 'nv', 'va',
+          'md', 'wi', 'mn', 'az', 'co', 'wa', 'ma', 'ne', 'in', 'sc', 'la', 'or', 'hi', 'ut',
+          'ms', 'nm', 'qc', 'on', 'ok', 'pr', 'ab', 'ns', 'al', 'ny']
+
+COLORS = ['black', 'white', 'silver', 'gray', 'blue', 'red', '—', 'green', 'gold', 'beige',
+          'burgundy', 'brown', 'orange', 'purple', 'off-white', 'yellow', 'charcoal',
+          'turquoise', 'pink', 'lime']
+
+INTERIORS = ['black', 'gray', 'beige', 'tan', '—', 'brown', 'red', 'silver', 'blue',
+             'off-white', 'purple', 'gold', 'white', 'burgundy', 'green', 'orange', 'yellow']
+
+# car_prices has roughly 14,000 sellers with a long tail of one-off sellers
+SELLER_COUNT = 14000
+
+# Sale dates span January 2014 to July 2015 with a handful of auction start times a day
+SALE_START_DATE = '2014-01-01'
+SALE_DAYS = 546
+SALE_HOURS = [9, 10, 11, 12, 13, 14, 15, 16]
+
+
+def get_make_names():
+    """
+    Returns the make vocabulary and its sampling weights.
+
+    Returns:
+        tuple: (list of make names, numpy array of probabilities summing to 1).
+    """
+    tail_share = 1 - sum(MAKE_WEIGHTS.values())
+    make_names = list(MAKE_WEIGHTS) + [f"Make{i:02d}" for i in range(SYNTHETIC_TAIL_MAKES)]
+    make_weights = np.array(list(MAKE_WEIGHTS.values()) +
+                            [tail_share / SYNTHETIC_TAIL_MAKES] * SYNTHETIC_TAIL_MAKES)
+
+    return make_names, make_weights / make_weights.sum()
+
+
+def get_saledate_strings():
+    """
+    Returns every sale date string the generator can emit, in car_prices' raw format,
+    e.g. 'Tue Dec 16 2014 12:30:00 GMT-0800 (PST)'.
+    """
+    sale_days = pd.date_range(SALE_START_DATE, periods = SALE_DAYS, freq = 'D')
+    sale_times = pd.DatetimeIndex([day + pd.Timedelta(hours = hour, minutes = 30)
+                                   for day in sale_days for hour in SALE_HOURS])
+
+    is_daylight_time = (sale_times.month >= 4) & (sale_times.month <= 10)
+    tz_suffixes = np.where(is_daylight_time, 'GMT-0700 (PDT)', 'GMT-0800 (PST)')
+
+    return [f"{sale_time.strftime('%a %b %d %Y %H:%M:%S')} {tz_suffix}"
+            for sale_time, tz_suffix in zip(sale_times, tz_suffixes)]
+
+
+def make_synthetic_chunk(n_rows, seed = 0, vin_offset = 0):
+    """
+    Generates car_prices shaped rows with realistic cardinalities and value ranges.
+
+    Args:
+        n_rows (int): Number of rows.
+        seed (int, optional): Random seed; the same seed gives the same rows. Defaults to 0.
+        vin_offset (int, optional): First VIN serial number, so chunks generated
+            separately get distinct VINs. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: Columns, dtypes and missing-value patterns of car_prices.csv.
+            Text columns are categoricals to keep large frames small.
+
+    Notes:
+        - Make shares follow MAKE_WEIGHTS, models are skewed within each make, and a
+          few percent of makes and bodies are lowercased as in the Kaggle data
+        - Odometer and MMR depend on vehicle age and condition, and selling price
+          scatters around MMR, so aggregates and correlations look plausible
+    """
+    rng = np.random.default_rng(seed)
+
+    make_names, make_weights = get_make_names()
+    make_codes = rng.choice(len(make_names), size = n_rows, p = make_weights)
+
+    # About 2% of makes appear lowercased, e.g. 'ford' next to 'Ford'
+    lowercase_mask = rng.random(n_rows) < 0.02
+    make_categories = make_names + [make_name.lower() for make_name in make_names]
+    make_values = pd.Categorical.from_codes(make_codes + lowercase_mask * len(make_names),
+                                            categories = make_categories)
+
+    model_names = [f"{make_name} Model {model_index}"
+                   for make_name in make_names for model_index in range(MODELS_PER_MAKE)]
+    model_index = (rng.random(n_rows) ** 2 * MODELS_PER_MAKE).astype(int)
+    model_values = pd.Categorical.from_codes(make_codes * MODELS_PER_MAKE + model_index,
+                                             categories = model_names)
+
+    sale_date_codes = rng.integers(0, SALE_DAYS * len(SALE_HOURS), n_rows)
+    sale_years = 2014 + (sale_date_codes >= 365 * len(SALE_HOURS))
+
+    vehicle_age = np.minimum(rng.geometric(0.22, n_rows) - 1, 33)
+    years = sale_years - vehicle_age
+
+    condition = rng.integers(1, 50, n_rows).astype('float64')
+    five_point_mask = rng.random(n_rows) < 0.1
+    condition[five_point_mask] = np.round(1 + condition[five_point_mask] / 49 * 4, 1)
+    condition[rng.random(n_rows) < 0.02] = np.nan
+
+    odometer = np.clip(np.round((vehicle_age + 0.5) * 12000 * rng.lognormal(0, 0.45, n_rows)), 1, 999999)
+    odometer[rng.random(n_rows) < 0.0002] = np.nan
+
+    make_base_prices = rng.uniform(18000, 45000, len(make_names))
+    condition_factor = 0.75 + 0.5 * np.nan_to_num(np.where(condition > 5, condition / 49, condition / 5), nan = 0.5)
+    mmr = np.clip(np.round(make_base_prices[make_codes] * 0.85 ** vehicle_age * condition_factor / 25) * 25,
+                  25, 182000)
+
+    sellingprice = np.clip(np.round(mmr * rng.normal(1, 0.12, n_rows) / 100) * 100, 1, 230000)
+    mmr[rng.random(n_rows) < 0.0001] = np.nan
+    sellingprice[rng.random(n_rows) < 0.0001] = np.nan
+
+    transmission = rng.choice(np.array(['automatic', 'manual', None], dtype = object),
+                              size = n_rows,
+                              p = [0.85, 0.03, 0.12])
+
+    vins = np.char.add('1fa', np.char.zfill(np.arange(vin_offset, vin_offset + n_rows).astype('U'), 14))
+
+    seller_codes = np.minimum(rng.zipf(1.3, n_rows), SELLER_COUNT) - 1
+
+    return pd.DataFrame({'year'         : years.astype('int64'),
+                         'make'         : make_values,
+                         'model'        : model_values,
+                         'trim'         : pd.Categorical.from_codes(rng.integers(0, len(TRIMS), n_rows), categories = TRIMS),
+                         'body'         : pd.Categorical.from_codes(rng.integers(0, len(BODIES), n_rows), categories = BODIES),
+                         'transmission' : transmission,
+                         'vin'          : vins.astype(object),
+                         'state'        : pd.Categorical.from_codes(rng.integers(0, len(STATES), n_rows), categories = STATES),
+                         'condition'    : condition,
+                         'odometer'     : odometer,
+                         'color'        : pd.Categorical.from_codes(rng.integers(0, len(COLORS), n_rows), categories = COLORS),
+                         'interior'     : pd.Categorical.from_codes(rng.integers(0, len(INTERIORS), n_rows), categories = INTERIORS),
+                         'seller'       : pd.Categorical.from_codes(seller_codes, categories = [f"seller {i}" for i in range(SELLER_COUNT)]),
+                         'mmr'          : mmr,
+                         'sellingprice' : sellingprice,
+                         'saledate'     : pd.Categorical.from_codes(sale_date_codes, categories = get_saledate_strings())})
+
+
+def iter_synthetic_chunks(n_rows, chunk_rows = 500000, seed = 0):
+    """
+    Generates n_rows of synthetic car_prices data in chunks of at most chunk_rows.
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks with distinct VINs; each chunk has its own
+            seed derived from seed, so output is reproducible for a given chunk_rows.
+    """
+    for chunk_index, start in enumerate(range(0, n_rows, chunk_rows)):
+        yield make_synthetic_chunk(n_rows = min(chunk_rows, n_rows - start),
+                                   seed = seed * 100003 + chunk_index,
+                                   vin_offset = start)
+
+
+def make_synthetic_car_prices(n_rows, seed = 0):
+    """
+    Returns n_rows of synthetic car_prices data as one DataFrame.
+    """
+    return pd.concat(iter_synthetic_chunks(n_rows = n_rows, seed = seed), ignore_index = True)
+
+
+def write_synthetic_csv(file_path, n_rows, chunk_rows = 500000, seed = 0):
+    """
+    Writes n_rows of synthetic car_prices data to a CSV file chunk by chunk.
+
+    Args:
+        file_path (str): Output path, e.g. '<dir>/car_prices.csv'.
+        n_rows (int): Number of rows.
+        chunk_rows (int, optional): Rows generated and written at a time. Defaults to 500000.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        int: The number of rows written.
+    """
+    for chunk_index, chunk_df in enumerate(iter_synthetic_chunks(n_rows = n_rows,
+                                                                  chunk_rows = chunk_rows,
+                                                                  seed = seed)):
+        chunk_df.to_csv(file_path,
+                        mode = 'w' if chunk_index == 0 else 'a',
+                        header = chunk_index == 0,
+                        index = False)
+
+    return n_rows
@@ -1,8 +1,19 @@
 import pandas as pd
+import numpy as np
 import matplotlib.colors as mcolors
+import os
+import sqlite3
+from functools import partial
 from utils.data_transfer import import_sql_script, SQLiteDataObject
+from utils.data_cache import CachedDataLayer
+from utils.instrumentation import instrument, register_metrics_endpoint
+from utils.price_model import get_default_model_path, load_price_model
+from utils.comparables_index import get_default_index_path, load_comparables_index
+from utils.dimension_tables import VIEW_NAME
+from src.dashboard_visual_funcs import FigureCache, bin_scatter_points
+from src.dashboard_payloads import compact_figure, register_response_compression
 import dash
-from dash import dcc, html, Output, Input
+from dash import dcc, html, Output, Input, State, ClientsideFunction
 from datetime import date
 import plotly.express as px
 import plotly.graph_objects as go
@@ -26,7 +37,13 @@ NAV_BUTTONS = [{'nav'   : 'About',
                 'value' : 'multiline'},
                 {'nav'   : 'Auto Sales Comparison',
                  'id'    : 'nav-compared',
-                 'value' : 'compared'}]
+                 'value' : 'compared'},
+               {'nav'   : 'Price Estimate',
+                'id'    : 'nav-estimate',
+                'value' : 'estimate'},
+               {'nav'   : 'Price Index',
+                'id'    : 'nav-index',
+                'value' : 'index'}]
 
 DATE_PICKER = [{'id'         : 'year',
                 'start_date' : date(2000, 1, 1),
@@ -35,25 +52,172 @@ DATE_PICKER = [{'id'         : 'year',
                 'start_date' : date(2000, 1, 1),
                 'end_date'   : date(2015, 12, 31)}]
 
+MULTILINE_VARIABLES = {'sellingprice'     : 'Selling Price',
+                       'mmr'              : 'Manheim Market Report',
+                       'odometer'         : 'Odometer',
+                       'price_difference' : 'Price Difference',
+                       'condition'        : 'Condition'}
+
+# When enabled, the year plot data is shipped to the browser once and the date-range
+# filtering of the bar and multiline plots runs in clientside callbacks
+CLIENTSIDE_FILTERING = os.environ.get('DASHBOARD_CLIENTSIDE_FILTERING') == '1'
+
 DASHBOARD_QUERY = import_sql_script(sql_script_path = 'sql_scripts/dashboard_query.sql')
 
 AUTO_SALES_QUERY = import_sql_script(sql_script_path='sql_scripts/auto_sales_query.sql')
 
-SQLITE_OBJECT = SQLiteDataObject(database_name = "tool_data")
+# Formatted with the sales table or view, see get_sales_source_name()
+SCATTER_POINTS_QUERY = import_sql_script(sql_script_path = 'sql_scripts/scatter_points_query.sql')
+
+# Per-sale table or view read by the all-sales scatter; by default the normalized
+# view when batch__etl_pipeline.py ran with ETL_NORMALIZED=1, else vehicle_sales_data
+SALES_SOURCE = os.environ.get('DASHBOARD_SALES_SOURCE')
+
+SALES_SOURCE_QUERY = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name IN (?, ?)"
+
+# The all-sales scatter draws individual sales with WebGL while at most this many fall
+# inside the visible range, and a SCATTER_BINS x SCATTER_BINS grid of mean condition
+# binned on the server above it
+SCATTERGL_MAX_POINTS = int(os.environ.get('DASHBOARD_SCATTERGL_MAX_POINTS', 100000))
+SCATTER_BINS = int(os.environ.get('DASHBOARD_SCATTER_BINS', 200))
+
+SCATTER_MODES = [{'label' : 'Yearly averages',
+                  'value' : 'means'},
+                 {'label' : 'All sales',
+                  'value' : 'raw'}]
+
+# Monthly and weekly price indices kept up to date by batch__etl_pipeline.py
+PRICE_INDEX_QUERY = import_sql_script(sql_script_path = 'sql_scripts/price_index_query.sql')
+
+PRICE_INDEX_SEGMENTS_QUERY = import_sql_script(sql_script_path = 'sql_scripts/price_index_segments_query.sql')
+
+PRICE_INDEX_PERIODS = [{'label' : 'Monthly',
+                        'value' : 'month'},
+                       {'label' : 'Weekly',
+                        'value' : 'week'}]
+
+SQLITE_OBJECT = SQLiteDataObject(database_name = "tool_data",
+                                 read_only = True)
+
+DATA_LAYER = CachedDataLayer(sqlite_object = SQLITE_OBJECT,
+                             ttl_seconds = int(os.environ.get('DASHBOARD_CACHE_TTL', 300)))
+
+# Trained by batch__etl_pipeline.py next to tool_data.db and loaded on the first lookup
+PRICE_MODEL_PATH = get_default_model_path(sqlite_object = SQLITE_OBJECT)
+
+# Comparable-sales index updated by batch__etl_pipeline.py, searched for the vehicle
+# entered in the price estimate view
+COMPARABLES_INDEX_PATH = get_default_index_path(sqlite_object = SQLITE_OBJECT)
+
+COMPARABLES_COUNT = int(os.environ.get('DASHBOARD_COMPARABLES_COUNT', 10))
+
+COMPARABLES_COLUMNS = {'year'         : 'Year',
+                       'odometer'     : 'Odometer',
+                       'condition'    : 'Condition',
+                       'sellingprice' : 'Selling Price',
+                       'mmr'          : 'MMR'}
+
+ESTIMATE_INPUTS = [{'id'          : 'estimate-make',
+                    'placeholder' : 'Make (e.g. Ford)',
+                    'type'        : 'text'},
+                   {'id'          : 'estimate-model',
+                    'placeholder' : 'Model (e.g. Fusion)',
+                    'type'        : 'text'},
+                   {'id'          : 'estimate-year',
+                    'placeholder' : 'Year',
+                    'type'        : 'number'},
+                   {'id'          : 'estimate-condition',
+                    'placeholder' : 'Condition (1-5 or 10-50)',
+                    'type'        : 'number'},
+                   {'id'          : 'estimate-odometer',
+                    'placeholder' : 'Odometer',
+                    'type'        : 'number'},
+                   {'id'          : 'estimate-state',
+                    'placeholder' : 'State (e.g. fl)',
+                    'type'        : 'text'}]
+
+# Scatter figures, whose point arrays make up most callback payload bytes, are sent
+# with data arrays rounded to FIGURE_DECIMALS places, downcast and base64 encoded, and
+# with unused template sections removed; set DASHBOARD_COMPACT_FIGURES=0 to send them
+# as Plotly serializes them. Other figures hold a few hundred values, some of them
+# ratios shown to more decimals, and are always sent as serialized
+COMPACT_FIGURES = os.environ.get('DASHBOARD_COMPACT_FIGURES', '1') != '0'
+FIGURE_DECIMALS = int(os.environ.get('DASHBOARD_FIGURE_DECIMALS', 2))
+
+# Set DASHBOARD_RESPONSE_COMPRESSION=0 to serve responses uncompressed, e.g. behind a
+# proxy that already compresses them
+RESPONSE_COMPRESSION = os.environ.get('DASHBOARD_RESPONSE_COMPRESSION', '1') != '0'
+
+def prepare_scatter_figure(figure):
+
+    return compact_figure(figure = figure, decimals = FIGURE_DECIMALS) if COMPACT_FIGURES else figure
+
+FIGURE_CACHE = FigureCache(max_entries = int(os.environ.get('DASHBOARD_FIGURE_CACHE_SIZE', 512)))
+
+# Separate from FIGURE_CACHE, which empties itself whenever it is handed a different
+# source DataFrame; only the unzoomed all-sales figure is cached
+SCATTER_FIGURE_CACHE = FigureCache(max_entries = 1,
+                                   compact_figure = partial(compact_figure, decimals = FIGURE_DECIMALS) if COMPACT_FIGURES else None)
+
+# PlotObject methods used to build the date-range filtered figures
+YEAR_RANGE_PLOTS = {'bar'       : 'create_bar_plot',
+                    'multiline' : 'create_multiline_plot'}
+
+# DATA ACCESS -------------------------------------------------------------------------------
+
+# price_difference is computed in DASHBOARD_QUERY and manufacturer rank prefixes are
+# stripped when auto_sales_comparison is loaded, so both frames are used as queried
+
+def get_year_plot_df():
+
+    return DATA_LAYER.query(query = DASHBOARD_QUERY)
+
+def get_auto_sales_df():
+
+    return DATA_LAYER.query(query = AUTO_SALES_QUERY)
+
+def prepare_scatter_points(df):
+
+    # float32 halves the cached arrays; condition is put on the 10-50 scale so the
+    # 1-5 graded sales do not pull cell means down
+    condition = df['condition'].to_numpy(dtype = 'float64')
+
+    return pd.DataFrame({'sellingprice' : df['sellingprice'].to_numpy(dtype = 'float32'),
+                         'odometer'     : df['odometer'].to_numpy(dtype = 'float32'),
+                         'condition'    : np.where(condition <= 5, condition * 10, condition).astype('float32')})
+
+def get_sales_source_name():
 
-DASHBOARD_DF = SQLITE_OBJECT.query_from_database(query = DASHBOARD_QUERY)
+    if SALES_SOURCE:
+        return SALES_SOURCE
 
-AUTO_SALES_DF = SQLITE_OBJECT.query_from_database(query = AUTO_SALES_QUERY)
+    # A database loaded both ways keeps both relations; the view is the one the
+    # normalized loads keep current
+    source_names = set(DATA_LAYER.query(query = SALES_SOURCE_QUERY,
+                                        params = (VIEW_NAME, 'vehicle_sales_data'))['name'])
 
-AUTO_SALES_DF['Manufacturer'] = AUTO_SALES_DF['Manufacturer'].str.replace(r'^\d+\.\s*', '', regex = True).str.strip()
+    return VIEW_NAME if VIEW_NAME in source_names else 'vehicle_sales_data'
 
-FLOAT_COLS = [col for col, _dtype in DASHBOARD_DF.dtypes.items()
-                  if (('float' in str(_dtype)) and
-                      (_dtype != 'year'))]
+def get_scatter_points_df():
 
-YEAR_PLOT_DF = DASHBOARD_DF.groupby("year")[FLOAT_COLS].mean().reset_index()
+    return DATA_LAYER.query(query = SCATTER_POINTS_QUERY.format(sales_source = get_sales_source_name()),
+                            postprocess = prepare_scatter_points)
 
-YEAR_PLOT_DF['price_difference'] = YEAR_PLOT_DF["sellingprice"] - YEAR_PLOT_DF["mmr"]
+def get_price_index_df(period_type, segment_key):
+
+    # Segment dropdown values are 'segment_type|segment', e.g. 'make|ford'
+    segment_type, segment = segment_key.split('|', 1)
+
+    return DATA_LAYER.query(query = PRICE_INDEX_QUERY,
+                            params = (period_type, segment_type, segment))
+
+def get_price_index_segment_options():
+
+    segments_df = DATA_LAYER.query(query = PRICE_INDEX_SEGMENTS_QUERY)
+
+    return [{'label' : 'All sales' if segment_type == 'all' else segment.title(),
+             'value' : f"{segment_type}|{segment}"}
+            for segment_type, segment in zip(segments_df['segment_type'], segments_df['segment'])]
 
 # CLASS -------------------------------------------------------------------------------------
 
@@ -63,6 +227,7 @@ class PlotObject():
         self.df = df
         self.auto_sales_df = auto_sales_df
     
+    @instrument()
     def create_bar_plot(self):
 
         bar_plot = px.bar(self.df,
@@ -80,6 +245,7 @@ class PlotObject():
 
         return bar_plot
     
+    @instrument()
     def create_scatter_plot(self):
 
         scatter_plot = px.scatter(self.df,
@@ -105,6 +271,111 @@ class PlotObject():
         
         return scatter_plot
     
+    @instrument()
+    def create_raw_scatter_plot(self, x_range = None, y_range = None):
+
+        x = self.df['sellingprice'].to_numpy()
+        y = self.df['odometer'].to_numpy()
+        condition = self.df['condition'].to_numpy()
+
+        # Without a zoom, the axes span the central 99.8% of sales so a handful of
+        # extreme prices and odometer readings do not squash the rest into one corner
+        if x_range is None:
+            x_range = tuple(np.quantile(x, [0.001, 0.999]).tolist()) if len(x) else (0, 1)
+        if y_range is None:
+            y_range = tuple(np.quantile(y, [0.001, 0.999]).tolist()) if len(y) else (0, 1)
+
+        visible_mask = (x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1])
+        visible_count = int(visible_mask.sum())
+
+        if visible_count <= SCATTERGL_MAX_POINTS:
+            trace = go.Scattergl(x = x[visible_mask],
+                                 y = y[visible_mask],
+                                 mode = 'markers',
+                                 marker = dict(color = condition[visible_mask],
+                                               colorscale = 'viridis',
+                                               colorbar = dict(title = 'Condition'),
+                                               size = 4,
+                                               opacity = 0.6),
+                                 hovertemplate = 'Selling Price: %{x:,.0f}<br>Odometer: %{y:,.0f}<br>Condition: %{marker.color:.0f}<extra></extra>')
+            title = f'Odometer and Condition Insights ({visible_count:,} sales)'
+        else:
+            x_centers, y_centers, counts, mean_condition = bin_scatter_points(x = x,
+                                                                              y = y,
+                                                                              values = condition,
+                                                                              x_range = x_range,
+                                                                              y_range = y_range,
+                                                                              bins = SCATTER_BINS)
+            trace = go.Heatmap(x = x_centers,
+                               y = y_centers,
+                               z = np.where(counts > 0, np.round(mean_condition, 1), np.nan).astype('float32'),
+                               customdata = counts,
+                               colorscale = 'viridis',
+                               colorbar = dict(title = 'Mean Condition'),
+                               hovertemplate = 'Selling Price: %{x:,.0f}<br>Odometer: %{y:,.0f}<br>Sales: %{customdata:,}<br>Mean Condition: %{z:.1f}<extra></extra>')
+            title = f'Odometer and Condition Insights ({visible_count:,} sales binned)'
+
+        raw_scatter_plot = go.Figure(data = [trace])
+
+        raw_scatter_plot.update_layout(title = title,
+                                       xaxis_title = 'Selling Price',
+                                       yaxis_title = 'Odometer',
+                                       xaxis_range = list(x_range),
+                                       yaxis_range = list(y_range),
+                                       template = 'plotly_dark',
+                                       height = 700,
+                                       width = 1000,
+                                       title_x = 0.5,
+                                       uirevision = 'raw')
+
+        return raw_scatter_plot
+
+    @instrument()
+    def create_price_index_plot(self, title = 'Price Index'):
+
+        fig = make_subplots(rows = 2,
+                            cols = 1,
+                            vertical_spacing = 0.1,
+                            shared_xaxes = True)
+
+        # (column, trace name, subplot row); rolling windows are drawn dotted
+        price_traces = [('median_price', 'Median Price', 1),
+                        ('mean_price', 'Mean Price', 1),
+                        ('rolling_median_price', 'Rolling Median Price', 1),
+                        ('price_to_mmr', 'Price / MMR', 2),
+                        ('rolling_price_to_mmr', 'Rolling Price / MMR', 2)]
+
+        for trace_num, (y_col, cleaned_y_name, row_num) in enumerate(price_traces):
+            fig.add_trace(
+                go.Scatter(x = self.df['period_start'],
+                           y = self.df[y_col],
+                           name = cleaned_y_name,
+                           customdata = self.df['sales_count'],
+                           line = dict(color = COLORS[trace_num],
+                                       dash = 'dot' if y_col.startswith('rolling') else 'solid'),
+                           mode = 'lines',
+                           hovertemplate = '%{x}: %{y:,.3~f}<br>Sales: %{customdata:,}<extra></extra>'),
+                row = row_num,
+                col = 1)
+
+        fig.update_xaxes(gridcolor = 'DimGray',
+                         zerolinecolor = 'DimGray')
+        fig.update_yaxes(title_text = 'Selling Price',
+                         row = 1,
+                         col = 1)
+        fig.update_yaxes(title_text = 'Selling Price / MMR',
+                         row = 2,
+                         col = 1)
+
+        fig.update_layout(title_text = title,
+                          template = 'plotly_dark',
+                          height = 700,
+                          width = 1000,
+                          title_x = 0.5)
+
+        return fig
+
+    @instrument()
     def create_bar_chart(self):
 
         sorted_df = self.auto_sales_df.sort_values(by = 'percent_change_2023', ascending = True)
@@ -128,12 +399,9 @@ class PlotObject():
 
         return bar_chart
     
+    @instrument()
     def create_multiline_plot(self,
-                              variable_name_dict = {'sellingprice'     : 'Selling Price',
-                                                    'mmr'              : 'Manheim Market Report',
-                                                    'odometer'         : 'Odometer',
-                                                    'price_difference' : 'Price Difference',
-                                                    'condition'        : 'Condition'}):
+                              variable_name_dict = MULTILINE_VARIABLES):
 
         fig = make_subplots(rows = len(variable_name_dict), 
                             cols = 1,
@@ -180,7 +448,34 @@ class PlotObject():
         return fig
 
 
-plot_object = PlotObject(df=YEAR_PLOT_DF.copy(deep = True), auto_sales_df = AUTO_SALES_DF.copy(deep = True))
+def get_year_range_figure(plot_type, start_date, end_date):
+
+    year_plot_df = get_year_plot_df()
+
+    # Clamp to the years present so equivalent ranges share one cache entry
+    start_year = max(pd.to_datetime(start_date).year, year_plot_df['year'].min())
+    end_year = min(pd.to_datetime(end_date).year, year_plot_df['year'].max())
+
+    def build_figure():
+        filtered_df = year_plot_df[(year_plot_df['year'] >= start_year) & (year_plot_df['year'] <= end_year)]
+        plot_object = PlotObject(df = filtered_df)
+
+        return getattr(plot_object, YEAR_RANGE_PLOTS[plot_type])()
+
+    return FIGURE_CACHE.get_figure(key = (plot_type, int(start_year), int(end_year)),
+                                   build_figure = build_figure,
+                                   source = year_plot_df)
+
+def precompute_year_range_figures():
+
+    years = sorted(get_year_plot_df()['year'].unique())
+
+    for plot_type in YEAR_RANGE_PLOTS:
+        for start_index, start_year in enumerate(years):
+            for end_year in years[start_index:]:
+                get_year_range_figure(plot_type = plot_type,
+                                      start_date = date(start_year, 1, 1),
+                                      end_date = date(end_year, 12, 31))
 
 # DASH -------------------------------------------------------------------------------------
 
@@ -193,6 +488,14 @@ app = dash.Dash(__name__,
 
 server = app.server
 
+# Prometheus text metrics of the instrumented queries, figures and callbacks
+register_metrics_endpoint(server = server)
+
+# gzip (or brotli, when installed) for callback responses and Dash's JavaScript bundles,
+# with each callback's raw and sent payload sizes added to the metrics
+if RESPONSE_COMPRESSION:
+    register_response_compression(server = server)
+
 app.layout = html.Div([
     html.Img(src = "https://www.ford.com/content/dam/brand_ford/en_us/brand/performance/gt/gallery/3_2/FRD_GT_000005.jpg/jcr:content/renditions/cq5dam.web.1440.1440.jpeg",
              style = {'width'      : '100vw',
@@ -209,6 +512,7 @@ app.layout = html.Div([
     ], className = 'nav-location'),
     dcc.Store(id = 'plot-selection',
               data = 'none'),
+    dcc.Store(id = 'year-plot-store'),
     *[dcc.DatePickerRange(id = dp['id'],
                           start_date = dp['start_date'],
                           end_date = dp['end_date'],
@@ -229,15 +533,20 @@ app.layout = html.Div([
      Input('nav-bar', 'n_clicks'),
      Input('nav-scatter', 'n_clicks'),
      Input('nav-multiline', 'n_clicks'),
-     Input('nav-compared', 'n_clicks')],
+     Input('nav-compared', 'n_clicks'),
+     Input('nav-estimate', 'n_clicks'),
+     Input('nav-index', 'n_clicks')],
     prevent_initial_call = True
 )
 
+@instrument(rows = None)
 def update_selection(about_clicks,
                      bar_clicks,
                      scatter_clicks,
                      multiline_clicks,
-                     compared_clicks
+                     compared_clicks,
+                     estimate_clicks,
+                     index_clicks
                      ):
 
     ctx = dash.callback_context
@@ -254,14 +563,20 @@ def update_selection(about_clicks,
         return 'multiline'
     elif triggered_id == 'nav-compared':
         return 'compared'
+    elif triggered_id == 'nav-estimate':
+        return 'estimate'
+    elif triggered_id == 'nav-index':
+        return 'index'
 
 @app.callback(
     Output('plot-container', 'children'),
     Input('plot-selection', 'data')
 )
 
+@instrument(rows = None)
 def update_plot(plot_selection):
 
+    plot_object = PlotObject(df = get_year_plot_df(), auto_sales_df = get_auto_sales_df())
     
     if plot_selection == 'none':
         return ([])
@@ -304,7 +619,9 @@ def update_plot(plot_selection):
                               className = 'fade-in')
             ], className = 'bar-text-container'),
             dcc.Graph(id = 'bar-plot',
-                      figure = plot_object.create_bar_plot(),
+                      figure = get_year_range_figure(plot_type = 'bar',
+                                                     start_date = DATE_PICKER[0]['start_date'],
+                                                     end_date = DATE_PICKER[0]['end_date']),
                       style = {'margin' : '-423px 399px'}),
         ]
     elif plot_selection == 'scatter':
@@ -315,10 +632,16 @@ def update_plot(plot_selection):
                             className = 'fade-in'),
                     html.P("This scatter plot maps average vehicle selling prices against mileage (odometer), with colors indicating condition scores. Each point represents a year's data. Lower mileage and higher condition (brighter colors) typically yield higher prices. Use this to explore how usage and quality impact vehicle value.",
                         className = 'fade-in'),
+                    html.P("Switch to all sales to explore individual sales instead. Dense views are shown as a grid colored by the mean condition of the sales in each cell; zoom in to re-bin the visible range or, once few enough sales remain, to see them individually.",
+                        className = 'fade-in'),
+                    dcc.RadioItems(id = 'scatter-mode',
+                                   options = SCATTER_MODES,
+                                   value = 'means',
+                                   className = 'fade-in'),
                 ], className = 'scatter-text-container'),
                 html.Div([
                     dcc.Graph(id = 'scatter-plot',
-                            figure = plot_object.create_scatter_plot(),
+                            figure = prepare_scatter_figure(figure = plot_object.create_scatter_plot()),
                             style = {'width'        : '1000px',
                                      'margin-right' : '100px'})
                 ], style = {'background-color' : '#232323',
@@ -367,7 +690,9 @@ def update_plot(plot_selection):
                        className = 'fade-in')
             ], className = 'multiline-text-container'),
             dcc.Graph(id = 'multiline-plot',
-                       figure = plot_object.create_multiline_plot(),
+                       figure = get_year_range_figure(plot_type = 'multiline',
+                                                      start_date = DATE_PICKER[1]['start_date'],
+                                                      end_date = DATE_PICKER[1]['end_date']),
                        style = {'margin' : '-1492px 399px'}),
         ]
     elif plot_selection == 'compared':
@@ -388,37 +713,282 @@ def update_plot(plot_selection):
                             'margin'           : '-266px 399px'})
             ])
         ]
+    elif plot_selection == 'estimate':
+        return [
+            html.Div([
+                html.Div([
+                    html.H2("Vehicle Price Estimate",
+                            className = 'fade-in'),
+                    html.P("Enter a vehicle's make, model and year, and optionally its condition, odometer reading and state, to estimate its selling price. The estimate starts from the average price of comparable sales and adjusts for mileage and condition relative to those sales and for regional price differences.",
+                        className = 'fade-in'),
+                ], className = 'scatter-text-container'),
+                html.Div([
+                    *[dcc.Input(id = estimate_input['id'],
+                                placeholder = estimate_input['placeholder'],
+                                type = estimate_input['type'],
+                                debounce = True,
+                                className = 'date-style')
+                      for estimate_input in ESTIMATE_INPUTS],
+                    html.Button("Estimate",
+                                id = 'estimate-button',
+                                className = 'nav-style'),
+                    html.H2(id = 'price-estimate',
+                            className = 'fade-in'),
+                    html.Div(id = 'price-comparables',
+                             className = 'fade-in')
+                ], style = {'background-color' : '#232323',
+                            'color'            : 'rgb(224, 224, 224)',
+                            'margin'           : '-266px 399px'})
+            ])
+        ]
+    elif plot_selection == 'index':
+        try:
+            segment_options = get_price_index_segment_options()
+        except sqlite3.OperationalError:
+            segment_options = []
+
+        if not segment_options:
+            graph_children = [html.P("No price index has been built yet; run batch__etl_pipeline.py.")]
+        else:
+            graph_children = [
+                dcc.Graph(id = 'price-index-plot',
+                          figure = get_price_index_figure(period_type = PRICE_INDEX_PERIODS[0]['value'],
+                                                          segment_key = segment_options[0]['value']),
+                          style = {'width'        : '1000px',
+                                   'margin-right' : '100px'})
+            ]
+
+        return [
+            html.Div([
+                html.Div([
+                    html.H2("Market Price Index",
+                            className = 'fade-in'),
+                    html.P("Track how used vehicle prices move from month to month or week to week, for the whole market or a single make. The top chart shows the median and mean selling price of each period with a rolling median over the last few periods; the bottom chart shows selling prices relative to the Manheim Market Report, where values above 1 mean vehicles sold above their estimated market value.",
+                        className = 'fade-in'),
+                    dcc.RadioItems(id = 'price-index-period',
+                                   options = PRICE_INDEX_PERIODS,
+                                   value = PRICE_INDEX_PERIODS[0]['value'],
+                                   className = 'fade-in'),
+                    dcc.Dropdown(id = 'price-index-segment',
+                                 options = segment_options,
+                                 value = segment_options[0]['value'] if segment_options else None,
+                                 clearable = False,
+                                 className = 'fade-in'),
+                ], className = 'scatter-text-container'),
+                html.Div(graph_children,
+                         style = {'background-color' : '#232323',
+                                  'color'            : 'rgb(224, 224, 224)',
+                                  'margin'           : '-266px 399px'})
+            ])
+        ]
+
+def get_price_index_figure(period_type, segment_key):
+
+    period_label = next(period['label'] for period in PRICE_INDEX_PERIODS if period['value'] == period_type)
+    segment_label = 'All Sales' if segment_key.startswith('all|') else segment_key.split('|', 1)[1].title()
+
+    return PlotObject(df = get_price_index_df(period_type = period_type,
+                                              segment_key = segment_key)).create_price_index_plot(title = f"{period_label} Price Index: {segment_label}")
 
 @app.callback(
-    Output('bar-plot', 'figure'),
-    [Input('year', 'start_date'),
-     Input('year', 'end_date')]
+    Output('price-index-plot', 'figure'),
+    [Input('price-index-period', 'value'),
+     Input('price-index-segment', 'value')],
+    prevent_initial_call = True
 )
 
-def update_bar_plot(start_date, end_date):
+@instrument()
+def update_price_index_plot(period_type, segment_key):
 
-    start_year = pd.to_datetime(start_date).year
-    end_year = pd.to_datetime(end_date).year
-    filtered_df = YEAR_PLOT_DF[(YEAR_PLOT_DF['year'] >= start_year) & (YEAR_PLOT_DF['year'] <= end_year)]
-    plot_object = PlotObject(df = filtered_df)
+    if not (period_type and segment_key):
+        return dash.no_update
 
-    return plot_object.create_bar_plot()
+    return get_price_index_figure(period_type = period_type,
+                                  segment_key = segment_key)
 
 @app.callback(
-    Output('multiline-plot', 'figure'),
-    [Input('year2', 'start_date'),
-     Input('year2', 'end_date')]
+    Output('price-estimate', 'children'),
+    Input('estimate-button', 'n_clicks'),
+    [State(estimate_input['id'], 'value') for estimate_input in ESTIMATE_INPUTS],
+    prevent_initial_call = True
 )
 
+@instrument(rows = None)
+def update_price_estimate(n_clicks, make, model, year, condition, odometer, state):
+
+    if not (make and model and year):
+        return "Enter at least a make, model and year."
+
+    try:
+        price_model = load_price_model(model_path = PRICE_MODEL_PATH)
+    except FileNotFoundError:
+        return "No price model has been trained yet; run batch__etl_pipeline.py."
+
+    estimate = price_model.estimate_price(make = make,
+                                          model = model,
+                                          year = year,
+                                          condition = condition,
+                                          odometer = odometer,
+                                          state = state)
+
+    return f"Estimated selling price: ${estimate:,.0f}"
+
+@app.callback(
+    Output('price-comparables', 'children'),
+    Input('estimate-button', 'n_clicks'),
+    [State(estimate_input['id'], 'value') for estimate_input in ESTIMATE_INPUTS],
+    prevent_initial_call = True
+)
+
+@instrument(rows = None)
+def update_comparables(n_clicks, make, model, year, condition, odometer, state):
+
+    if not (make and model and year):
+        return []
+
+    try:
+        comparables_index = load_comparables_index(index_path = COMPARABLES_INDEX_PATH)
+    except FileNotFoundError:
+        return html.P("No comparable-sales index has been built yet; run batch__etl_pipeline.py.")
+
+    comparables_df = comparables_index.query(make = make,
+                                             model = model,
+                                             year = year,
+                                             odometer = odometer,
+                                             condition = condition,
+                                             k = COMPARABLES_COUNT)
+    if comparables_df.empty:
+        return html.P(f"No past sales found for {make} {model}.")
+
+    return [
+        html.B("Comparable Sales"),
+        html.Table([
+            html.Tr([html.Th(label) for label in COMPARABLES_COLUMNS.values()]),
+            *[html.Tr([html.Td(f"{row[col]:,.0f}" if col != 'year' else str(row[col])) for col in COMPARABLES_COLUMNS])
+              for row in comparables_df.to_dict('records')]
+        ])
+    ]
+
+def get_relayout_ranges(relayout_data):
+
+    # relayoutData holds 'xaxis.range[0]'-style keys after a zoom, or
+    # 'xaxis.autorange' after a reset
+    axis_ranges = []
+    for axis in ['xaxis', 'yaxis']:
+        if f"{axis}.range[0]" in relayout_data and f"{axis}.range[1]" in relayout_data:
+            axis_ranges.append((float(relayout_data[f"{axis}.range[0]"]), float(relayout_data[f"{axis}.range[1]"])))
+        elif f"{axis}.range" in relayout_data:
+            axis_ranges.append(tuple(float(bound) for bound in relayout_data[f"{axis}.range"]))
+        else:
+            axis_ranges.append(None)
+
+    return axis_ranges
+
+@app.callback(
+    Output('scatter-plot', 'figure'),
+    [Input('scatter-mode', 'value'),
+     Input('scatter-plot', 'relayoutData')],
+    prevent_initial_call = True
+)
+
+@instrument()
+def update_scatter_plot(scatter_mode, relayout_data):
+
+    triggered_id = dash.callback_context.triggered[0]['prop_id'].split('.')[0]
+
+    if scatter_mode == 'means':
+        if triggered_id != 'scatter-mode':
+            return dash.no_update
+        return prepare_scatter_figure(figure = PlotObject(df = get_year_plot_df()).create_scatter_plot())
+
+    x_range, y_range = None, None
+    if triggered_id == 'scatter-plot':
+        relayout_data = relayout_data or {}
+        x_range, y_range = get_relayout_ranges(relayout_data = relayout_data)
+        is_reset = 'xaxis.autorange' in relayout_data or 'yaxis.autorange' in relayout_data
+        if x_range is None and y_range is None and not is_reset:
+            return dash.no_update
+
+    scatter_points_df = get_scatter_points_df()
+    if x_range is None and y_range is None:
+        return SCATTER_FIGURE_CACHE.get_figure(key = ('scatter_raw',),
+                                               build_figure = PlotObject(df = scatter_points_df).create_raw_scatter_plot,
+                                               source = scatter_points_df)
+
+    return prepare_scatter_figure(figure = PlotObject(df = scatter_points_df).create_raw_scatter_plot(x_range = x_range,
+                                                                                                     y_range = y_range))
+
+@instrument()
+def update_bar_plot(start_date, end_date):
+
+    return get_year_range_figure(plot_type = 'bar',
+                                 start_date = start_date,
+                                 end_date = end_date)
+
+@instrument()
 def update_multiline_plot(start_date, end_date):
 
-    start_year = pd.to_datetime(start_date).year
-    end_year = pd.to_datetime(end_date).year
-    filtered_df = YEAR_PLOT_DF[(YEAR_PLOT_DF['year'] >= start_year) & (YEAR_PLOT_DF['year'] <= end_year)]
-    plot_object = PlotObject(df = filtered_df)
+    return get_year_range_figure(plot_type = 'multiline',
+                                 start_date = start_date,
+                                 end_date = end_date)
+
+@instrument(rows = None)
+def update_year_plot_store(plot_selection, store_data):
+
+    if store_data is not None or plot_selection not in YEAR_RANGE_PLOTS:
+        return dash.no_update
+
+    year_plot_df = get_year_plot_df()
+
+    # Column order per trace, matching the traces built by PlotObject
+    return {'columns'       : year_plot_df.round(FIGURE_DECIMALS).to_dict('list'),
+            'trace_columns' : {'bar'       : ['sellingprice'],
+                               'multiline' : list(MULTILINE_VARIABLES)}}
+
+if CLIENTSIDE_FILTERING:
+
+    app.callback(
+        Output('year-plot-store', 'data'),
+        Input('plot-selection', 'data'),
+        State('year-plot-store', 'data')
+    )(update_year_plot_store)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace = 'yearFilter',
+                           function_name = 'filterBarFigure'),
+        Output('bar-plot', 'figure'),
+        [Input('year', 'start_date'),
+         Input('year', 'end_date'),
+         Input('year-plot-store', 'data')],
+        State('bar-plot', 'figure')
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace = 'yearFilter',
+                           function_name = 'filterMultilineFigure'),
+        Output('multiline-plot', 'figure'),
+        [Input('year2', 'start_date'),
+         Input('year2', 'end_date'),
+         Input('year-plot-store', 'data')],
+        State('multiline-plot', 'figure')
+    )
+
+else:
+
+    app.callback(
+        Output('bar-plot', 'figure'),
+        [Input('year', 'start_date'),
+         Input('year', 'end_date')]
+    )(update_bar_plot)
+
+    app.callback(
+        Output('multiline-plot', 'figure'),
+        [Input('year2', 'start_date'),
+         Input('year2', 'end_date')]
+    )(update_multiline_plot)
 
-    return plot_object.create_multiline_plot()
+if os.environ.get('DASHBOARD_PRECOMPUTE_FIGURES') == '1':
+    precompute_year_range_figures()
 
 if __name__ == '__main__':
-    import os
     app.run(host = '0.0.0.0', port = int(os.environ.get('PORT', 8000)), debug = False)
\ No newline at end of file
@@ -1,5 +1,17 @@
-SELECT * 
-FROM vehicle_sales_data -- AS vsd
+SELECT year,
+       condition_mean    AS condition,
+       odometer_mean     AS odometer,
+       mmr_mean          AS mmr,
+       sellingprice_mean AS sellingprice,
+       sellingprice_mean - mmr_mean AS price_difference,
+       average_stock_price,
+       year_open,
+       year_high,
+       year_low,
+       year_close,
+       annual_perc_change
+FROM sales_summary_year -- AS ssy
 INNER JOIN ford_stock_data -- AS fsd
 USING(year)
-WHERE year >= 2000;
\ No newline at end of file
+WHERE year >= 2000
+ORDER BY year;
@@ -0,0 +1,11 @@
+SELECT price_index.period_start,
+       price_index.sales_count,
+       price_index.mean_price,
+       price_index.median_price,
+       price_index.price_to_mmr,
+       price_index_rolling.median_price AS rolling_median_price,
+       price_index_rolling.price_to_mmr AS rolling_price_to_mmr
+FROM price_index
+LEFT JOIN price_index_rolling USING (period_type, period_start, segment_type, segment)
+WHERE period_type = ? AND segment_type = ? AND segment = ?
+ORDER BY price_index.period_start
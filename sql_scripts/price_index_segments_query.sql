@@ -0,0 +1,5 @@
+SELECT segment_type, segment, SUM(sales_count) AS sales_count
+FROM price_index
+WHERE period_type = 'month' AND segment != ''
+GROUP BY segment_type, segment
+ORDER BY segment_type = 'all' DESC, sales_count DESC
@@ -0,0 +1,3 @@
+SELECT sellingprice, odometer, condition
+FROM {sales_source}
+WHERE sellingprice IS NOT NULL AND odometer IS NOT NULL
@@ -0,0 +1,263 @@
+import gzip
+import json
+import zlib
+import base64
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from flask import request
+
+from utils.instrumentation import REGISTRY, INSTRUMENTATION_LOG_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Trace attributes holding per-point numbers that Plotly accepts as typed arrays
+TYPED_ARRAY_KEYS = {'x', 'y', 'z', 'customdata', 'color', 'size', 'values', 'open', 'high', 'low', 'close'}
+
+# Trace attributes whose number lists are fixed-length settings, not per-point data
+SETTING_KEYS = {'domain', 'range', 'tickvals'}
+
+# Template sections for subplot kinds the dashboard never draws
+UNUSED_TEMPLATE_LAYOUT_KEYS = {'polar', 'ternary', 'scene', 'geo', 'mapbox', 'map', 'smith',
+                               'updatemenudefaults', 'sliderdefaults'}
+
+# Trace types that fall back to the template's colorscale when they set none
+COLOR_SCALE_TRACE_TYPES = {'heatmap', 'histogram2d', 'histogram2dcontour', 'contour', 'surface'}
+
+# Typed-array dtypes understood by plotly.js, smallest first
+INTEGER_DTYPES = ['int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32']
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/javascript', 'text/javascript',
+                          'text/html', 'text/css', 'text/plain', 'image/svg+xml'}
+
+# Compressed bodies of GET responses (Dash's JavaScript bundles, the index page) kept
+# per process, so the bundles are not recompressed on every page load
+COMPRESSED_CACHE_SIZE = 64
+
+
+def compact_array(values, decimals = 2):
+    """
+    Rounds a numeric array and downcasts it to the smallest dtype that keeps its values.
+
+    Args:
+        values (numpy.ndarray): Numeric array.
+        decimals (int, optional): Decimal places kept for float values. Defaults to 2.
+
+    Returns:
+        numpy.ndarray: Whole-number arrays without NaNs become the smallest fitting
+            integer dtype up to 32 bits; other float arrays become float32 when every
+            rounded value keeps its decimals in a 24-bit mantissa, and float64 otherwise.
+    """
+    if values.dtype.kind not in 'fiu' or values.size == 0:
+        return values
+
+    if values.dtype.kind == 'f':
+        values = np.round(values, decimals)
+        finite_values = values[np.isfinite(values)]
+        if finite_values.size < values.size or not np.array_equal(finite_values, np.trunc(finite_values)):
+            max_abs = np.abs(finite_values).max() if finite_values.size else 0
+            return values.astype('float32') if max_abs * 10 ** decimals < 2 ** 24 else values.astype('float64')
+
+    min_value, max_value = values.min(), values.max()
+    for dtype in INTEGER_DTYPES:
+        if np.iinfo(dtype).min <= min_value and max_value <= np.iinfo(dtype).max:
+            return values.astype(dtype)
+
+    # plotly.js has no 64-bit integer typed arrays
+    return values.astype('float64')
+
+
+def encode_typed_array(values):
+    """
+    Encodes an array in Plotly's typed-array form, e.g. {'dtype': 'f4', 'bdata': '...'}.
+    """
+    values = np.ascontiguousarray(values, dtype = values.dtype.newbyteorder('<'))
+    typed_array = {'dtype' : values.dtype.str[1:],
+                   'bdata' : base64.b64encode(values.tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        typed_array['shape'] = ', '.join(str(size) for size in values.shape)
+
+    return typed_array
+
+
+def decode_typed_array(typed_array):
+    """
+    Decodes Plotly's typed-array form, or returns None for a dtype NumPy cannot read.
+    """
+    try:
+        dtype = np.dtype(typed_array['dtype']).newbyteorder('<')
+    except TypeError:
+        return None
+
+    values = np.frombuffer(base64.b64decode(typed_array['bdata']), dtype = dtype)
+    if 'shape' in typed_array:
+        values = values.reshape([int(size) for size in str(typed_array['shape']).split(',')])
+
+    return values
+
+
+def compact_trace_values(value, decimals = 2, key = None):
+    """
+    Recursively compacts the numeric arrays of a trace (or any part of one).
+
+    Typed arrays are decoded, compacted and re-encoded; plain lists of numbers under
+    TYPED_ARRAY_KEYS are converted to typed arrays. Everything else is kept as is.
+    """
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            values = decode_typed_array(typed_array = value)
+            return value if values is None else encode_typed_array(values = compact_array(values = values, decimals = decimals))
+        return {item_key : item_value if item_key in SETTING_KEYS else compact_trace_values(value = item_value,
+                                                                                            decimals = decimals,
+                                                                                            key = item_key)
+                for item_key, item_value in value.items()}
+
+    if (key in TYPED_ARRAY_KEYS and isinstance(value, list) and value and
+            all(item is None or (isinstance(item, (int, float)) and not isinstance(item, bool)) for item in value)):
+        values = np.array([np.nan if item is None else item for item in value])
+        return encode_typed_array(values = compact_array(values = values, decimals = decimals))
+
+    return value
+
+
+def slim_template(template, traces, layout):
+    """
+    Keeps only the parts of a Plotly template that can affect a figure.
+
+    Args:
+        template (dict): The template from a serialized figure's layout.
+        traces (list): The figure's serialized traces.
+        layout (dict): The figure's serialized layout.
+
+    Returns:
+        dict: The template with trace defaults for trace types the figure does not use,
+            and layout defaults for subplot kinds it does not draw, removed.
+    """
+    trace_types = {trace.get('type', 'scatter') for trace in traces}
+
+    template_layout = {key : value for key, value in template.get('layout', {}).items()
+                       if key not in UNUSED_TEMPLATE_LAYOUT_KEYS}
+    if not (trace_types & COLOR_SCALE_TRACE_TYPES or 'coloraxis' in layout):
+        template_layout.pop('colorscale', None)
+
+    return {'data'   : {trace_type : defaults for trace_type, defaults in template.get('data', {}).items()
+                        if trace_type in trace_types},
+            'layout' : template_layout}
+
+
+def compact_figure(figure, decimals = 2):
+    """
+    Returns a figure in the smallest Plotly JSON form that renders the same.
+
+    Args:
+        figure (plotly.graph_objects.Figure or dict): The figure, or its JSON dict.
+        decimals (int, optional): Decimal places kept in numeric data arrays.
+            Defaults to 2.
+
+    Returns:
+        dict: The figure with rounded, downcast, base64 typed data arrays and a template
+            reduced by slim_template(), ready to return from a Dash callback.
+    """
+    figure_dict = json.loads(figure.to_json()) if hasattr(figure, 'to_json') else figure
+
+    traces = [compact_trace_values(value = trace, decimals = decimals) for trace in figure_dict.get('data', [])]
+    layout = dict(figure_dict.get('layout', {}))
+    if isinstance(layout.get('template'), dict):
+        layout['template'] = slim_template(template = layout['template'],
+                                           traces = traces,
+                                           layout = layout)
+
+    return {**figure_dict, 'data' : traces, 'layout' : layout}
+
+
+def _compress(body, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(body, quality = level)
+
+    return gzip.compress(body, compresslevel = level)
+
+
+def register_response_compression(server,
+                                  min_size = 500,
+                                  gzip_level = 6,
+                                  brotli_quality = 5,
+                                  registry = REGISTRY):
+    """
+    Compresses a Flask server's text responses and records Dash callback payload sizes.
+
+    Responses are brotli-compressed when the brotli package is installed and the client
+    accepts it, gzip-compressed otherwise. The raw and sent sizes of every Dash callback
+    response are recorded under 'callback <output>' and logged like instrumented calls.
+
+    Args:
+        server (flask.Flask): The server, e.g. a Dash app's app.server.
+        min_size (int, optional): Smallest body, in bytes, worth compressing. Defaults to 500.
+        gzip_level (int, optional): gzip compression level. Defaults to 6.
+        brotli_quality (int, optional): brotli quality. Defaults to 5.
+        registry (MetricsRegistry, optional): Destination of the payload sizes.
+            Defaults to REGISTRY.
+    """
+    compressed_cache = OrderedDict()
+    cache_lock = threading.Lock()
+
+    def compress_response(response):
+        if (response.direct_passthrough or response.status_code != 200 or
+                'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        body = response.get_data()
+        payload_bytes = len(body)
+
+        accepted_encodings = request.accept_encodings
+        encoding = None
+        if len(body) >= min_size:
+            if brotli is not None and accepted_encodings['br']:
+                encoding = 'br'
+            elif accepted_encodings['gzip']:
+                encoding = 'gzip'
+
+        if encoding is not None:
+            level = brotli_quality if encoding == 'br' else gzip_level
+            if request.method != 'GET':
+                compressed_body = _compress(body = body, encoding = encoding, level = level)
+            else:
+                # The checksum keeps a changed body under the same path from being
+                # served stale
+                cache_key = (request.path, encoding, len(body), zlib.crc32(body))
+                with cache_lock:
+                    compressed_body = compressed_cache.get(cache_key)
+                if compressed_body is None:
+                    compressed_body = _compress(body = body, encoding = encoding, level = level)
+                    with cache_lock:
+                        compressed_cache[cache_key] = compressed_body
+                        while len(compressed_cache) > COMPRESSED_CACHE_SIZE:
+                            compressed_cache.popitem(last = False)
+
+            response.set_data(compressed_body)
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+
+        if request.path.endswith('/_dash-update-component'):
+            callback_payload = request.get_json(silent = True) or {}
+            operation = f"callback {callback_payload.get('output', 'unknown')}"
+            sent_bytes = response.content_length if response.content_length is not None else payload_bytes
+
+            registry.record_payload(operation = operation,
+                                    payload_bytes = payload_bytes,
+                                    sent_bytes = sent_bytes)
+            if logger.isEnabledFor(INSTRUMENTATION_LOG_LEVEL):
+                logger.log(INSTRUMENTATION_LOG_LEVEL, json.dumps({'operation'     : operation,
+                                                                  'payload_bytes' : payload_bytes,
+                                                                  'sent_bytes'    : sent_bytes,
+                                                                  'encoding'      : encoding}))
+
+        return response
+
+    server.after_request(compress_response)
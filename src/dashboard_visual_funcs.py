@@ -0,0 +1,131 @@
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.instrumentation import track
+
+
+class FigureCache:
+    """
+    An LRU cache of serialized Plotly figures shared by the dashboard callbacks.
+
+    Figures are stored as plain JSON dicts and every hit returns the cached dict
+    itself, so a hit costs no parsing; callers must treat it as read-only. The cache
+    is tied to the DataFrame the figures were built from and empties itself when a
+    different source DataFrame is passed in.
+
+    Attributes:
+        max_entries (int): Maximum number of cached figures.
+        compact_figure (callable): Converts a built figure to its JSON dict before it is
+            cached, e.g. dashboard_payloads.compact_figure, or None to cache the dict
+            parsed from Figure.to_json().
+    """
+
+    def __init__(self, max_entries = 512, compact_figure = None):
+        """
+        Initializes an empty figure cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of cached figures. Defaults to 512.
+            compact_figure (callable, optional): See the class attributes. Defaults to None.
+        """
+        self.max_entries    = max_entries
+        self.compact_figure = compact_figure
+
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self._source  = None
+
+    def get_figure(self, key, build_figure, source = None):
+        """
+        Returns a cached figure, building and caching it on a miss.
+
+        Args:
+            key (tuple): Cache key, e.g. (plot_type, start_year, end_year).
+            build_figure (callable): Returns a plotly Figure when called with no arguments.
+            source (object, optional): The data the figure is built from. When it is not
+                the same object as on the previous call, every cached figure is dropped.
+                Defaults to None.
+
+        Returns:
+            dict: The figure in Plotly JSON form, ready to return from a Dash callback.
+                Shared by every caller of the same key and must not be modified.
+        """
+        with self._lock:
+            if source is not self._source:
+                self._entries.clear()
+                self._source = source
+
+            figure_dict = self._entries.get(key)
+            if figure_dict is not None:
+                self._entries.move_to_end(key)
+                return figure_dict
+
+        with track(operation = 'FigureCache.build_figure'):
+            figure = build_figure()
+            figure_dict = self.compact_figure(figure) if self.compact_figure else json.loads(figure.to_json())
+
+        with self._lock:
+            if source is self._source:
+                self._entries[key] = figure_dict
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last = False)
+
+        return figure_dict
+
+    def clear(self):
+        """
+        Drops every cached figure.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._source = None
+
+
+def bin_scatter_points(x, y, values, x_range, y_range, bins = 200):
+    """
+    Aggregates points into a bins x bins grid over a visible axis range.
+
+    Points are assigned to cells with integer arithmetic and np.bincount, which is
+    several times faster than np.histogram2d on millions of points.
+
+    Args:
+        x (numpy.ndarray): Point x coordinates.
+        y (numpy.ndarray): Point y coordinates.
+        values (numpy.ndarray): Value averaged per cell, e.g. condition; NaN values
+            count towards the cell's points but not its mean.
+        x_range (tuple): (min, max) of the visible x axis.
+        y_range (tuple): (min, max) of the visible y axis.
+        bins (int, optional): Cells per axis. Defaults to 200.
+
+    Returns:
+        tuple: (x cell centers, y cell centers, point counts and mean values as
+            (bins, bins) arrays indexed [y cell, x cell]). Empty cells have a NaN mean.
+    """
+    x_min, x_max = x_range
+    y_min, y_max = y_range
+
+    visible_mask = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+    x, y, values = x[visible_mask], y[visible_mask], values[visible_mask]
+
+    x_cells = np.minimum(((x - x_min) * (bins / max(x_max - x_min, 1e-9))).astype('int64'), bins - 1)
+    y_cells = np.minimum(((y - y_min) * (bins / max(y_max - y_min, 1e-9))).astype('int64'), bins - 1)
+    cells = y_cells * bins + x_cells
+
+    value_mask = ~np.isnan(values)
+    counts = np.bincount(cells, minlength = bins * bins)
+    value_counts = np.bincount(cells[value_mask], minlength = bins * bins)
+    value_sums = np.bincount(cells[value_mask], weights = values[value_mask], minlength = bins * bins)
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        means = value_sums / value_counts
+
+    x_width = (x_max - x_min) / bins
+    y_width = (y_max - y_min) / bins
+
+    return (x_min + x_width * (np.arange(bins) + 0.5),
+            y_min + y_width * (np.arange(bins) + 0.5),
+            counts.reshape(bins, bins),
+            means.reshape(bins, bins))
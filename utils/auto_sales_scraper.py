@@ -0,0 +1,466 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# CarPro publishes one full-year sales-by-brand article per year
+REPORT_URL_TEMPLATE = "https://www.carpro.com/blog/full-year-{year}-national-auto-sales-by-brand"
+
+# XPath of the sales table inside a report page
+REPORT_TABLE_XPATH = "//table[contains(concat(' ', normalize-space(@class), ' '), ' table-bordered ')]"
+
+REPORT_COLUMNS = ['Manufacturer', 'sales_numbers', 'percent_change']
+
+DEFAULT_CACHE_DIR = os.path.join("data_folder", ".scrape_cache")
+
+# Saved report pages, named like FixtureFetcher expects, checked against the
+# '<year>_us_auto_sales.csv' files in data_folder by check_report_fixtures()
+DEFAULT_FIXTURE_DIR = os.path.join("data_folder", "scrape_fixtures")
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) vehicle-sales-tool"
+
+
+def get_report_url(year):
+    """
+    Returns the URL of the full-year auto sales report for a year.
+    """
+    return REPORT_URL_TEMPLATE.format(year = year)
+
+
+class HttpFetcher:
+    """
+    Fetches pages over HTTP with a pooled, retrying requests session.
+
+    Attributes:
+        timeout (float): Seconds to wait for a response.
+        session (requests.Session): Session whose connections are reused across fetches.
+    """
+
+    def __init__(self, timeout = 20, pool_maxsize = 8, retries = 3):
+        """
+        Initializes the session.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a response. Defaults to 20.
+            pool_maxsize (int, optional): Connections kept open per host; should be at
+                least the number of concurrent fetches. Defaults to 8.
+            retries (int, optional): Retries on connection errors and 429/5xx responses,
+                with exponential backoff. Defaults to 3.
+        """
+        self.timeout = timeout
+
+        retry = Retry(total = retries,
+                      backoff_factor = 0.5,
+                      status_forcelist = [429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections = pool_maxsize,
+                              pool_maxsize = pool_maxsize,
+                              max_retries = retry)
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, url, etag = None):
+        """
+        Fetches a page, revalidating against a cached ETag when one is given.
+
+        Args:
+            url (str): Page URL.
+            etag (str, optional): ETag of the cached copy, sent as If-None-Match.
+                Defaults to None.
+
+        Returns:
+            dict: 'status' (200, or 304 when the cached copy is still current), 'text'
+                (None for 304) and 'etag' (None when the server sends none).
+
+        Raises:
+            requests.HTTPError: If the server answers with another error status.
+        """
+        headers = {'If-None-Match' : etag} if etag else {}
+        response = self.session.get(url, headers = headers, timeout = self.timeout)
+
+        if response.status_code == 304:
+            return {'status' : 304, 'text' : None, 'etag' : etag}
+
+        response.raise_for_status()
+
+        return {'status' : response.status_code,
+                'text'   : response.text,
+                'etag'   : response.headers.get('ETag')}
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """
+    Fetches pages through a headless Chrome, for reports that are rendered by JavaScript.
+
+    The browser is started on first use and shared by every fetch; fetches are
+    serialized because a WebDriver is not thread-safe.
+
+    Attributes:
+        executable_path (str): chromedriver path.
+        wait_seconds (float): Seconds to wait for the report table to appear.
+    """
+
+    def __init__(self, executable_path = '/usr/local/bin/chromedriver', wait_seconds = 10):
+        self.executable_path = executable_path
+        self.wait_seconds    = wait_seconds
+
+        self._driver = None
+        self._lock   = threading.Lock()
+
+    def fetch(self, url, etag = None):
+        """
+        Loads a page and returns its rendered HTML once the report table is present.
+
+        Args:
+            url (str): Page URL.
+            etag (str, optional): Ignored; browsers cannot revalidate. Defaults to None.
+
+        Returns:
+            dict: 'status' (always 200), 'text' and 'etag' (always None).
+
+        Raises:
+            ImportError: If selenium is not installed.
+            selenium.common.exceptions.TimeoutException: If the table never appears.
+        """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self._lock:
+            if self._driver is None:
+                options = webdriver.ChromeOptions()
+                options.add_argument("--headless=new")
+                self._driver = webdriver.Chrome(service = Service(executable_path = self.executable_path),
+                                                options = options)
+
+            self._driver.get(url)
+            WebDriverWait(self._driver, self.wait_seconds).until(
+                EC.presence_of_element_located((By.XPATH, REPORT_TABLE_XPATH))
+            )
+
+            return {'status' : 200, 'text' : self._driver.page_source, 'etag' : None}
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None:
+                self._driver.quit()
+                self._driver = None
+
+
+class FixtureFetcher:
+    """
+    Serves saved HTML files in place of network fetches, for offline runs and tests.
+
+    A URL maps to '<fixture_dir>/<last path segment of the URL>.html'.
+
+    Attributes:
+        fixture_dir (str): Directory holding the saved pages.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def get_fixture_path(self, url):
+        return os.path.join(self.fixture_dir, f"{os.path.basename(urlparse(url).path.rstrip('/'))}.html")
+
+    def fetch(self, url, etag = None):
+        """
+        Reads the saved page for a URL.
+
+        Returns:
+            dict: 'status' (always 200), 'text' and 'etag' (always None).
+
+        Raises:
+            FileNotFoundError: If no fixture is saved for the URL.
+        """
+        with open(self.get_fixture_path(url = url), encoding = 'utf-8') as fixture_file:
+            return {'status' : 200, 'text' : fixture_file.read(), 'etag' : None}
+
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    """
+    An on-disk cache of fetched pages with their ETags and fetch times.
+
+    Each URL is stored as '<sha256 of url>.html' plus a '.json' metadata file.
+
+    Attributes:
+        cache_dir (str): Directory holding the cached pages.
+        max_age_seconds (float): Age below which a cached page is used without
+            contacting the server.
+    """
+
+    def __init__(self, cache_dir = DEFAULT_CACHE_DIR, max_age_seconds = 7 * 24 * 3600):
+        self.cache_dir       = cache_dir
+        self.max_age_seconds = max_age_seconds
+
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def _get_paths(self, url):
+        cache_key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+        return (os.path.join(self.cache_dir, f"{cache_key}.html"),
+                os.path.join(self.cache_dir, f"{cache_key}.json"))
+
+    def get(self, url):
+        """
+        Returns the cached entry for a URL.
+
+        Returns:
+            dict or None: 'text', 'etag' and 'fetched_at' (epoch seconds), or None if
+                the URL is not cached.
+        """
+        html_path, meta_path = self._get_paths(url = url)
+        if not (os.path.exists(html_path) and os.path.exists(meta_path)):
+            return None
+
+        with open(meta_path, encoding = 'utf-8') as meta_file:
+            entry = json.load(meta_file)
+        with open(html_path, encoding = 'utf-8') as html_file:
+            entry['text'] = html_file.read()
+
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.max_age_seconds
+
+    def put(self, url, text, etag = None):
+        """
+        Stores a page, replacing any previous copy.
+        """
+        html_path, meta_path = self._get_paths(url = url)
+
+        with open(html_path, 'w', encoding = 'utf-8') as html_file:
+            html_file.write(text)
+        with open(meta_path, 'w', encoding = 'utf-8') as meta_file:
+            json.dump({'url' : url, 'etag' : etag, 'fetched_at' : time.time()}, meta_file)
+
+    def touch(self, url, etag = None):
+        """
+        Marks a cached page as revalidated now, e.g. after a 304 response.
+        """
+        entry = self.get(url = url)
+        self.put(url = url, text = entry['text'], etag = etag or entry['etag'])
+
+
+def has_report_table(page_html):
+    """
+    Returns True if a page contains the report table, i.e. it did not need JavaScript.
+    """
+    return bool(lxml_html.fromstring(page_html).xpath(REPORT_TABLE_XPATH))
+
+
+def fetch_report_html(url, fetcher, cache = None, fallback_fetcher = None):
+    """
+    Returns the HTML of a report page, from the cache when it is fresh or still valid.
+
+    Args:
+        url (str): Report URL.
+        fetcher (object): Primary fetcher, e.g. HttpFetcher or FixtureFetcher.
+        cache (ResponseCache, optional): Page cache. Defaults to None (no caching).
+        fallback_fetcher (object, optional): Used when the primary fetcher's page has no
+            report table, e.g. SeleniumFetcher. Defaults to None.
+
+    Returns:
+        str: The page HTML.
+
+    Raises:
+        ValueError: If neither fetcher returned a page containing the report table.
+    """
+    entry = cache.get(url = url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry = entry):
+        return entry['text']
+
+    response = fetcher.fetch(url = url, etag = entry['etag'] if entry is not None else None)
+    if response['status'] == 304:
+        cache.touch(url = url, etag = response['etag'])
+        return entry['text']
+
+    page_html = response['text']
+    if not has_report_table(page_html = page_html):
+        if fallback_fetcher is None:
+            raise ValueError(f"No report table found at {url}")
+        logger.info("no report table in static HTML for %s, falling back to %s",
+                    url, type(fallback_fetcher).__name__)
+        response = fallback_fetcher.fetch(url = url)
+        page_html = response['text']
+        if not has_report_table(page_html = page_html):
+            raise ValueError(f"No report table found at {url}")
+
+    if cache is not None:
+        cache.put(url = url, text = page_html, etag = response['etag'])
+
+    return page_html
+
+
+def parse_report_table(page_html, year):
+    """
+    Parses the sales-by-brand table of a report page.
+
+    Args:
+        page_html (str): Report page HTML.
+        year (int): Report year.
+
+    Returns:
+        pandas.DataFrame: One row per manufacturer with 'Manufacturer', 'sales_numbers',
+            'percent_change' (versus the previous year) and 'year'. Unparseable numbers
+            become 0, as in the original scrape.
+
+    Raises:
+        ValueError: If the page has no report table.
+    """
+    tables = lxml_html.fromstring(page_html).xpath(REPORT_TABLE_XPATH)
+    if not tables:
+        raise ValueError(f"No report table found for {year}")
+
+    # The first row holds the column titles
+    rows = [[cell.text_content().replace('\xa0', ' ').strip() for cell in row.xpath('./td|./th')]
+            for row in tables[0].xpath('.//tr')[1:]]
+    rows = [row[:len(REPORT_COLUMNS)] for row in rows if len(row) >= len(REPORT_COLUMNS)]
+
+    report_df = pd.DataFrame(rows, columns = REPORT_COLUMNS)
+
+    for col in ['sales_numbers', 'percent_change']:
+        report_df[col] = pd.to_numeric(report_df[col].str.replace(r'[,%\s]', '', regex = True),
+                                       errors = 'coerce').fillna(0)
+    report_df['sales_numbers'] = report_df['sales_numbers'].astype('int64')
+
+    report_df['year'] = year
+
+    return report_df
+
+
+def scrape_auto_sales(years,
+                      fetcher = None,
+                      cache = None,
+                      fallback_fetcher = None,
+                      max_workers = 8):
+    """
+    Scrapes the full-year auto sales reports of several years concurrently.
+
+    Args:
+        years (iterable): Report years, e.g. [2022, 2023, 2024].
+        fetcher (object, optional): Primary fetcher. Defaults to None (an HttpFetcher
+            with max_workers pooled connections).
+        cache (ResponseCache, optional): Page cache. Defaults to None (no caching).
+        fallback_fetcher (object, optional): Fetcher for JavaScript-rendered pages, e.g.
+            SeleniumFetcher. Defaults to None.
+        max_workers (int, optional): Concurrent fetches. Defaults to 8.
+
+    Returns:
+        pandas.DataFrame: The parse_report_table() rows of every year, in year order.
+    """
+    years = sorted(int(year) for year in years)
+    fetcher = fetcher or HttpFetcher(pool_maxsize = max_workers)
+
+    def scrape_year(year):
+        page_html = fetch_report_html(url = get_report_url(year = year),
+                                      fetcher = fetcher,
+                                      cache = cache,
+                                      fallback_fetcher = fallback_fetcher)
+        return parse_report_table(page_html = page_html, year = year)
+
+    with ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'scrape') as pool:
+        report_dfs = list(pool.map(scrape_year, years))
+
+    return pd.concat(report_dfs, ignore_index = True)
+
+
+def write_auto_sales_csvs(auto_sales_df, output_dir = "data_folder"):
+    """
+    Writes one '<year>_us_auto_sales.csv' per report year.
+
+    The percent change column is written as 'percent_change_<previous year>', the
+    layout the ETL and dashboard read.
+
+    Args:
+        auto_sales_df (pandas.DataFrame): Output of scrape_auto_sales().
+        output_dir (str, optional): Target directory. Defaults to "data_folder".
+
+    Returns:
+        list: Paths of the written files.
+    """
+    file_paths = []
+    for year, year_df in auto_sales_df.groupby('year', sort = True):
+        file_path = os.path.join(output_dir, f"{year}_us_auto_sales.csv")
+        year_df.rename(columns = {'percent_change' : f"percent_change_{year - 1}"}).to_csv(file_path, index = False)
+        file_paths.append(file_path)
+
+    return file_paths
+
+
+def check_report_fixtures(fixture_dir = DEFAULT_FIXTURE_DIR, output_dir = "data_folder"):
+    """
+    Scrapes the saved report pages offline and compares them with the stored CSVs.
+
+    Args:
+        fixture_dir (str, optional): Directory of saved pages. Defaults to DEFAULT_FIXTURE_DIR.
+        output_dir (str, optional): Directory of the '<year>_us_auto_sales.csv' files the
+            pages should reproduce. Defaults to "data_folder".
+
+    Returns:
+        dict: Mapping of fixture file name to a list of problems; empty when every
+            fixture parses to its CSV.
+    """
+    failures = {}
+    for file_name in sorted(os.listdir(fixture_dir)):
+        year_match = re.search(r'(\d{4})', file_name)
+        if not file_name.endswith('.html') or year_match is None:
+            continue
+        year = int(year_match.group(1))
+
+        try:
+            report_df = scrape_auto_sales(years = [year],
+                                          fetcher = FixtureFetcher(fixture_dir = fixture_dir),
+                                          max_workers = 1)
+        except Exception as error:
+            failures[file_name] = [f"could not parse page: {error}"]
+            continue
+
+        expected_df = pd.read_csv(os.path.join(output_dir, f"{year}_us_auto_sales.csv"))
+        report_df = report_df.rename(columns = {'percent_change' : f"percent_change_{year - 1}"})
+
+        try:
+            pd.testing.assert_frame_equal(report_df, expected_df, check_dtype = False)
+        except AssertionError as error:
+            failures[file_name] = [str(error).strip()]
+
+    return failures
+
+
+if __name__ == '__main__':
+    fixture_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURE_DIR
+
+    failures = check_report_fixtures(fixture_dir = fixture_dir)
+
+    for file_name, problems in failures.items():
+        for problem in problems:
+            print(f"{file_name}: {problem}")
+
+    if failures:
+        sys.exit(1)
+
+    print(f"All report fixtures in {fixture_dir} parse to their CSVs")
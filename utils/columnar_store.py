@@ -0,0 +1,138 @@
+import os
+import shutil
+
+from utils.data_transfer import track_stage, VEHICLE_SALES_CATEGORICALS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for the Parquet storage tier
+    pq = None
+
+# Narrowest dtypes that hold the car_prices numeric columns without loss:
+# float32 represents every integer price/odometer reading below 16.7 million exactly
+COLUMNAR_DTYPES = {'year'         : 'int16',
+                   'condition'    : 'float32',
+                   'odometer'     : 'float32',
+                   'mmr'          : 'float32',
+                   'sellingprice' : 'float32'}
+
+PARTITION_COLUMN = 'year'
+
+
+def get_default_store_dir(sqlite_object, table_name = 'vehicle_sales_data'):
+    """
+    Returns the default Parquet store directory, kept next to the SQLite database.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database the store is exported from.
+        table_name (str, optional): Exported table. Defaults to 'vehicle_sales_data'.
+
+    Returns:
+        str: Directory path of the store.
+    """
+    return os.path.join(sqlite_object.base_dir, f"{table_name}_parquet")
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("pyarrow is required for the Parquet storage tier")
+
+
+def export_parquet_store(sqlite_object,
+                         store_dir = None,
+                         table_name = 'vehicle_sales_data',
+                         years = None,
+                         compression = 'zstd'):
+    """
+    Exports a SQLite table to a Parquet dataset partitioned by year.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database holding the table.
+        store_dir (str, optional): Dataset directory. Defaults to get_default_store_dir().
+        table_name (str, optional): Table to export. Defaults to 'vehicle_sales_data'.
+        years (iterable, optional): Years to rewrite. Defaults to None, which rebuilds the
+            whole store; a store that does not exist yet is always built in full.
+        compression (str, optional): Parquet compression codec. Defaults to 'zstd'.
+
+    Returns:
+        int: The number of rows written.
+
+    Notes:
+        - Each year is fetched and written on its own, so memory is bounded by the
+          largest year rather than the table
+        - Text columns in VEHICLE_SALES_CATEGORICALS are dictionary-encoded and numeric
+          columns use COLUMNAR_DTYPES
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        sqlite3.Error: If the table cannot be queried.
+    """
+    _require_pyarrow()
+
+    store_dir = store_dir or get_default_store_dir(sqlite_object = sqlite_object,
+                                                   table_name = table_name)
+
+    if years is None or not os.path.isdir(store_dir):
+        shutil.rmtree(store_dir, ignore_errors = True)
+        years_df = sqlite_object.query_from_database(query = f"SELECT DISTINCT {PARTITION_COLUMN} FROM {table_name}")
+        years = years_df[PARTITION_COLUMN].dropna().tolist()
+
+    with track_stage(f"export {table_name} to parquet") as stage_stats:
+        for year in sorted(int(year) for year in years):
+            year_table = sqlite_object.query_to_columns(query = f"SELECT * FROM {table_name} WHERE {PARTITION_COLUMN} = ?",
+                                                        params = (year,),
+                                                        dtypes = COLUMNAR_DTYPES,
+                                                        categorical_columns = VEHICLE_SALES_CATEGORICALS,
+                                                        as_arrow = True)
+
+            partition_dir = os.path.join(store_dir, f"{PARTITION_COLUMN}={year}")
+            shutil.rmtree(partition_dir, ignore_errors = True)
+            if year_table.num_rows == 0:
+                continue
+
+            os.makedirs(partition_dir)
+            pq.write_table(year_table.drop_columns([PARTITION_COLUMN]),
+                           os.path.join(partition_dir, "part-0.parquet"),
+                           compression = compression,
+                           use_dictionary = True)
+
+            stage_stats['rows'] += year_table.num_rows
+
+    return stage_stats['rows']
+
+
+def load_parquet_store(store_dir, columns = None, years = None, memory_map = True):
+    """
+    Loads selected columns and year partitions from a Parquet store.
+
+    Args:
+        store_dir (str): Dataset directory written by export_parquet_store().
+        columns (list, optional): Columns to read. Defaults to None (all columns).
+        years (iterable, optional): Year partitions to read. Defaults to None (all years).
+        memory_map (bool, optional): Memory-map the files instead of reading them into
+            buffers. Defaults to True.
+
+    Returns:
+        pandas.DataFrame: The selected data; dictionary-encoded columns come back as
+            categoricals and 'year' is restored from the partition directories.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        FileNotFoundError: If store_dir does not exist.
+    """
+    _require_pyarrow()
+
+    filters = None
+    if years is not None:
+        filters = [(PARTITION_COLUMN, 'in', [int(year) for year in years])]
+
+    table = pq.read_table(store_dir,
+                          columns = columns,
+                          filters = filters,
+                          memory_map = memory_map,
+                          partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int16())]),
+                                                         flavor = 'hive'))
+
+    return table.to_pandas()
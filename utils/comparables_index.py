@@ -0,0 +1,294 @@
+import os
+import json
+import functools
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.data_transfer import track_stage
+from utils.price_model import get_key_frame, get_segment_keys, normalize_condition
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+INDEX_FILE_NAME = 'comparables_index.npz'
+
+PARTITION_COLUMNS = ['make', 'model']
+
+INDEX_COLUMNS = ['vin', 'year', 'make', 'model', 'condition', 'odometer', 'mmr', 'sellingprice']
+
+# Distance units of the search space: one model year counts as much as 10,000 miles
+# or 5 condition points on the 10-50 scale
+FEATURE_SCALES = {'year'      : 1.0,
+                  'odometer'  : 10000.0,
+                  'condition' : 5.0}
+
+# Per-row arrays stored in the index, with their on-disk dtypes
+ROW_ARRAY_DTYPES = {'vin'          : 'S17',
+                    'year'         : 'int16',
+                    'odometer'     : 'float32',
+                    'condition'    : 'float32',
+                    'sellingprice' : 'float32',
+                    'mmr'          : 'float32'}
+
+
+def get_default_index_path(sqlite_object):
+    """
+    Returns the default comparables index path, kept next to the SQLite database.
+    """
+    return os.path.join(sqlite_object.base_dir, INDEX_FILE_NAME)
+
+
+def get_index_rows(sales_df):
+    """
+    Converts sales to the per-row arrays of the index, keyed by make/model partition.
+
+    Sales missing a year, odometer, condition or selling price cannot be placed in the
+    search space and are left out.
+
+    Args:
+        sales_df (pandas.DataFrame): Sales with INDEX_COLUMNS.
+
+    Returns:
+        dict: 'partition' keys ('ford|fusion') plus one array per ROW_ARRAY_DTYPES entry.
+    """
+    valid_mask = sales_df[['year', 'odometer', 'condition', 'sellingprice']].notna().all(axis = 1).to_numpy()
+    sales_df = sales_df.loc[valid_mask]
+
+    key_frame = get_key_frame(make = sales_df['make'].to_numpy(),
+                              model = sales_df['model'].to_numpy(),
+                              year = sales_df['year'].to_numpy())
+
+    index_rows = {'partition' : get_segment_keys(key_frame = key_frame, level_columns = PARTITION_COLUMNS)}
+    for col, dtype in ROW_ARRAY_DTYPES.items():
+        values = sales_df[col].to_numpy()
+        if col == 'condition':
+            values = normalize_condition(values)
+        elif col == 'vin':
+            values = pd.Series(values, dtype = object).fillna('').astype(str).str.encode('ascii', errors = 'replace').to_numpy()
+        index_rows[col] = np.asarray(values).astype(dtype)
+
+    return index_rows
+
+
+def get_index_arrays(index_rows, metadata):
+    """
+    Sorts index rows into contiguous make/model partitions.
+
+    Returns:
+        dict: Arrays as stored by save_comparables_index(): the sorted 'partition_keys',
+            'partition_offsets' (row i of partition p is at offsets[p] + i) and the
+            per-row arrays in partition order.
+    """
+    partition_keys, partition_codes = np.unique(index_rows['partition'], return_inverse = True)
+    row_order = np.argsort(partition_codes, kind = 'stable')
+
+    index_arrays = {'partition_keys'    : partition_keys,
+                    'partition_offsets' : np.concatenate([[0], np.cumsum(np.bincount(partition_codes, minlength = len(partition_keys)))]).astype('int64'),
+                    'metadata'          : np.array(json.dumps(metadata))}
+    for col in ROW_ARRAY_DTYPES:
+        index_arrays[col] = index_rows[col][row_order]
+
+    return index_arrays
+
+
+def save_comparables_index(index_arrays, index_path):
+    """
+    Writes index arrays to a compressed .npz file, replacing any previous index atomically.
+    """
+    temp_path = f"{index_path}.tmp.npz"
+    np.savez_compressed(temp_path, **index_arrays)
+    os.replace(temp_path, index_path)
+
+
+def get_stored_rows(index_arrays):
+    """
+    Expands stored index arrays back into per-row arrays with a partition key per row.
+    """
+    partition_sizes = np.diff(index_arrays['partition_offsets'])
+
+    return {'partition' : np.repeat(index_arrays['partition_keys'], partition_sizes),
+            **{col : index_arrays[col] for col in ROW_ARRAY_DTYPES}}
+
+
+def update_comparables_index(sqlite_object,
+                             index_path = None,
+                             source_table = 'vehicle_sales_data',
+                             years = None):
+    """
+    Builds or incrementally updates the comparables index of a sales table.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database holding the sales table.
+        index_path (str, optional): Index path. Defaults to get_default_index_path().
+        source_table (str, optional): Sales table or view. Defaults to 'vehicle_sales_data'.
+        years (iterable, optional): Model years whose sales changed. Only these years
+            are re-read and replaced in an existing index. Defaults to None, which
+            rebuilds the whole index.
+
+    Returns:
+        int: The number of sales read from the database.
+
+    Notes:
+        - Replacing whole years mirrors refresh_sales_summaries(), so rows updated in
+          place by an upsert are picked up along with new ones
+        - The index file is replaced atomically; a running dashboard picks up the new
+          file on its next lookup
+    """
+    index_path = index_path or get_default_index_path(sqlite_object = sqlite_object)
+    incremental = years is not None and os.path.exists(index_path)
+
+    query = f"SELECT {', '.join(INDEX_COLUMNS)} FROM {source_table}"
+    params = ()
+    if incremental:
+        years = sorted(int(year) for year in years)
+        if not years:
+            return 0
+        query += f" WHERE year IN ({', '.join('?' * len(years))})"
+        params = tuple(years)
+
+    with track_stage("update comparables index" if incremental else "build comparables index") as stage_stats:
+        sales_df = sqlite_object.query_to_columns(query = query,
+                                                  params = params,
+                                                  dtypes = {'year'         : 'float64',
+                                                            'condition'    : 'float64',
+                                                            'odometer'     : 'float64',
+                                                            'mmr'          : 'float64',
+                                                            'sellingprice' : 'float64'},
+                                                  categorical_columns = PARTITION_COLUMNS)
+        index_rows = get_index_rows(sales_df = sales_df)
+
+        if incremental:
+            with np.load(index_path, allow_pickle = False) as index_file:
+                stored_rows = get_stored_rows(index_arrays = index_file)
+            kept_mask = ~np.isin(stored_rows['year'], years)
+            index_rows = {col : np.concatenate([stored_rows[col][kept_mask], index_rows[col]])
+                          for col in index_rows}
+
+        save_comparables_index(index_arrays = get_index_arrays(index_rows = index_rows,
+                                                               metadata = {'updated_at' : datetime.now(timezone.utc).isoformat(),
+                                                                           'rows'       : int(len(index_rows['partition']))}),
+                               index_path = index_path)
+        stage_stats['rows'] = len(sales_df)
+
+    return len(sales_df)
+
+
+class ComparablesIndex:
+    """
+    Finds the past sales most similar to a vehicle within its make and model.
+
+    Use load_comparables_index() to get the process-wide instance for an index file.
+
+    Attributes:
+        metadata (dict): Update time and row count.
+    """
+
+    def __init__(self, index_arrays):
+        """
+        Initializes an index from the arrays produced by get_index_arrays().
+        """
+        self.metadata = json.loads(str(index_arrays['metadata']))
+
+        self._partition_positions = {key : position for position, key in enumerate(index_arrays['partition_keys'])}
+        self._partition_offsets   = np.asarray(index_arrays['partition_offsets'])
+        self._rows                = {col : np.asarray(index_arrays[col]) for col in ROW_ARRAY_DTYPES}
+        self._scales              = np.array([FEATURE_SCALES[col] for col in FEATURE_SCALES], dtype = 'float64')
+        self._points              = np.column_stack([self._rows[col] for col in FEATURE_SCALES]) / self._scales
+        self._trees               = {}
+
+    def get_partition_slice(self, make, model):
+        """
+        Returns the row slice of a make/model partition, or None if it has no sales.
+        """
+        key = f"{str(make or '').strip().lower()}|{str(model or '').strip().lower()}"
+        position = self._partition_positions.get(key)
+        if position is None:
+            return None
+
+        return slice(self._partition_offsets[position], self._partition_offsets[position + 1])
+
+    def _get_tree(self, partition_slice):
+        # KD-trees are built on a partition's first lookup and kept for the process
+        tree = self._trees.get(partition_slice.start)
+        if tree is None:
+            tree = cKDTree(self._points[partition_slice])
+            self._trees[partition_slice.start] = tree
+
+        return tree
+
+    def query(self, make, model, year, odometer = None, condition = None, k = 10):
+        """
+        Returns the k past sales of a make and model nearest to a vehicle.
+
+        Args:
+            make (str): Make, any casing.
+            model (str): Model, any casing.
+            year (int): Model year.
+            odometer (float, optional): Odometer reading. Defaults to None (ignored in
+                the distance).
+            condition (float, optional): Condition on either car_prices scale.
+                Defaults to None (ignored in the distance).
+            k (int, optional): Number of sales. Defaults to 10.
+
+        Returns:
+            pandas.DataFrame: vin, year, odometer, condition, sellingprice, mmr and
+                distance of the nearest sales, closest first; empty if the make and
+                model have no indexed sales.
+        """
+        partition_slice = self.get_partition_slice(make = make, model = model)
+        if partition_slice is None or k <= 0:
+            return pd.DataFrame(columns = [*ROW_ARRAY_DTYPES, 'distance'])
+
+        query_point = np.array([year,
+                                np.nan if odometer is None else odometer,
+                                np.nan if condition is None else normalize_condition([condition])[0]],
+                               dtype = 'float64') / self._scales
+        feature_mask = ~np.isnan(query_point)
+        k = min(k, partition_slice.stop - partition_slice.start)
+
+        if cKDTree is not None and feature_mask.all():
+            distances, positions = self._get_tree(partition_slice = partition_slice).query(query_point, k = k)
+            distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+        else:
+            # Missing query features are left out of the distance, which a tree built
+            # over all three features cannot do
+            offsets = self._points[partition_slice][:, feature_mask] - query_point[feature_mask]
+            all_distances = np.sqrt((offsets ** 2).sum(axis = 1))
+            positions = np.argpartition(all_distances, k - 1)[:k] if k < len(all_distances) else np.arange(len(all_distances))
+            positions = positions[np.argsort(all_distances[positions], kind = 'stable')]
+            distances = all_distances[positions]
+
+        row_positions = partition_slice.start + positions
+        comparables_df = pd.DataFrame({col : self._rows[col][row_positions] for col in ROW_ARRAY_DTYPES})
+        comparables_df['vin'] = comparables_df['vin'].str.decode('ascii')
+        comparables_df['distance'] = distances
+
+        return comparables_df
+
+
+@functools.lru_cache(maxsize = 4)
+def _load_comparables_index(index_path, mtime_ns):
+    with np.load(index_path, allow_pickle = False) as index_file:
+        return ComparablesIndex(index_arrays = {name : index_file[name] for name in index_file.files})
+
+
+def load_comparables_index(index_path):
+    """
+    Returns the comparables index stored at a path, loading it at most once per process.
+
+    The cached index is replaced when the file's modification time changes.
+
+    Args:
+        index_path (str): Index path, e.g. get_default_index_path(sqlite_object).
+
+    Returns:
+        ComparablesIndex: The loaded index.
+
+    Raises:
+        FileNotFoundError: If the index has not been built yet.
+    """
+    return _load_comparables_index(index_path, os.stat(index_path).st_mtime_ns)
@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from utils.data_transfer import WATERMARK_TABLE_NAME
+
+
+class CachedDataLayer:
+    """
+    A lazy, memoizing read layer over a SQLiteDataObject.
+
+    Query results are loaded on first use and cached per (query, params, postprocess).
+    Entries expire after a TTL, the least recently used entry is evicted once the
+    cache is full, and the whole cache is dropped when the database changes.
+
+    Attributes:
+        sqlite_object (SQLiteDataObject): Database the queries run against.
+        ttl_seconds (float): Seconds a cached result stays valid.
+        max_entries (int): Maximum number of cached results.
+        check_interval_seconds (float): Minimum seconds between checks of the
+            database file and ETL watermark for changes.
+    """
+
+    def __init__(self,
+                 sqlite_object,
+                 ttl_seconds = 300,
+                 max_entries = 32,
+                 check_interval_seconds = 5):
+        """
+        Initializes the cache layer without touching the database.
+
+        Args:
+            sqlite_object (SQLiteDataObject): Database the queries run against.
+            ttl_seconds (float, optional): Seconds a cached result stays valid.
+                Defaults to 300.
+            max_entries (int, optional): Maximum number of cached results. Defaults to 32.
+            check_interval_seconds (float, optional): Minimum seconds between data
+                version checks. Defaults to 5.
+        """
+        self.sqlite_object          = sqlite_object
+        self.ttl_seconds            = ttl_seconds
+        self.max_entries            = max_entries
+        self.check_interval_seconds = check_interval_seconds
+
+        self._entries         = OrderedDict()
+        self._lock            = threading.RLock()
+        self._data_version    = None
+        self._last_checked_at = None
+
+    def get_data_version(self):
+        """
+        Returns a fingerprint that changes whenever the database contents may have changed.
+
+        Returns:
+            tuple: Modification times of the database and its WAL file, plus the latest
+                ETL watermark load time (None where unavailable).
+        """
+        db_path = self.sqlite_object.get_db_path()
+
+        file_mtimes = []
+        for path in [db_path, f"{db_path}-wal"]:
+            try:
+                file_mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                file_mtimes.append(None)
+
+        try:
+            watermark_df = self.sqlite_object.query_from_database(query = f"SELECT MAX(loaded_at) AS loaded_at FROM {WATERMARK_TABLE_NAME}")
+            last_loaded_at = watermark_df['loaded_at'].iloc[0]
+        except Exception:
+            last_loaded_at = None
+
+        return (*file_mtimes, last_loaded_at)
+
+    def _check_data_version(self):
+        """
+        Drops every cached entry if the data version changed since the last check.
+        """
+        now = time.monotonic()
+        if (self._last_checked_at is not None and
+            now - self._last_checked_at < self.check_interval_seconds):
+            return
+
+        self._last_checked_at = now
+        data_version = self.get_data_version()
+        if data_version != self._data_version:
+            self._entries.clear()
+            self._data_version = data_version
+
+    def query(self, query, params = (), postprocess = None):
+        """
+        Returns a query result, loading and caching it on first use.
+
+        Args:
+            query (str): SQL query string to execute.
+            params (tuple, optional): Values bound to the query placeholders. Defaults to ().
+            postprocess (callable, optional): Applied once to the loaded DataFrame before
+                it is cached. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: The (post-processed) query result.
+
+        Notes:
+            - The returned DataFrame is shared by every caller of the same key and must
+              be treated as read-only
+        """
+        cache_key = (query, tuple(params), postprocess)
+
+        with self._lock:
+            self._check_data_version()
+
+            cached_entry = self._entries.get(cache_key)
+            if cached_entry is not None:
+                loaded_at, df = cached_entry
+                if time.monotonic() - loaded_at < self.ttl_seconds:
+                    self._entries.move_to_end(cache_key)
+                    return df
+                del self._entries[cache_key]
+
+            df = self.sqlite_object.query_from_database(query = query,
+                                                        params = params)
+            if postprocess is not None:
+                df = postprocess(df)
+
+            self._entries[cache_key] = (time.monotonic(), df)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+        return df
+
+    def invalidate(self):
+        """
+        Drops every cached entry so the next query reloads from the database.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._last_checked_at = None
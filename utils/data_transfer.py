@@ -1,7 +1,127 @@
 import pandas as pd
+import numpy as np
 import kagglehub
 import sqlite3
 import os
+import sys
+import time
+import itertools
+import hashlib
+import json
+import pathlib
+import threading
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from utils.instrumentation import instrument
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional, only needed for Arrow query results
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# SQL type names per numpy/pandas dtype kind, used by get_sql_column_datatypes
+SQL_TYPES_BY_KIND = {'i' : 'int',
+                     'u' : 'int',
+                     'b' : 'int',
+                     'f' : 'float',
+                     'M' : 'int'}
+
+# PRAGMAs applied for the duration of a bulk load and restored afterwards.
+# A negative cache_size is expressed in KiB, so -65536 caps the page cache at 64 MiB.
+LOAD_PRAGMAS = {'journal_mode' : 'WAL',
+                'synchronous'  : 'OFF',
+                'cache_size'   : -65536}
+
+# Explicit dtypes for the Kaggle car_prices.csv columns, so every chunk of a
+# streamed read gets the same column types instead of re-inferring per chunk.
+VEHICLE_SALES_DTYPES = {'year'         : 'Int16',
+                        'make'         : 'object',
+                        'model'        : 'object',
+                        'trim'         : 'object',
+                        'body'         : 'object',
+                        'transmission' : 'object',
+                        'vin'          : 'object',
+                        'state'        : 'object',
+                        'condition'    : 'float64',
+                        'odometer'     : 'float64',
+                        'color'        : 'object',
+                        'interior'     : 'object',
+                        'seller'       : 'object',
+                        'mmr'          : 'float64',
+                        'sellingprice' : 'float64',
+                        'saledate'     : 'object'}
+
+# Secondary indexes for vehicle_sales_data. The leading (year, <group>) indexes
+# carry the aggregated measures so dashboard group-bys are answered from the
+# index alone; the others serve make/model lookups and odometer range filters.
+VEHICLE_SALES_INDEXES = [['year', 'make', 'sellingprice', 'mmr', 'odometer', 'condition'],
+                         ['year', 'state', 'sellingprice', 'mmr', 'odometer', 'condition'],
+                         ['year', 'condition', 'sellingprice', 'mmr', 'odometer'],
+                         ['make', 'model', 'year'],
+                         ['odometer']]
+
+# Low-cardinality vehicle_sales_data text columns worth loading as pandas categoricals
+VEHICLE_SALES_CATEGORICALS = ['make', 'model', 'trim', 'body', 'transmission',
+                              'state', 'color', 'interior', 'seller']
+
+# Width of the condition and odometer bands used as aggregate group keys
+CONDITION_BUCKET_WIDTH = 10
+ODOMETER_BUCKET_WIDTH = 10000
+
+# car_prices grades some sales 1-5 and others 10-50; the smaller grades are put on the
+# 10-50 scale before bucketing, as in price_model.normalize_condition()
+NORMALIZED_CONDITION_EXPRESSION = "CASE WHEN condition <= 5 THEN condition * 10 ELSE condition END"
+
+# Derived vehicle_sales_data columns available as aggregate group keys and measures
+AGGREGATE_EXPRESSIONS = {'condition_bucket' : f"CAST(({NORMALIZED_CONDITION_EXPRESSION}) / {CONDITION_BUCKET_WIDTH} AS INTEGER) * {CONDITION_BUCKET_WIDTH}",
+                         'odometer_bucket'  : f"CAST(odometer / {ODOMETER_BUCKET_WIDTH} AS INTEGER) * {ODOMETER_BUCKET_WIDTH}",
+                         'price_difference' : "sellingprice - mmr"}
+
+# Aggregate functions accepted by get_aggregate_query, by name
+AGGREGATE_FUNCTIONS = {'mean'  : 'AVG',
+                       'sum'   : 'SUM',
+                       'count' : 'COUNT',
+                       'min'   : 'MIN',
+                       'max'   : 'MAX'}
+
+# Filters accepted by get_aggregate_query: '<column>_range' takes an inclusive
+# (low, high) pair where either end may be None, the others one value or a list
+AGGREGATE_RANGE_FILTERS = {'year_range'      : 'year',
+                           'condition_range' : 'condition',
+                           'odometer_range'  : 'odometer',
+                           'price_range'     : 'sellingprice'}
+
+AGGREGATE_VALUE_FILTERS = ['make', 'model', 'trim', 'body', 'transmission', 'state',
+                           'color', 'interior', 'year', 'condition_bucket', 'odometer_bucket']
+
+# Records, per downloaded dataset file, its path, content hash and last Kaggle check so
+# repeated runs can skip the download check; unchanged hashes let incremental_load_csv
+# skip the CSV parse
+DATASET_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_manifest.json")
+
+# Start method of the chunk transform worker processes. The ETL calls
+# iter_transformed_chunks() from a thread while other stages run, and forking a
+# multithreaded process can copy locks held by those threads into the workers
+TRANSFORM_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Per-source load watermarks used by incremental ETL runs to skip unchanged inputs
+WATERMARK_TABLE_NAME = 'etl_watermarks'
+
+WATERMARK_TABLE_COMMAND = f"""CREATE TABLE IF NOT EXISTS
+        {WATERMARK_TABLE_NAME}(source_name text, file_hash text, max_saledate text,
+            row_count int, loaded_at text,
+            PRIMARY KEY (source_name))"""
 
 def import_sql_script(sql_script_path):
     """
@@ -23,8 +143,164 @@ def import_sql_script(sql_script_path):
     return sql_file
 
 
+def read_dataset_manifest(manifest_path = DATASET_MANIFEST_PATH):
+    """
+    Reads the dataset manifest.
+
+    Args:
+        manifest_path (str, optional): Manifest file. Defaults to DATASET_MANIFEST_PATH.
+
+    Returns:
+        dict: Entries keyed by "<kaggle_path><file_path_suffix>", or {} if there is no manifest yet.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+
+    with open(manifest_path, 'r') as manifest_file:
+        return json.load(manifest_file)
+
+
+def write_dataset_manifest(manifest, manifest_path = DATASET_MANIFEST_PATH):
+    """
+    Writes the dataset manifest atomically, so an interrupted run never leaves it half-written.
+    """
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent = 2, sort_keys = True)
+    os.replace(temp_path, manifest_path)
+
+
+def get_cached_file_hash(file_path, manifest_entry = None, manifest_path = DATASET_MANIFEST_PATH):
+    """
+    Returns a file's SHA-256 hash, reusing the manifest's hash while size and mtime are unchanged.
+
+    Args:
+        file_path (str): Path of the file to hash.
+        manifest_entry (dict, optional): Previous manifest entry for the file. Defaults to
+            None, which looks the file up by path in the manifest.
+        manifest_path (str, optional): Manifest searched when manifest_entry is None.
+            Defaults to DATASET_MANIFEST_PATH.
+
+    Returns:
+        dict: 'file_path', 'file_hash', 'size' and 'mtime_ns' of the file.
+    """
+    file_stat = os.stat(file_path)
+    if manifest_entry is None:
+        manifest_entry = next((entry for entry in read_dataset_manifest(manifest_path = manifest_path).values()
+                               if entry.get('file_path') == file_path), {})
+
+    if (manifest_entry.get('file_path') == file_path and
+            manifest_entry.get('size') == file_stat.st_size and
+            manifest_entry.get('mtime_ns') == file_stat.st_mtime_ns):
+        file_hash = manifest_entry['file_hash']
+    else:
+        file_hash = get_file_hash(file_path = file_path)
+
+    return {'file_path' : file_path,
+            'file_hash' : file_hash,
+            'size'      : file_stat.st_size,
+            'mtime_ns'  : file_stat.st_mtime_ns}
+
+
+def is_recorded_download_current(manifest_entry, max_age_seconds = None):
+    """
+    Returns whether a recorded download can be reused without contacting Kaggle.
+
+    Args:
+        manifest_entry (dict): Manifest entry of the dataset file.
+        max_age_seconds (float, optional): Longest time since the download was last
+            checked against Kaggle. Defaults to None, which never reuses it.
+
+    Returns:
+        bool: True if the download was checked within max_age_seconds and the file
+            still has the recorded size and modification time.
+    """
+    if not max_age_seconds or 'checked_at' not in manifest_entry or 'file_path' not in manifest_entry:
+        return False
+
+    if time.time() - manifest_entry['checked_at'] > max_age_seconds:
+        return False
+
+    try:
+        file_stat = os.stat(manifest_entry['file_path'])
+    except OSError:
+        return False
+
+    return (file_stat.st_size == manifest_entry.get('size') and
+            file_stat.st_mtime_ns == manifest_entry.get('mtime_ns'))
+
+
+@instrument()
+def get_kaggle_file_path(kaggle_path = "syedanwarafridi/vehicle-sales-data",
+                         file_path_suffix = "/car_prices.csv",
+                         local_dir = None,
+                         offline = False,
+                         max_age_seconds = None,
+                         manifest_path = DATASET_MANIFEST_PATH):
+    """
+    Downloads a Kaggle dataset and returns the local path of one of its files.
+
+    Args:
+        kaggle_path (str, optional): The Kaggle dataset path in the format "username/dataset-name".
+            Defaults to "syedanwarafridi/vehicle-sales-data".
+        file_path_suffix (str, optional): The suffix to append to the downloaded dataset path
+            to locate the specific CSV file. Defaults to "/car_prices.csv".
+        local_dir (str, optional): Directory holding a copy of the dataset to use instead of
+            downloading it, e.g. a CI fixture directory. Defaults to None.
+        offline (bool, optional): Reuse the path of the last recorded download instead of
+            contacting Kaggle. Defaults to False.
+        max_age_seconds (float, optional): Reuse the last recorded download without
+            contacting Kaggle while it was checked against Kaggle at most this long ago
+            and the file is unchanged on disk. Defaults to None (always check).
+        manifest_path (str, optional): Dataset manifest file. Defaults to DATASET_MANIFEST_PATH.
+
+    Returns:
+        str: The local file path of the downloaded file.
+
+    Notes:
+        - The file's content hash is recorded in the manifest; it is only recomputed when
+          the file's size or modification time changed
+
+    Raises:
+        KaggleApiError: If there's an issue with the Kaggle API authentication or download.
+        FileNotFoundError: If the file does not exist locally, or offline is set and no
+            download was recorded.
+    """
+    manifest_key = f"{kaggle_path}{file_path_suffix}"
+    manifest = read_dataset_manifest(manifest_path = manifest_path)
+    manifest_entry = manifest.get(manifest_key, {})
+
+    if local_dir is not None:
+        file_path = local_dir.rstrip('/') + file_path_suffix
+    elif offline:
+        if 'file_path' not in manifest_entry:
+            raise FileNotFoundError(f"No recorded download of {manifest_key}; run once online or pass local_dir")
+        file_path = manifest_entry['file_path']
+    elif is_recorded_download_current(manifest_entry = manifest_entry,
+                                      max_age_seconds = max_age_seconds):
+        file_path = manifest_entry['file_path']
+    else:
+        stored_file_path = kagglehub.dataset_download(kaggle_path)
+        file_path = stored_file_path + file_path_suffix
+        manifest_entry = {**manifest_entry, 'checked_at' : time.time()}
+
+    file_entry = get_cached_file_hash(file_path = file_path,
+                                      manifest_entry = manifest_entry)
+    updated_entry = {**manifest_entry, **file_entry}
+    if updated_entry != manifest.get(manifest_key):
+        manifest[manifest_key] = updated_entry
+        write_dataset_manifest(manifest = manifest, manifest_path = manifest_path)
+
+    return file_path
+
+
+@instrument()
 def pull_kaggle_data(kaggle_path = "syedanwarafridi/vehicle-sales-data",
-                     file_path_suffix = "/car_prices.csv"):
+                     file_path_suffix = "/car_prices.csv",
+                     dtype = None,
+                     local_dir = None,
+                     offline = False,
+                     manifest_path = DATASET_MANIFEST_PATH):
     """
     Downloads and reads a CSV dataset from Kaggle.
 
@@ -33,6 +309,11 @@ def pull_kaggle_data(kaggle_path = "syedanwarafridi/vehicle-sales-data",
             Defaults to "syedanwarafridi/vehicle-sales-data".
         file_path_suffix (str, optional): The suffix to append to the downloaded dataset path
             to locate the specific CSV file. Defaults to "/car_prices.csv".
+        dtype (dict, optional): Column dtypes for pandas.read_csv, e.g. VEHICLE_SALES_DTYPES.
+            Defaults to None.
+        local_dir (str, optional): See get_kaggle_file_path(). Defaults to None.
+        offline (bool, optional): See get_kaggle_file_path(). Defaults to False.
+        manifest_path (str, optional): Dataset manifest file. Defaults to DATASET_MANIFEST_PATH.
 
     Returns:
         pandas.DataFrame: A DataFrame containing the data from the CSV file.
@@ -42,13 +323,173 @@ def pull_kaggle_data(kaggle_path = "syedanwarafridi/vehicle-sales-data",
         FileNotFoundError: If the specified file cannot be found after download.
         KaggleApiError: If there's an issue with the Kaggle API authentication or download.
     """
-    stored_file_path = kagglehub.dataset_download(kaggle_path)
-    file_path = stored_file_path + file_path_suffix
-    df = pd.read_csv(file_path)
+    file_path = get_kaggle_file_path(kaggle_path = kaggle_path,
+                                     file_path_suffix = file_path_suffix,
+                                     local_dir = local_dir,
+                                     offline = offline,
+                                     manifest_path = manifest_path)
+    df = pd.read_csv(file_path, dtype = dtype)
 
     return df
 
 
+def read_csv_chunks(file_path, chunksize = 100000, dtype = None):
+    """
+    Streams a CSV file as a sequence of DataFrame chunks.
+
+    Args:
+        file_path (str): Path of the CSV file to read.
+        chunksize (int, optional): Number of rows per chunk. Defaults to 100000.
+        dtype (dict, optional): Column dtypes passed to pandas.read_csv, e.g.
+            VEHICLE_SALES_DTYPES. Defaults to None (inferred per chunk).
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of at most chunksize rows.
+
+    Raises:
+        FileNotFoundError: If the specified file cannot be found.
+        ValueError: If a value cannot be converted to its declared dtype.
+    """
+    with pd.read_csv(file_path, chunksize = chunksize, dtype = dtype) as csv_reader:
+        for chunk_df in csv_reader:
+            yield chunk_df
+
+
+def iter_transformed_chunks(dfs, transform, max_workers = 1, max_pending = None):
+    """
+    Applies a transform to a stream of DataFrame chunks, optionally across processes.
+
+    Args:
+        dfs (iterable): DataFrame chunks, e.g. from read_csv_chunks().
+        transform (callable): Takes and returns a DataFrame. Must be picklable (a
+            module-level function or a functools.partial of one) when max_workers > 1.
+        max_workers (int, optional): Worker processes. Defaults to 1, which transforms
+            each chunk in the calling process.
+        max_pending (int, optional): Chunks submitted ahead of the one being yielded.
+            Defaults to None (twice max_workers).
+
+    Yields:
+        pandas.DataFrame: Transformed chunks, in the order they were read.
+
+    Notes:
+        - Results are yielded in input order regardless of which worker finishes
+          first, so the output is identical for any worker count
+        - At most max_pending chunks are in flight, so memory stays bounded by the
+          chunk size rather than the file
+        - Workers are started with TRANSFORM_START_METHOD, never by forking the
+          calling process
+    """
+    if max_workers <= 1:
+        for df in dfs:
+            yield transform(df)
+        return
+
+    max_pending = max_pending or 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers = max_workers,
+                             mp_context = multiprocessing.get_context(TRANSFORM_START_METHOD)) as pool:
+        pending_futures = deque()
+        for df in dfs:
+            pending_futures.append(pool.submit(transform, df))
+            if len(pending_futures) >= max_pending:
+                yield pending_futures.popleft().result()
+
+        while pending_futures:
+            yield pending_futures.popleft().result()
+
+
+@instrument()
+def get_file_hash(file_path, block_size = 1024 * 1024):
+    """
+    Computes the SHA-256 hash of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path of the file to hash.
+        block_size (int, optional): Bytes read per iteration. Defaults to 1 MiB.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the file contents.
+
+    Raises:
+        FileNotFoundError: If the specified file cannot be found.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file_wrapper:
+        for block in iter(lambda: file_wrapper.read(block_size), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def parse_saledate(saledate_series):
+    """
+    Parses car_prices saledate strings into pandas timestamps.
+
+    Args:
+        saledate_series (pandas.Series): Raw saledate values such as
+            'Tue Dec 16 2014 12:30:00 GMT-0800 (PST)'.
+
+    Returns:
+        pandas.Series: datetime64 values in the seller's local time; unparseable
+            entries become NaT.
+
+    Notes:
+        - The weekday prefix and the GMT offset/timezone suffix are dropped before parsing
+    """
+    return pd.to_datetime(saledate_series.astype(str).str.slice(4, 24),
+                          format = '%b %d %Y %H:%M:%S',
+                          errors = 'coerce')
+
+
+def get_peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in MiB.
+
+    Returns:
+        float: Peak RSS in MiB, or NaN where the resource module is unavailable.
+    """
+    if resource is None:
+        return float('nan')
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is reported in bytes on macOS and in KiB on Linux
+    if sys.platform == 'darwin':
+        return peak_rss / 1024 ** 2
+    return peak_rss / 1024
+
+
+@contextmanager
+def track_stage(stage_name):
+    """
+    Times a pipeline stage and logs its throughput and peak memory on exit.
+
+    Args:
+        stage_name (str): Label used in the log line.
+
+    Yields:
+        dict: Stage statistics; the caller sets 'rows' to the number of rows processed.
+            'seconds', 'rows_per_second' and 'peak_rss_mb' are filled in on exit.
+    """
+    stage_stats = {'stage' : stage_name,
+                   'rows'  : 0}
+    start_time = time.perf_counter()
+
+    yield stage_stats
+
+    elapsed_seconds = time.perf_counter() - start_time
+    stage_stats['seconds']         = elapsed_seconds
+    stage_stats['rows_per_second'] = stage_stats['rows'] / elapsed_seconds if elapsed_seconds > 0 else float('nan')
+    stage_stats['peak_rss_mb']     = get_peak_rss_mb()
+
+    logger.info("%s: %d rows in %.2fs (%.0f rows/s), peak RSS %.1f MiB",
+                stage_name,
+                stage_stats['rows'],
+                elapsed_seconds,
+                stage_stats['rows_per_second'],
+                stage_stats['peak_rss_mb'])
+
+
 def get_sql_column_datatypes(df):
     """
     Converts pandas DataFrame column data types to SQL-compatible type names.
@@ -60,18 +501,18 @@ def get_sql_column_datatypes(df):
         pandas.Series: A Series containing SQL-compatible data type names indexed by column names.
 
     Notes:
-        - Converts 'int64' to 'int'
-        - Converts 'float64' to 'float'
-        - Converts 'object' to 'text'
-        - Other pandas data types are returned as strings without modification
+        - Maps by dtype kind, so sized and nullable types are covered too
+        - Integer, unsigned and boolean types (int64, Int16, uint8, bool) become 'int'
+        - Floating types (float64, float32) become 'float'
+        - Datetime types become 'int'; they are stored as epoch seconds
+        - Text, categorical and any other types become 'text'
 
     Raises:
         AttributeError: If the input is not a pandas DataFrame or lacks the dtypes attribute.
     """
-    str_dtypes = df.dtypes.astype(str)
-    str_dtypes = str_dtypes.str.replace("int64", 'int')
-    str_dtypes = str_dtypes.str.replace("float64", 'float')
-    str_dtypes = str_dtypes.str.replace("object", 'text')
+    str_dtypes = pd.Series({col : SQL_TYPES_BY_KIND.get(col_dtype.kind, 'text')
+                            for col, col_dtype in df.dtypes.items()},
+                           dtype = object)
 
     return str_dtypes
 
@@ -118,6 +559,31 @@ def get_create_sql_table_command(df,
     return create_table_command
 
 
+def get_create_sql_index_commands(table_name, index_specs):
+    """
+    Generates SQL CREATE INDEX commands for a table.
+
+    Args:
+        table_name (str): Name of the indexed table.
+        index_specs (list): One list of column names per index, in index key order.
+            Trailing columns that are only read, never filtered on, make the index covering.
+
+    Returns:
+        list: A CREATE INDEX IF NOT EXISTS command per index, named
+            idx_<table_name>_<col1>_<col2>...
+
+    Raises:
+        TypeError: If index_specs is not a list of column name lists.
+    """
+    create_index_commands = []
+    for index_columns in index_specs:
+        index_name = f"idx_{table_name}_{'_'.join(index_columns)}"
+        create_index_commands.append(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(index_columns)})")
+
+    return create_index_commands
+
+
+@instrument()
 def get_sql_insert_commands(df, table_name):
     """
     Generates a list of SQL INSERT commands for each row in a DataFrame.
@@ -134,6 +600,8 @@ def get_sql_insert_commands(df, table_name):
         - Converts numpy.float types to Python float
         - Replaces NaN values with SQL NULL
         - Assumes column order in DataFrame matches table structure
+        - Builds every statement in memory; prefer SQLiteDataObject.bulk_insert_dataframe
+          for large frames
 
     Raises:
         AttributeError: If df is not a pandas DataFrame or lacks required attributes.
@@ -155,42 +623,360 @@ def get_sql_insert_commands(df, table_name):
     return insert_commands
 
 
+def get_sql_insert_statement(columns, table_name, conflict_clause = 'OR IGNORE'):
+    """
+    Generates a parameterized SQL INSERT statement for the given columns.
+
+    Args:
+        columns (list): Column names in the order the row tuples will be supplied.
+        table_name (str): The name of the target table for insertion.
+        conflict_clause (str, optional): Conflict resolution placed after INSERT,
+            e.g. 'OR IGNORE' or 'OR REPLACE', or '' for a plain INSERT. Defaults to 'OR IGNORE'.
+
+    Returns:
+        str: An INSERT statement with one '?' placeholder per column.
+    """
+    column_str      = ", ".join(columns)
+    placeholder_str = ", ".join("?" for _ in columns)
+
+    insert_keyword  = f"INSERT {conflict_clause}".rstrip()
+
+    insert_statement = f"{insert_keyword} INTO {table_name} ({column_str}) VALUES ({placeholder_str})"
+
+    return insert_statement
+
+
+def get_sql_upsert_statement(columns, table_name, conflict_columns):
+    """
+    Generates a parameterized INSERT ... ON CONFLICT DO UPDATE statement.
+
+    Args:
+        columns (list): Column names in the order the row tuples will be supplied.
+        table_name (str): The name of the target table.
+        conflict_columns (list): Columns of the unique/primary key the conflict is detected on.
+
+    Returns:
+        str: An upsert statement with one '?' placeholder per column.
+
+    Notes:
+        - Non-key columns are only rewritten when at least one of them differs, so
+          re-loading unchanged rows does not touch the table pages
+    """
+    insert_statement = get_sql_insert_statement(columns = columns,
+                                                table_name = table_name,
+                                                conflict_clause = '')
+
+    update_columns = [col for col in columns if col not in conflict_columns]
+    if not update_columns:
+        return f"{insert_statement} ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+
+    update_set_str = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+    changed_str    = " OR ".join(f"{table_name}.{col} IS NOT excluded.{col}" for col in update_columns)
+
+    upsert_statement = f"""{insert_statement}
+        ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {update_set_str}
+        WHERE {changed_str}"""
+
+    return upsert_statement
+
+
+def get_sql_column_values(series):
+    """
+    Converts a column into a list of values sqlite3 can bind directly.
+
+    Args:
+        series (pandas.Series): The column to convert.
+
+    Returns:
+        list: Native Python values, with missing values as None and datetimes as
+            integer epoch seconds.
+    """
+    if series.dtype.kind == 'M':
+        series = series.dt.tz_localize(None) if getattr(series.dt, 'tz', None) is not None else series
+        epoch_seconds = ((series - pd.Timestamp(0)) // pd.Timedelta(seconds = 1)).astype('Int64')
+        return epoch_seconds.astype(object).where(series.notna(), None).tolist()
+
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def get_aggregate_query(group_by,
+                        measures,
+                        filters = None,
+                        table_name = 'vehicle_sales_data',
+                        order_by = None,
+                        limit = None):
+    """
+    Compiles an aggregation over the sales table into a parameterized SQL query.
+
+    Args:
+        group_by (list): Group-by keys: vehicle_sales_data columns or the derived
+            'condition_bucket' and 'odometer_bucket'.
+        measures (dict): Mapping of column (or 'price_difference') to a list of
+            AGGREGATE_FUNCTIONS names, e.g. {'sellingprice': ['mean', 'max']}.
+        filters (dict, optional): AGGREGATE_RANGE_FILTERS keys with (low, high) pairs
+            and AGGREGATE_VALUE_FILTERS keys with one value or a list of values, e.g.
+            {'year_range': (2005, 2015), 'make': ['Ford', 'Kia']}. Defaults to None.
+        table_name (str, optional): Table or view to aggregate. Defaults to 'vehicle_sales_data'.
+        order_by (list, optional): Output columns to sort by. Defaults to None (the group-by keys).
+        limit (int, optional): Maximum rows returned. Defaults to None.
+
+    Returns:
+        tuple: (query string, parameter list). Output columns are the group-by keys,
+            'sales_count' and one '<measure>_<function>' column per requested aggregate.
+
+    Notes:
+        - Filter values are always bound as parameters; column names and functions are
+          checked against the allowed sets before being written into the SQL
+        - Filters are applied to raw columns, so a year range plus make/state filters
+          is answered from the (year, make|state, ...) covering indexes
+
+    Raises:
+        ValueError: If a key, measure, function or filter is not recognized.
+    """
+    known_columns = set(VEHICLE_SALES_DTYPES)
+
+    def get_column_expr(col):
+        if col in AGGREGATE_EXPRESSIONS:
+            return AGGREGATE_EXPRESSIONS[col]
+        if col in known_columns:
+            return col
+        raise ValueError(f"Unknown column '{col}'")
+
+    select_exprs = [f"{get_column_expr(col)} AS {col}" for col in group_by]
+    select_exprs.append("COUNT(*) AS sales_count")
+    for measure, function_names in measures.items():
+        for function_name in function_names:
+            if function_name not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Unknown aggregate function '{function_name}', expected one of {list(AGGREGATE_FUNCTIONS)}")
+            select_exprs.append(f"{AGGREGATE_FUNCTIONS[function_name]}({get_column_expr(measure)}) AS {measure}_{function_name}")
+
+    where_strs = []
+    params = []
+    for filter_name, filter_value in (filters or {}).items():
+        if filter_name in AGGREGATE_RANGE_FILTERS:
+            low_value, high_value = filter_value
+            if low_value is not None:
+                where_strs.append(f"{AGGREGATE_RANGE_FILTERS[filter_name]} >= ?")
+                params.append(low_value)
+            if high_value is not None:
+                where_strs.append(f"{AGGREGATE_RANGE_FILTERS[filter_name]} <= ?")
+                params.append(high_value)
+        elif filter_name in AGGREGATE_VALUE_FILTERS:
+            values = list(filter_value) if isinstance(filter_value, (list, tuple, set)) else [filter_value]
+            where_strs.append(f"{get_column_expr(filter_name)} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            raise ValueError(f"Unknown filter '{filter_name}'")
+
+    output_columns = [select_expr.rsplit(' AS ', 1)[1] for select_expr in select_exprs]
+    order_by = order_by if order_by is not None else group_by
+    unknown_order_columns = [col for col in order_by if col not in output_columns]
+    if unknown_order_columns:
+        raise ValueError(f"Cannot order by {unknown_order_columns}; not an output column")
+
+    query = f"SELECT {', '.join(select_exprs)} FROM {table_name}"
+    if where_strs:
+        query += f" WHERE {' AND '.join(where_strs)}"
+    if group_by:
+        query += f" GROUP BY {', '.join(get_column_expr(col) for col in group_by)}"
+    if order_by:
+        query += f" ORDER BY {', '.join(order_by)}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+
+    return query, params
+
+
+def iter_sql_row_chunks(df, chunk_size = 50000):
+    """
+    Yields lists of SQLite-ready row tuples from a DataFrame, one chunk at a time.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame containing data to insert.
+        chunk_size (int, optional): Number of rows per yielded chunk. Defaults to 50000.
+
+    Yields:
+        list: Row tuples for up to chunk_size rows, in DataFrame column order.
+
+    Notes:
+        - Values are converted column by column, so numpy scalars become native
+          Python int/float/str objects that sqlite3 can bind directly
+        - NaN and other missing values are converted to None (SQL NULL)
+        - Datetime columns are converted to integer epoch seconds
+        - Only one chunk of converted rows is held in memory at a time
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk_df = df.iloc[start:start + chunk_size]
+
+        column_values = [get_sql_column_values(chunk_df[col])
+                         for col in chunk_df.columns]
+
+        yield list(zip(*column_values))
+
+
 class SQLiteDataObject:
     """
     A class to manage SQLite database operations including connection, execution, and querying.
 
+    Connections used by execute_sqlite_commands and query_from_database are pooled per
+    thread and reused across calls until close() is called.
+
     Attributes:
         database_name (str): Name of the SQLite database file (without .db extension).
         base_dir (str): Absolute path to the directory containing the script.
+        read_only (bool): Whether connections are opened read-only.
+        timeout (float): Seconds a connection waits on a locked database before failing.
+        cached_statements (int): Size of each connection's prepared-statement cache.
     """
 
-    def __init__(self, database_name = "tool_data"):
+    def __init__(self,
+                 database_name = "tool_data",
+                 read_only = False,
+                 timeout = 30,
+                 cached_statements = 256):
         """
         Initializes the SQLiteDataObject with a database name and base directory.
 
         Args:
             database_name (str, optional): Name of the database file without extension.
                 Defaults to "tool_data".
+            read_only (bool, optional): Open connections with a read-only URI, e.g. for
+                dashboard readers running alongside ETL writes. Defaults to False.
+            timeout (float, optional): Seconds to wait on a locked database.
+                Defaults to 30.
+            cached_statements (int, optional): Prepared statements kept per connection.
+                Defaults to 256.
         """
         
         self.database_name = database_name
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        
-    def create_sqlite_conn(self):
+        self.read_only = read_only
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+
+        self._local       = threading.local()
+        self._connections = []
+        self._pool_lock   = threading.Lock()
+        self._pool_pid    = os.getpid()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_db_path(self):
+        """
+        Returns the file path of the SQLite database.
+
+        Returns:
+            str: Path of the .db file inside base_dir.
+        """
+        return f"{self.base_dir}/{self.database_name}.db"
+
+    def create_sqlite_conn(self, check_same_thread = True):
         """
-        Creates a connection to the SQLite database.
+        Creates a new, unpooled connection to the SQLite database.
+
+        Args:
+            check_same_thread (bool, optional): Passed to sqlite3.connect. Defaults to True.
 
         Returns:
             sqlite3.Connection: A connection object to the SQLite database.
 
+        Notes:
+            - The caller owns the connection and is responsible for closing it
+            - Read-only connections use a 'mode=ro' URI and additionally set query_only
+
         Raises:
             sqlite3.Error: If the database connection cannot be established.
         """
-        db_path = f"{self.base_dir}/{self.database_name}.db"
-        conn = sqlite3.connect(db_path)
+        if self.read_only:
+            db_uri = f"{pathlib.Path(self.get_db_path()).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(db_uri,
+                                   uri = True,
+                                   timeout = self.timeout,
+                                   cached_statements = self.cached_statements,
+                                   check_same_thread = check_same_thread)
+            conn.execute("PRAGMA query_only = 1")
+        else:
+            conn = sqlite3.connect(self.get_db_path(),
+                                   timeout = self.timeout,
+                                   cached_statements = self.cached_statements,
+                                   check_same_thread = check_same_thread)
 
         return conn
-    
+
+    def get_sqlite_conn(self):
+        """
+        Returns the calling thread's pooled connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: A connection reused by every call made from this thread.
+
+        Notes:
+            - After a fork (e.g. gunicorn workers) the inherited pool is discarded and
+              the child opens its own connections
+
+        Raises:
+            sqlite3.Error: If the database connection cannot be established.
+        """
+        if self._pool_pid != os.getpid():
+            self._local       = threading.local()
+            self._connections = []
+            self._pool_pid    = os.getpid()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Pooled connections may be closed from another thread by close()
+            conn = self.create_sqlite_conn(check_same_thread = False)
+            self._local.conn = conn
+            with self._pool_lock:
+                self._connections.append(conn)
+
+        return conn
+
+    def close_thread_conn(self):
+        """
+        Closes the calling thread's pooled connection, if it has one.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+
+        self._local.conn = None
+        with self._pool_lock:
+            self._connections.remove(conn)
+        conn.close()
+
+    def close(self):
+        """
+        Closes every pooled connection. The object can still be used afterwards and
+        will open new connections on demand.
+        """
+        with self._pool_lock:
+            connections = self._connections
+            self._connections = []
+            self._local = threading.local()
+
+        for conn in connections:
+            conn.close()
+
+    def enable_wal(self):
+        """
+        Switches the database to write-ahead logging.
+
+        Notes:
+            - journal_mode=WAL is stored in the database file, so read-only readers
+              opened later can query while a writer is loading
+
+        Raises:
+            sqlite3.Error: If the journal mode cannot be changed.
+        """
+        self.get_sqlite_conn().execute("PRAGMA journal_mode = WAL")
+
+    @instrument()
     def execute_sqlite_commands(self, commands):
         """
         Executes a list of SQL commands on the database.
@@ -201,17 +987,20 @@ class SQLiteDataObject:
         Raises:
             sqlite3.Error: If any SQL command fails to execute.
         """
-        with self.create_sqlite_conn() as conn:
+        with self.get_sqlite_conn() as conn:
             cursor = conn.cursor()
             for command in commands:
                 cursor.execute(command)
 
-    def query_from_database(self, query):
+    @instrument()
+    def query_from_database(self, query, params = ()):
         """
         Executes a SQL query and returns results as a pandas DataFrame.
 
         Args:
             query (str): SQL query string to execute.
+            params (tuple or dict, optional): Values bound to '?' or ':name' placeholders
+                in the query. Defaults to ().
 
         Returns:
             pandas.DataFrame: Query results with column names from the database.
@@ -220,10 +1009,10 @@ class SQLiteDataObject:
             sqlite3.Error: If the query execution fails.
             AttributeError: If pandas is not available for DataFrame creation.
         """
-        with self.create_sqlite_conn() as conn:
+        with self.get_sqlite_conn() as conn:
             
             cursor         = conn.cursor()
-            raw_sql_output = cursor.execute(query)
+            raw_sql_output = cursor.execute(query, params)
             row_values     = cursor.fetchall()
 
         column_values = [_description[0] for _description in raw_sql_output.description]
@@ -231,3 +1020,512 @@ class SQLiteDataObject:
                           columns = column_values)
         
         return df
+
+    @instrument()
+    def query_to_columns(self,
+                         query,
+                         params = (),
+                         columns = None,
+                         dtypes = None,
+                         categorical_columns = (),
+                         batch_size = 50000,
+                         as_arrow = False):
+        """
+        Executes a SQL query and builds typed column arrays batch by batch.
+
+        Unlike query_from_database, the full result is never held as a list of row
+        tuples: rows are fetched with fetchmany and each batch is converted straight
+        into per-column NumPy arrays.
+
+        Args:
+            query (str): SQL query string to execute.
+            params (tuple or dict, optional): Values bound to the query placeholders.
+                Defaults to ().
+            columns (list, optional): Subset of result columns to fetch. Defaults to None (all).
+            dtypes (dict, optional): NumPy dtype per column, e.g. {'year': 'int16',
+                'sellingprice': 'float32'}. NULLs require a float dtype. Undeclared columns
+                are inferred once at the end. Defaults to None.
+            categorical_columns (iterable, optional): Columns returned as pandas
+                categoricals, e.g. VEHICLE_SALES_CATEGORICALS. Defaults to ().
+            batch_size (int, optional): Rows per fetchmany call. Defaults to 50000.
+            as_arrow (bool, optional): Return a pyarrow.Table instead of a DataFrame;
+                categoricals become dictionary-encoded arrays. Defaults to False.
+
+        Returns:
+            pandas.DataFrame or pyarrow.Table: The query result.
+
+        Raises:
+            sqlite3.Error: If the query execution fails.
+            ValueError: If a value cannot be stored in its declared dtype.
+            ImportError: If as_arrow is True and pyarrow is not installed.
+        """
+        if as_arrow and pa is None:
+            raise ImportError("pyarrow is required for as_arrow = True")
+
+        if columns:
+            query = f"SELECT {', '.join(columns)} FROM ({query.strip().rstrip(';')})"
+
+        dtypes = dtypes or {}
+        category_codes = {col : {} for col in categorical_columns}
+
+        cursor = self.get_sqlite_conn().execute(query, params)
+        try:
+            column_names   = [_description[0] for _description in cursor.description]
+            column_batches = {col : [] for col in column_names}
+
+            while True:
+                row_values = cursor.fetchmany(batch_size)
+                if not row_values:
+                    break
+
+                for col, values in zip(column_names, zip(*row_values)):
+                    if col in category_codes:
+                        codes = category_codes[col]
+                        column_batches[col].append(np.fromiter((-1 if value is None else codes.setdefault(value, len(codes))
+                                                                for value in values),
+                                                               dtype = np.int32,
+                                                               count = len(values)))
+                    else:
+                        column_batches[col].append(np.array(values, dtype = dtypes.get(col, object)))
+        finally:
+            cursor.close()
+
+        column_data = {}
+        for col in column_names:
+            if col in category_codes:
+                codes = np.concatenate(column_batches[col]) if column_batches[col] else np.array([], dtype = np.int32)
+                column_data[col] = pd.Categorical.from_codes(codes, categories = list(category_codes[col]))
+            elif column_batches[col]:
+                column_data[col] = np.concatenate(column_batches[col])
+            else:
+                column_data[col] = np.array([], dtype = dtypes.get(col, object))
+            column_batches[col] = None
+
+            if col not in category_codes and col not in dtypes:
+                column_data[col] = pd.Series(column_data[col]).infer_objects()
+
+        df = pd.DataFrame(column_data, columns = column_names, copy = False)
+
+        if as_arrow:
+            return pa.Table.from_pandas(df, preserve_index = False)
+
+        return df
+
+    @instrument()
+    def aggregate(self,
+                  group_by,
+                  measures,
+                  filters = None,
+                  table_name = 'vehicle_sales_data',
+                  order_by = None,
+                  limit = None):
+        """
+        Aggregates the sales table in SQLite and returns only the aggregated rows.
+
+        Args:
+            group_by (list): Group-by keys, e.g. ['year', 'make'] or ['odometer_bucket'].
+            measures (dict): Measures and functions, e.g. {'sellingprice': ['mean']}.
+            filters (dict, optional): e.g. {'year_range': (2000, 2015), 'state': 'ca',
+                'condition_range': (30, 49)}. Defaults to None.
+            table_name (str, optional): Table or view to aggregate. Defaults to 'vehicle_sales_data'.
+            order_by (list, optional): Output columns to sort by. Defaults to None (group-by keys).
+            limit (int, optional): Maximum rows returned. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: One row per group; see get_aggregate_query() for the columns.
+
+        Raises:
+            ValueError: If the specification is invalid.
+            sqlite3.Error: If the query execution fails.
+        """
+        query, params = get_aggregate_query(group_by = group_by,
+                                            measures = measures,
+                                            filters = filters,
+                                            table_name = table_name,
+                                            order_by = order_by,
+                                            limit = limit)
+
+        return self.query_from_database(query = query, params = params)
+
+    def _set_pragmas(self, conn, pragmas):
+        """
+        Applies PRAGMA settings to a connection and returns the values they replaced.
+
+        Args:
+            conn (sqlite3.Connection): The connection to configure.
+            pragmas (dict): Mapping of PRAGMA name to the value to set.
+
+        Returns:
+            dict: Mapping of PRAGMA name to its value before this call.
+        """
+        previous_pragmas = {}
+        for pragma_name, pragma_value in pragmas.items():
+            previous_pragmas[pragma_name] = conn.execute(f"PRAGMA {pragma_name}").fetchone()[0]
+            conn.execute(f"PRAGMA {pragma_name} = {pragma_value}")
+
+        return previous_pragmas
+
+    @instrument()
+    def bulk_insert_dataframe(self,
+                              df,
+                              table_name,
+                              chunk_size = 50000,
+                              conflict_clause = 'OR IGNORE',
+                              conflict_columns = None,
+                              pragmas = LOAD_PRAGMAS):
+        """
+        Loads a DataFrame into a table with parameterized executemany calls.
+
+        Args:
+            df (pandas.DataFrame): The input DataFrame containing data to insert.
+            table_name (str): The name of the target table for insertion.
+            chunk_size (int, optional): Rows per executemany call and per commit.
+                Defaults to 50000.
+            conflict_clause (str, optional): Conflict resolution placed after INSERT.
+                Defaults to 'OR IGNORE'.
+            conflict_columns (list, optional): Key columns for an upsert. When given, rows
+                that conflict on these columns are updated in place and conflict_clause
+                is ignored. Defaults to None.
+            pragmas (dict, optional): PRAGMAs set for the duration of the load and
+                restored afterwards. Defaults to LOAD_PRAGMAS.
+
+        Returns:
+            int: The number of rows submitted to the database.
+
+        Notes:
+            - Columns are bound by name, so DataFrame column order need not match the table
+            - Each chunk is committed on its own, keeping memory bounded by chunk_size
+            - NaN values are stored as SQL NULL
+
+        Raises:
+            sqlite3.Error: If the insert or any PRAGMA fails.
+        """
+        return self.bulk_insert_dataframes(dfs = [df],
+                                           table_name = table_name,
+                                           chunk_size = chunk_size,
+                                           conflict_clause = conflict_clause,
+                                           conflict_columns = conflict_columns,
+                                           pragmas = pragmas)
+
+    @instrument()
+    def bulk_insert_dataframes(self,
+                               dfs,
+                               table_name,
+                               chunk_size = 50000,
+                               conflict_clause = 'OR IGNORE',
+                               conflict_columns = None,
+                               pragmas = LOAD_PRAGMAS):
+        """
+        Loads a stream of DataFrames into a table over a single connection.
+
+        Args:
+            dfs (iterable): DataFrames sharing the same columns, e.g. the output of
+                read_csv_chunks(). Consumed lazily, one frame at a time.
+            table_name (str): The name of the target table for insertion.
+            chunk_size (int, optional): Rows per executemany call and per commit.
+                Defaults to 50000.
+            conflict_clause (str, optional): Conflict resolution placed after INSERT.
+                Defaults to 'OR IGNORE'.
+            conflict_columns (list, optional): Key columns for an upsert. When given, rows
+                that conflict on these columns are updated in place and conflict_clause
+                is ignored. Defaults to None.
+            pragmas (dict, optional): PRAGMAs set for the duration of the load and
+                restored afterwards. Defaults to LOAD_PRAGMAS.
+
+        Returns:
+            int: The number of rows submitted to the database.
+
+        Raises:
+            sqlite3.Error: If the insert or any PRAGMA fails.
+        """
+        conn = self.create_sqlite_conn()
+        try:
+            previous_pragmas = self._set_pragmas(conn, pragmas)
+
+            # Restored even when a chunk fails, since journal_mode persists in the
+            # database file after this connection closes
+            try:
+                row_count = 0
+                insert_statement = None
+                for df in dfs:
+                    if insert_statement is None and conflict_columns:
+                        insert_statement = get_sql_upsert_statement(columns = list(df.columns),
+                                                                    table_name = table_name,
+                                                                    conflict_columns = conflict_columns)
+                    elif insert_statement is None:
+                        insert_statement = get_sql_insert_statement(columns = list(df.columns),
+                                                                    table_name = table_name,
+                                                                    conflict_clause = conflict_clause)
+
+                    for row_chunk in iter_sql_row_chunks(df = df, chunk_size = chunk_size):
+                        with conn:
+                            conn.executemany(insert_statement, row_chunk)
+                        row_count += len(row_chunk)
+            finally:
+                self._set_pragmas(conn, previous_pragmas)
+        finally:
+            conn.close()
+
+        return row_count
+
+    @instrument()
+    def stream_dataframes_to_table(self,
+                                   dfs,
+                                   table_name,
+                                   primary_key_columns,
+                                   chunk_size = 50000,
+                                   upsert = False,
+                                   index_specs = None):
+        """
+        Streams DataFrames into a table, creating the table from the first frame.
+
+        Args:
+            dfs (iterable): DataFrames sharing the same columns, consumed lazily.
+            table_name (str): The name of the target table.
+            primary_key_columns (list): Column names forming the table's primary key.
+            chunk_size (int, optional): Rows per executemany call and per commit.
+                Defaults to 50000.
+            upsert (bool, optional): Update rows that already exist on the primary key
+                instead of ignoring them. Defaults to False.
+            index_specs (list, optional): Secondary indexes passed to
+                get_create_sql_index_commands(). Defaults to None.
+
+        Returns:
+            int: The number of rows submitted to the database.
+
+        Notes:
+            - Throughput and peak RSS are logged through track_stage()
+            - Indexes are created after the rows are loaded, so a first load into an
+              empty table does not pay per-row index maintenance
+
+        Raises:
+            sqlite3.Error: If table creation or any insert fails.
+        """
+        with track_stage(f"load {table_name}") as stage_stats:
+            dfs = iter(dfs)
+
+            first_df = next(dfs, None)
+            if first_df is None:
+                return 0
+
+            create_table_command = get_create_sql_table_command(df = first_df,
+                                                                table_name = table_name,
+                                                                primary_key_columns = primary_key_columns)
+            self.execute_sqlite_commands(commands = [create_table_command])
+
+            stage_stats['rows'] = self.bulk_insert_dataframes(dfs = itertools.chain([first_df], dfs),
+                                                              table_name = table_name,
+                                                              chunk_size = chunk_size,
+                                                              conflict_columns = primary_key_columns if upsert else None)
+
+            if index_specs:
+                self.execute_sqlite_commands(commands = get_create_sql_index_commands(table_name = table_name,
+                                                                                      index_specs = index_specs))
+
+        return stage_stats['rows']
+
+    @instrument()
+    def stream_csv_to_table(self,
+                            file_path,
+                            table_name,
+                            primary_key_columns,
+                            read_chunksize = 100000,
+                            dtype = None,
+                            chunk_size = 50000,
+                            index_specs = None):
+        """
+        Streams a CSV file into a table, creating the table from the first chunk.
+
+        Args:
+            file_path (str): Path of the CSV file to load.
+            table_name (str): The name of the target table.
+            primary_key_columns (list): Column names forming the table's primary key.
+            read_chunksize (int, optional): Rows read from the CSV per chunk.
+                Defaults to 100000.
+            dtype (dict, optional): Column dtypes for pandas.read_csv. Defaults to None.
+            chunk_size (int, optional): Rows per executemany call and per commit.
+                Defaults to 50000.
+            index_specs (list, optional): Secondary indexes passed to
+                get_create_sql_index_commands(). Defaults to None.
+
+        Returns:
+            int: The number of rows submitted to the database.
+
+        Notes:
+            - Peak memory is bounded by read_chunksize rather than the file size
+
+        Raises:
+            FileNotFoundError: If the specified file cannot be found.
+            sqlite3.Error: If table creation or any insert fails.
+        """
+        csv_chunks = read_csv_chunks(file_path = file_path,
+                                     chunksize = read_chunksize,
+                                     dtype = dtype)
+
+        return self.stream_dataframes_to_table(dfs = csv_chunks,
+                                               table_name = table_name,
+                                               primary_key_columns = primary_key_columns,
+                                               chunk_size = chunk_size,
+                                               index_specs = index_specs)
+
+    def get_watermark(self, source_name):
+        """
+        Returns the last recorded load watermark for a source.
+
+        Args:
+            source_name (str): Identifier of the ETL source, e.g. 'vehicle_sales_data'.
+
+        Returns:
+            dict or None: The watermark row (file_hash, max_saledate, row_count, loaded_at),
+                or None if the source has never been loaded.
+
+        Raises:
+            sqlite3.Error: If the watermark table cannot be created or queried.
+        """
+        self.execute_sqlite_commands(commands = [WATERMARK_TABLE_COMMAND])
+
+        watermark_df = self.query_from_database(query = f"SELECT * FROM {WATERMARK_TABLE_NAME} WHERE source_name = ?",
+                                                params = (source_name,))
+        if watermark_df.empty:
+            return None
+
+        return watermark_df.iloc[0].to_dict()
+
+    def set_watermark(self, source_name, file_hash, max_saledate, row_count):
+        """
+        Records the load watermark for a source, replacing any previous one.
+
+        Args:
+            source_name (str): Identifier of the ETL source.
+            file_hash (str): SHA-256 digest of the loaded file.
+            max_saledate (str or None): Latest sale timestamp in the source, ISO formatted.
+            row_count (int): Number of rows in the source.
+
+        Raises:
+            sqlite3.Error: If the watermark cannot be written.
+        """
+        self.execute_sqlite_commands(commands = [WATERMARK_TABLE_COMMAND])
+
+        with self.get_sqlite_conn() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {WATERMARK_TABLE_NAME} VALUES (?, ?, ?, ?, datetime('now'))",
+                         (source_name, file_hash, max_saledate, int(row_count)))
+
+    @instrument()
+    def incremental_load_csv(self,
+                             file_path,
+                             table_name,
+                             primary_key_columns,
+                             source_name = None,
+                             read_chunksize = 100000,
+                             dtype = None,
+                             chunk_size = 50000,
+                             saledate_column = None,
+                             parallel_transform = None,
+                             transform_workers = 1,
+                             transform = None,
+                             chunk_callback = None,
+                             index_specs = None,
+                             force = False):
+        """
+        Loads a CSV into a table only if the file changed since the last recorded load.
+
+        Args:
+            file_path (str): Path of the CSV file to load.
+            table_name (str): The name of the target table.
+            primary_key_columns (list): Column names forming the table's primary key.
+            source_name (str, optional): Watermark key for the source. Defaults to table_name.
+            read_chunksize (int, optional): Rows read from the CSV per chunk.
+                Defaults to 100000.
+            dtype (dict, optional): Column dtypes for pandas.read_csv. Defaults to None.
+            chunk_size (int, optional): Rows per executemany call and per commit.
+                Defaults to 50000.
+            saledate_column (str, optional): Column parsed with parse_saledate() to record
+                the max sale date in the watermark. Defaults to None.
+            parallel_transform (callable, optional): Picklable function applied to each
+                chunk across transform_workers processes, e.g. clean_vehicle_sales().
+                Runs before transform. Defaults to None.
+            transform_workers (int, optional): Processes for parallel_transform.
+                Defaults to 1 (in the calling process).
+            transform (callable, optional): Applied to each chunk in the calling process
+                after the watermark is observed and before it is loaded, e.g. a
+                DimensionEncoder that writes to this database. Defaults to None.
+            chunk_callback (callable, optional): Called with each (transformed) chunk
+                before it is loaded, e.g. to collect the keys touched by the load.
+                Defaults to None.
+            index_specs (list, optional): Secondary indexes passed to
+                get_create_sql_index_commands(). Defaults to None.
+            force (bool, optional): Load even if the file hash matches the watermark.
+                Defaults to False.
+
+        Returns:
+            int: The number of rows submitted to the database, or 0 if the source was skipped.
+
+        Notes:
+            - Rows are upserted on primary_key_columns; existing rows are only rewritten
+              when a non-key column changed, so a changed file costs writes for its new
+              and changed rows only
+            - The watermark is written after the load succeeds, so a failed run is retried
+              in full on the next run
+            - Files recorded in the dataset manifest (Kaggle downloads) are only re-hashed
+              when their size or modification time changed; other files are hashed on
+              every call
+
+        Raises:
+            FileNotFoundError: If the specified file cannot be found.
+            sqlite3.Error: If table creation or any insert fails.
+        """
+        source_name = source_name or table_name
+        file_hash   = get_cached_file_hash(file_path = file_path)['file_hash']
+
+        watermark = self.get_watermark(source_name = source_name)
+        if not force and watermark is not None and watermark['file_hash'] == file_hash:
+            logger.info("%s: unchanged since %s, skipping", source_name, watermark['loaded_at'])
+            if index_specs:
+                self.execute_sqlite_commands(commands = get_create_sql_index_commands(table_name = table_name,
+                                                                                      index_specs = index_specs))
+            return 0
+
+        source_stats = {'rows'         : 0,
+                        'max_saledate' : None}
+
+        def observe_chunks(csv_chunks):
+            for chunk_df in csv_chunks:
+                source_stats['rows'] += len(chunk_df)
+                if saledate_column is not None:
+                    chunk_max_saledate = parse_saledate(chunk_df[saledate_column]).max()
+                    if pd.notna(chunk_max_saledate) and (source_stats['max_saledate'] is None or
+                                                         chunk_max_saledate > source_stats['max_saledate']):
+                        source_stats['max_saledate'] = chunk_max_saledate
+                yield chunk_df
+
+        def finish_chunks(transformed_chunks):
+            for chunk_df in transformed_chunks:
+                if transform is not None:
+                    chunk_df = transform(chunk_df)
+                if chunk_callback is not None:
+                    chunk_callback(chunk_df)
+                yield chunk_df
+
+        csv_chunks = observe_chunks(read_csv_chunks(file_path = file_path,
+                                                    chunksize = read_chunksize,
+                                                    dtype = dtype))
+
+        if parallel_transform is not None:
+            csv_chunks = iter_transformed_chunks(dfs = csv_chunks,
+                                                 transform = parallel_transform,
+                                                 max_workers = transform_workers)
+
+        row_count = self.stream_dataframes_to_table(dfs = finish_chunks(csv_chunks),
+                                                    table_name = table_name,
+                                                    primary_key_columns = primary_key_columns,
+                                                    chunk_size = chunk_size,
+                                                    upsert = True,
+                                                    index_specs = index_specs)
+
+        max_saledate = source_stats['max_saledate']
+        self.set_watermark(source_name = source_name,
+                           file_hash = file_hash,
+                           max_saledate = max_saledate.isoformat() if max_saledate is not None else None,
+                           row_count = source_stats['rows'])
+
+        return row_count
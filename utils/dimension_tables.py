@@ -0,0 +1,184 @@
+import pandas as pd
+
+# Repeated vehicle_sales_data text columns moved into dim_<column> lookup tables
+DIMENSION_COLUMNS = ['make', 'model', 'trim', 'body', 'color', 'interior', 'seller']
+
+# Column order of vehicle_sales_data, reproduced by the vehicle_sales_view view
+VEHICLE_SALES_COLUMNS = ['year', 'make', 'model', 'trim', 'body', 'transmission', 'vin', 'state',
+                         'condition', 'odometer', 'color', 'interior', 'seller', 'mmr',
+                         'sellingprice', 'saledate']
+
+FACT_TABLE_NAME = 'vehicle_sales_fact'
+
+VIEW_NAME = 'vehicle_sales_view'
+
+LOOKUP_BATCH_SIZE = 500
+
+
+def get_dimension_table_name(column):
+    """
+    Returns the lookup table name for a dimension column, e.g. 'dim_make'.
+    """
+    return f"dim_{column}"
+
+
+def get_create_dimension_table_commands(dimension_columns = DIMENSION_COLUMNS):
+    """
+    Generates CREATE TABLE commands for the dimension lookup tables.
+
+    Args:
+        dimension_columns (list, optional): Columns to normalize. Defaults to DIMENSION_COLUMNS.
+
+    Returns:
+        list: One command per column creating dim_<column>(<column>_id, <column>), where
+            <column>_id is an INTEGER PRIMARY KEY (the rowid) and <column> is unique.
+    """
+    return [f"""CREATE TABLE IF NOT EXISTS
+        {get_dimension_table_name(col)}({col}_id INTEGER PRIMARY KEY, {col} text UNIQUE NOT NULL)"""
+            for col in dimension_columns]
+
+
+def get_create_view_command(fact_table_name = FACT_TABLE_NAME,
+                            view_name = VIEW_NAME,
+                            columns = VEHICLE_SALES_COLUMNS,
+                            dimension_columns = DIMENSION_COLUMNS):
+    """
+    Generates a view that joins the fact table back to its dimensions.
+
+    Args:
+        fact_table_name (str, optional): Fact table holding <column>_id keys.
+            Defaults to FACT_TABLE_NAME.
+        view_name (str, optional): Name of the view. Defaults to VIEW_NAME.
+        columns (list, optional): Output columns, in order. Defaults to VEHICLE_SALES_COLUMNS.
+        dimension_columns (list, optional): Normalized columns. Defaults to DIMENSION_COLUMNS.
+
+    Returns:
+        str: A CREATE VIEW command whose columns match vehicle_sales_data, so queries
+            written against the raw table run unchanged against the view.
+    """
+    select_exprs = [f"{get_dimension_table_name(col)}.{col}" if col in dimension_columns
+                    else f"fact.{col}"
+                    for col in columns]
+
+    join_strs = [f"LEFT JOIN {get_dimension_table_name(col)} USING ({col}_id)"
+                 for col in dimension_columns]
+
+    create_view_command = f"""CREATE VIEW IF NOT EXISTS
+        {view_name} AS
+        SELECT {', '.join(select_exprs)}
+        FROM {fact_table_name} AS fact
+        {' '.join(join_strs)}"""
+
+    return create_view_command
+
+
+def get_fact_index_specs(index_specs, dimension_columns = DIMENSION_COLUMNS):
+    """
+    Translates raw-table index specs to the fact table's surrogate key columns.
+
+    Args:
+        index_specs (list): Index column lists written for vehicle_sales_data,
+            e.g. VEHICLE_SALES_INDEXES.
+        dimension_columns (list, optional): Normalized columns. Defaults to DIMENSION_COLUMNS.
+
+    Returns:
+        list: The same specs with every dimension column replaced by <column>_id.
+    """
+    return [[f"{col}_id" if col in dimension_columns else col for col in index_columns]
+            for index_columns in index_specs]
+
+
+class DimensionEncoder:
+    """
+    Replaces dimension text columns with integer surrogate keys, chunk by chunk.
+
+    New values are added to the dim_<column> tables as they are first seen, and the
+    value-to-key mappings are cached in memory so each distinct string is looked up
+    in SQLite only once per run.
+
+    Attributes:
+        sqlite_object (SQLiteDataObject): Database holding the dimension tables.
+        dimension_columns (list): Columns to encode.
+    """
+
+    def __init__(self, sqlite_object, dimension_columns = DIMENSION_COLUMNS):
+        """
+        Initializes the encoder and creates the dimension tables if needed.
+
+        Args:
+            sqlite_object (SQLiteDataObject): Database holding the dimension tables.
+            dimension_columns (list, optional): Columns to encode. Defaults to DIMENSION_COLUMNS.
+        """
+        self.sqlite_object     = sqlite_object
+        self.dimension_columns = dimension_columns
+
+        self._key_maps = {col : {} for col in dimension_columns}
+
+        self.sqlite_object.execute_sqlite_commands(commands = get_create_dimension_table_commands(dimension_columns = dimension_columns))
+
+    def _get_keys(self, column, values):
+        """
+        Returns surrogate keys for values of a column, inserting unseen values.
+
+        Args:
+            column (str): Dimension column name.
+            values (iterable): Distinct non-null values from the current chunk.
+
+        Returns:
+            dict: The (cached) mapping of every known value to its key.
+        """
+        key_map = self._key_maps[column]
+        new_values = [value for value in values if value not in key_map]
+        if not new_values:
+            return key_map
+
+        table_name = get_dimension_table_name(column)
+        with self.sqlite_object.get_sqlite_conn() as conn:
+            conn.executemany(f"INSERT OR IGNORE INTO {table_name} ({column}) VALUES (?)",
+                             [(value,) for value in new_values])
+
+            # Looked up in batches to stay below SQLite's bound-parameter limit
+            for start in range(0, len(new_values), LOOKUP_BATCH_SIZE):
+                value_batch = new_values[start:start + LOOKUP_BATCH_SIZE]
+                placeholder_str = ", ".join("?" for _ in value_batch)
+                key_rows = conn.execute(f"SELECT {column}, {column}_id FROM {table_name} WHERE {column} IN ({placeholder_str})",
+                                        value_batch).fetchall()
+                key_map.update(key_rows)
+
+        return key_map
+
+    def encode(self, df):
+        """
+        Returns a copy of a chunk with dimension columns replaced by <column>_id keys.
+
+        Args:
+            df (pandas.DataFrame): A vehicle_sales_data shaped chunk.
+
+        Returns:
+            pandas.DataFrame: The chunk with make, model, ... swapped for make_id,
+                model_id, ... (nullable Int64, NULL where the value was missing).
+        """
+        encoded_columns = {}
+        for col in df.columns:
+            if col not in self.dimension_columns:
+                encoded_columns[col] = df[col]
+                continue
+
+            text_values = df[col].astype(object).where(df[col].notna(), None)
+            key_map = self._get_keys(column = col,
+                                     values = pd.unique(text_values.dropna()))
+            encoded_columns[f"{col}_id"] = text_values.map(key_map).astype('Int64')
+
+        return pd.DataFrame(encoded_columns, index = df.index)
+
+    def create_view(self, fact_table_name = FACT_TABLE_NAME, view_name = VIEW_NAME):
+        """
+        Creates the view joining the fact table back to its dimensions.
+
+        Args:
+            fact_table_name (str, optional): Fact table name. Defaults to FACT_TABLE_NAME.
+            view_name (str, optional): View name. Defaults to VIEW_NAME.
+        """
+        self.sqlite_object.execute_sqlite_commands(commands = [get_create_view_command(fact_table_name = fact_table_name,
+                                                                                       view_name = view_name,
+                                                                                       dimension_columns = self.dimension_columns)])
@@ -0,0 +1,144 @@
+import time
+import logging
+import multiprocessing
+from concurrent.futures import (ThreadPoolExecutor,
+                                ProcessPoolExecutor,
+                                FIRST_COMPLETED,
+                                wait)
+
+from utils.data_transfer import TRANSFORM_START_METHOD
+
+logger = logging.getLogger(__name__)
+
+# Stage kinds and the pool each one runs on
+STAGE_KINDS = ['io', 'cpu', 'write']
+
+
+def _run_timed(func, args):
+    """
+    Calls func(*args) and returns its result with the elapsed wall-clock seconds.
+
+    Defined at module level so it can be sent to a process pool.
+    """
+    start_time = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - start_time
+
+
+class ETLExecutor:
+    """
+    Runs pipeline stages as a dependency graph, overlapping independent stages.
+
+    Each stage receives the results of the stages it depends on as positional
+    arguments, in depends_on order. Stages run on a pool chosen by their kind:
+
+        - 'io': a thread pool, for downloads and other waiting-bound work
+        - 'cpu': a process pool, for CPU-heavy transforms; the function, its inputs and
+          its result must be picklable
+        - 'write': a single thread, so every SQLite write goes through one writer and
+          one pooled connection
+
+    Attributes:
+        max_io_workers (int): Threads available to 'io' stages.
+        max_cpu_workers (int or None): Processes available to 'cpu' stages.
+        stage_timings (dict): Seconds spent inside each finished stage.
+    """
+
+    def __init__(self, max_io_workers = 4, max_cpu_workers = None):
+        """
+        Initializes an executor with no stages.
+
+        Args:
+            max_io_workers (int, optional): Threads for 'io' stages. Defaults to 4.
+            max_cpu_workers (int, optional): Processes for 'cpu' stages.
+                Defaults to None (one per CPU).
+        """
+        self.max_io_workers  = max_io_workers
+        self.max_cpu_workers = max_cpu_workers
+        self.stage_timings   = {}
+
+        self._stages = {}
+
+    def add_stage(self, name, func, depends_on = (), kind = 'io'):
+        """
+        Registers a stage.
+
+        Args:
+            name (str): Unique stage name.
+            func (callable): Called with the results of depends_on, in order.
+            depends_on (iterable, optional): Names of stages that must finish first.
+                Defaults to ().
+            kind (str, optional): One of 'io', 'cpu' or 'write'. Defaults to 'io'.
+
+        Raises:
+            ValueError: If the name is taken, the kind is unknown or a dependency
+                has not been registered yet.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind '{kind}', expected one of {STAGE_KINDS}")
+
+        missing_stages = [dependency for dependency in depends_on if dependency not in self._stages]
+        if missing_stages:
+            raise ValueError(f"Stage '{name}' depends on unregistered stages {missing_stages}")
+
+        self._stages[name] = {'func'       : func,
+                              'depends_on' : list(depends_on),
+                              'kind'       : kind}
+
+    def run(self):
+        """
+        Runs every stage once its dependencies have finished.
+
+        Returns:
+            dict: Mapping of stage name to the value its function returned.
+
+        Notes:
+            - Stages must be registered after their dependencies, so the graph is
+              acyclic by construction
+            - If a stage raises, stages not yet started are cancelled and the
+              exception is re-raised once running stages finish
+
+        Raises:
+            Exception: Whatever the first failing stage raised.
+        """
+        results = {}
+        self.stage_timings = {}
+
+        pools = {'io'    : ThreadPoolExecutor(max_workers = self.max_io_workers,
+                                              thread_name_prefix = 'etl-io'),
+                 'cpu'   : ProcessPoolExecutor(max_workers = self.max_cpu_workers,
+                                               mp_context = multiprocessing.get_context(TRANSFORM_START_METHOD)),
+                 'write' : ThreadPoolExecutor(max_workers = 1,
+                                              thread_name_prefix = 'etl-write')}
+
+        pending_stages = dict(self._stages)
+        running_futures = {}
+        run_start_time = time.perf_counter()
+        try:
+            while pending_stages or running_futures:
+                ready_stages = [name for name, stage in pending_stages.items()
+                                if all(dependency in results for dependency in stage['depends_on'])]
+
+                for name in ready_stages:
+                    stage = pending_stages.pop(name)
+                    stage_args = [results[dependency] for dependency in stage['depends_on']]
+                    future = pools[stage['kind']].submit(_run_timed, stage['func'], stage_args)
+                    running_futures[future] = name
+
+                done_futures, _ = wait(running_futures, return_when = FIRST_COMPLETED)
+                for future in done_futures:
+                    name = running_futures.pop(future)
+                    results[name], self.stage_timings[name] = future.result()
+                    logger.info("stage %s finished in %.2fs", name, self.stage_timings[name])
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait = True, cancel_futures = True)
+
+        logger.info("pipeline finished in %.2fs: %s",
+                    time.perf_counter() - run_start_time,
+                    ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stage_timings.items()))
+
+        return results
@@ -0,0 +1,361 @@
+import os
+import re
+import json
+import time
+import base64
+import fnmatch
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Set INSTRUMENTATION_ENABLED=0 to turn every instrumented call into a plain call
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '1') != '0'
+
+# Set INSTRUMENTATION_LOG=1 to log one JSON record per instrumented call at INFO
+# instead of DEBUG
+INSTRUMENTATION_LOG_LEVEL = logging.INFO if os.environ.get('INSTRUMENTATION_LOG') == '1' else logging.DEBUG
+
+# Set INSTRUMENTATION_PROFILE to 'cprofile' or 'pyinstrument' to profile instrumented
+# calls whose operation name matches INSTRUMENTATION_PROFILE_OPS (a glob, default all),
+# writing one file per call to INSTRUMENTATION_PROFILE_DIR
+PROFILER = os.environ.get('INSTRUMENTATION_PROFILE', '').lower() or None
+PROFILE_OPERATIONS = os.environ.get('INSTRUMENTATION_PROFILE_OPS', '*')
+PROFILE_DIR = os.environ.get('INSTRUMENTATION_PROFILE_DIR', 'profiles')
+
+# Upper bounds, in seconds, of the duration histogram buckets
+DURATION_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60]
+
+METRIC_PREFIX = 'vehicle_sales'
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def get_rss_bytes():
+    """
+    Returns the current resident set size of the process in bytes.
+
+    Returns:
+        int or None: RSS read from /proc/self/statm, or None where it is unavailable.
+    """
+    try:
+        with open('/proc/self/statm') as statm_file:
+            return int(statm_file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def get_row_count(result):
+    """
+    Infers how many rows an instrumented call returned or processed.
+
+    Args:
+        result (object): The call's return value.
+
+    Returns:
+        int or None: An int result itself (loaders return the rows they wrote), the
+            length of a DataFrame, array or list, the number of points in a Plotly
+            figure, the length of the first column of a column dict, or None.
+    """
+    if isinstance(result, bool) or result is None:
+        return None
+    if isinstance(result, int):
+        return result
+    if hasattr(result, 'shape') and hasattr(result, '__len__'):
+        return len(result)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+
+    traces = result.get('data') if isinstance(result, dict) else getattr(result, 'data', None)
+    if isinstance(traces, (list, tuple)):
+        return sum(_count_trace_points(trace.get('x') if isinstance(trace, dict) else getattr(trace, 'x', None))
+                   for trace in traces)
+
+    if isinstance(result, dict) and result:
+        first_value = next(iter(result.values()))
+        if hasattr(first_value, '__len__') and not isinstance(first_value, str):
+            return len(first_value)
+
+    return None
+
+
+def _count_trace_points(trace_x):
+    """
+    Returns the length of a trace's x values, including Plotly's base64 typed-array form.
+    """
+    if trace_x is None:
+        return 0
+    if isinstance(trace_x, dict) and 'bdata' in trace_x:
+        return len(base64.b64decode(trace_x['bdata'])) // np.dtype(trace_x['dtype']).itemsize
+
+    return len(trace_x)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe aggregates of instrumented calls, keyed by operation name.
+
+    For each operation the registry keeps the call and error counts, a duration
+    histogram, the total rows processed and the total and largest RSS deltas, plus
+    the raw and sent sizes of responses recorded with record_payload().
+    """
+
+    def __init__(self, duration_buckets = DURATION_BUCKETS):
+        self.duration_buckets = duration_buckets
+
+        self._operations = {}
+        self._lock       = threading.Lock()
+
+    def record(self, operation, seconds, rows = None, memory_delta_bytes = None, error = False):
+        """
+        Adds one call to an operation's aggregates.
+        """
+        with self._lock:
+            stats = self._get_stats(operation = operation)
+
+            stats['count']       += 1
+            stats['errors']      += int(error)
+            stats['seconds_sum'] += seconds
+            for bucket_index, bucket_bound in enumerate(self.duration_buckets):
+                if seconds <= bucket_bound:
+                    stats['bucket_counts'][bucket_index] += 1
+            if rows is not None:
+                stats['rows_sum'] += rows
+            if memory_delta_bytes is not None:
+                stats['memory_delta_sum'] += memory_delta_bytes
+                stats['memory_delta_max']  = max(stats['memory_delta_max'], memory_delta_bytes)
+
+    def record_payload(self, operation, payload_bytes, sent_bytes):
+        """
+        Adds one response's size before and after compression to an operation's aggregates.
+        """
+        with self._lock:
+            stats = self._get_stats(operation = operation)
+
+            stats['responses']          += 1
+            stats['payload_bytes_sum']  += payload_bytes
+            stats['sent_bytes_sum']     += sent_bytes
+            stats['payload_bytes_max']   = max(stats['payload_bytes_max'], payload_bytes)
+
+    def _get_stats(self, operation):
+        # Callers hold self._lock
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = {'count'               : 0,
+                     'errors'              : 0,
+                     'seconds_sum'         : 0.0,
+                     'bucket_counts'       : [0] * len(self.duration_buckets),
+                     'rows_sum'            : 0,
+                     'memory_delta_sum'    : 0,
+                     'memory_delta_max'    : 0,
+                     'responses'           : 0,
+                     'payload_bytes_sum'   : 0,
+                     'sent_bytes_sum'      : 0,
+                     'payload_bytes_max'   : 0}
+            self._operations[operation] = stats
+
+        return stats
+
+    def snapshot(self):
+        """
+        Returns a copy of every operation's aggregates.
+        """
+        with self._lock:
+            return {operation : {**stats, 'bucket_counts' : list(stats['bucket_counts'])}
+                    for operation, stats in self._operations.items()}
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def render_prometheus(self):
+        """
+        Renders the aggregates in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics named '<METRIC_PREFIX>_operation_*' with an 'operation' label.
+        """
+        operations = self.snapshot()
+        metric = f"{METRIC_PREFIX}_operation"
+
+        lines = [f"# HELP {metric}_duration_seconds Wall-clock time of instrumented calls.",
+                 f"# TYPE {metric}_duration_seconds histogram"]
+        for operation, stats in sorted(operations.items()):
+            if not stats['count']:
+                continue
+            label = _format_label(operation)
+            for bucket_bound, bucket_count in zip(self.duration_buckets, stats['bucket_counts']):
+                lines.append(f'{metric}_duration_seconds_bucket{{operation="{label}",le="{bucket_bound}"}} {bucket_count}')
+            lines.append(f'{metric}_duration_seconds_bucket{{operation="{label}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{metric}_duration_seconds_sum{{operation="{label}"}} {stats["seconds_sum"]:.6f}')
+            lines.append(f'{metric}_duration_seconds_count{{operation="{label}"}} {stats["count"]}')
+
+        # Call metrics are rendered for operations with calls, payload metrics for
+        # operations with recorded responses
+        for name, key, count_key, metric_type, help_text in [('errors_total', 'errors', 'count', 'counter', "Instrumented calls that raised."),
+                                                             ('rows_total', 'rows_sum', 'count', 'counter', "Rows returned or processed by instrumented calls."),
+                                                             ('memory_delta_bytes_sum', 'memory_delta_sum', 'count', 'gauge', "Summed RSS change across instrumented calls."),
+                                                             ('memory_delta_bytes_max', 'memory_delta_max', 'count', 'gauge', "Largest RSS increase of a single instrumented call."),
+                                                             ('payload_responses_total', 'responses', 'responses', 'counter', "Responses whose payload size was recorded."),
+                                                             ('payload_bytes_total', 'payload_bytes_sum', 'responses', 'counter', "Uncompressed bytes of recorded responses."),
+                                                             ('payload_sent_bytes_total', 'sent_bytes_sum', 'responses', 'counter', "Bytes of recorded responses as sent, after compression."),
+                                                             ('payload_bytes_max', 'payload_bytes_max', 'responses', 'gauge', "Largest uncompressed recorded response.")]:
+            lines.append(f"# HELP {metric}_{name} {help_text}")
+            lines.append(f"# TYPE {metric}_{name} {metric_type}")
+            for operation, stats in sorted(operations.items()):
+                if not stats[count_key]:
+                    continue
+                lines.append(f'{metric}_{name}{{operation="{_format_label(operation)}"}} {stats[key]}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_label(value):
+    return re.sub(r'(["\\])', r'\\\1', value).replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+_profile_state = threading.local()
+
+
+@contextmanager
+def _profile(operation):
+    """
+    Profiles a block with the configured profiler and writes the result to PROFILE_DIR.
+
+    Only the outermost profiled operation of a thread is captured, since profilers
+    cannot be nested.
+    """
+    if (PROFILER is None or getattr(_profile_state, 'active', False) or
+            not fnmatch.fnmatch(operation, PROFILE_OPERATIONS)):
+        yield
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok = True)
+    file_stem = os.path.join(PROFILE_DIR, f"{operation}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}")
+
+    _profile_state.active = True
+    try:
+        if PROFILER == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(f"{file_stem}.html", 'w') as profile_file:
+                    profile_file.write(profiler.output_html())
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(f"{file_stem}.prof")
+    finally:
+        _profile_state.active = False
+
+
+@contextmanager
+def track(operation, registry = REGISTRY):
+    """
+    Records the duration, rows and RSS change of a block.
+
+    Args:
+        operation (str): Operation name used as the metric label.
+        registry (MetricsRegistry, optional): Destination of the measurement.
+            Defaults to REGISTRY.
+
+    Yields:
+        dict: Call statistics; the caller may set 'rows'. 'seconds' and
+            'memory_delta_bytes' are filled in on exit.
+    """
+    call_stats = {'operation' : operation,
+                  'rows'      : None}
+    if not INSTRUMENTATION_ENABLED:
+        yield call_stats
+        return
+
+    start_rss = get_rss_bytes()
+    start_time = time.perf_counter()
+    error = False
+    try:
+        with _profile(operation = operation):
+            yield call_stats
+    except BaseException:
+        error = True
+        raise
+    finally:
+        end_rss = get_rss_bytes()
+        call_stats['seconds'] = time.perf_counter() - start_time
+        call_stats['memory_delta_bytes'] = end_rss - start_rss if None not in (start_rss, end_rss) else None
+        call_stats['error'] = error
+
+        registry.record(operation = operation,
+                        seconds = call_stats['seconds'],
+                        rows = call_stats['rows'],
+                        memory_delta_bytes = call_stats['memory_delta_bytes'],
+                        error = error)
+
+        if logger.isEnabledFor(INSTRUMENTATION_LOG_LEVEL):
+            logger.log(INSTRUMENTATION_LOG_LEVEL, json.dumps(call_stats))
+
+
+def instrument(operation = None, rows = get_row_count, registry = REGISTRY):
+    """
+    Decorates a function or method so each call is recorded with track().
+
+    Args:
+        operation (str, optional): Operation name. Defaults to None, which uses the
+            function's qualified name, e.g. 'SQLiteDataObject.query_from_database'.
+        rows (callable, optional): Maps the return value to a row count, or None to
+            record no rows. Defaults to get_row_count.
+        registry (MetricsRegistry, optional): Destination of the measurements.
+            Defaults to REGISTRY.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        operation_name = operation or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTATION_ENABLED:
+                return func(*args, **kwargs)
+
+            with track(operation = operation_name, registry = registry) as call_stats:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    call_stats['rows'] = rows(result)
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def register_metrics_endpoint(server, path = '/metrics', registry = REGISTRY):
+    """
+    Serves the registry in the Prometheus text format from a Flask server.
+
+    Args:
+        server (flask.Flask): The server, e.g. a Dash app's app.server.
+        path (str, optional): URL path of the endpoint. Defaults to '/metrics'.
+        registry (MetricsRegistry, optional): Registry to expose. Defaults to REGISTRY.
+    """
+    def metrics():
+        return (registry.render_prometheus(),
+                200,
+                {'Content-Type' : 'text/plain; version=0.0.4; charset=utf-8'})
+
+    server.add_url_rule(path, endpoint = 'metrics', view_func = metrics)
@@ -0,0 +1,409 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_transfer import track_stage, parse_saledate
+from utils.dimension_tables import (DIMENSION_COLUMNS,
+                                    FACT_TABLE_NAME,
+                                    VIEW_NAME,
+                                    get_dimension_table_name)
+
+PRICE_INDEX_TABLE = 'price_index'
+PRICE_HISTOGRAM_TABLE = 'price_index_histogram'
+PRICE_ROLLING_TABLE = 'price_index_rolling'
+PRICE_INDEX_STATE_TABLE = 'price_index_state'
+
+PERIOD_TYPES = ['month', 'week']
+
+# Periods in each rolling window, ending at (and including) the window's period
+ROLLING_WINDOWS = {'month' : 3,
+                   'week'  : 4}
+
+# Segments indexed per period: segment type -> sales column, or None for all sales
+INDEX_SEGMENTS = {'all'  : None,
+                  'make' : 'make'}
+
+# Selling prices are counted in log-scale buckets, 16 per price doubling (about 4.4%
+# wide), so medians can be merged across loads and rolling windows; a median read from
+# the histogram is interpolated within its bucket and never off by more than a bucket
+PRICE_BUCKETS_PER_DOUBLING = 16
+
+KEY_COLUMNS = ['period_type', 'period_start', 'segment_type', 'segment']
+
+SUM_COLUMNS = ['sales_count', 'sellingprice_sum', 'matched_sellingprice_sum', 'mmr_sum']
+
+INDEX_COLUMNS = ['mean_price', 'median_price', 'price_to_mmr']
+
+CREATE_TABLE_COMMANDS = [
+    f"""CREATE TABLE IF NOT EXISTS
+        {PRICE_INDEX_TABLE}(period_type text, period_start text, segment_type text, segment text,
+            sales_count int, sellingprice_sum float, matched_sellingprice_sum float, mmr_sum float,
+            mean_price float, median_price float, price_to_mmr float,
+            PRIMARY KEY ({', '.join(KEY_COLUMNS)}))""",
+    f"""CREATE TABLE IF NOT EXISTS
+        {PRICE_HISTOGRAM_TABLE}(period_type text, period_start text, segment_type text, segment text,
+            price_bucket int, sales_count int,
+            PRIMARY KEY ({', '.join(KEY_COLUMNS)}, price_bucket))""",
+    f"""CREATE TABLE IF NOT EXISTS
+        {PRICE_ROLLING_TABLE}(period_type text, period_start text, segment_type text, segment text,
+            window_periods int, sales_count int, mean_price float, median_price float, price_to_mmr float,
+            PRIMARY KEY ({', '.join(KEY_COLUMNS)}))""",
+    f"""CREATE TABLE IF NOT EXISTS
+        {PRICE_INDEX_STATE_TABLE}(source_name text PRIMARY KEY, last_sale_id int, updated_at text)"""]
+
+
+def get_new_sales_query(source_table = 'vehicle_sales_data'):
+    """
+    Generates the query reading sales added after a given rowid.
+
+    Args:
+        source_table (str, optional): Sales table, or VIEW_NAME to read the normalized
+            fact table directly, since a view has no rowid. Defaults to 'vehicle_sales_data'.
+
+    Returns:
+        str: A query with one '?' placeholder for the last processed rowid, returning
+            sale_id, saledate, sellingprice, mmr and the INDEX_SEGMENTS columns.
+    """
+    segment_columns = [col for col in INDEX_SEGMENTS.values() if col is not None]
+
+    if source_table == VIEW_NAME:
+        from_str = " ".join([f"{FACT_TABLE_NAME} AS fact"] +
+                            [f"LEFT JOIN {get_dimension_table_name(col)} USING ({col}_id)"
+                             for col in segment_columns if col in DIMENSION_COLUMNS])
+        select_exprs = ["fact.rowid AS sale_id", "fact.saledate", "fact.sellingprice", "fact.mmr"]
+        select_exprs.extend(f"{get_dimension_table_name(col)}.{col}" if col in DIMENSION_COLUMNS else f"fact.{col}"
+                            for col in segment_columns)
+        rowid_expr = "fact.rowid"
+    else:
+        from_str = source_table
+        select_exprs = ["rowid AS sale_id", "saledate", "sellingprice", "mmr", *segment_columns]
+        rowid_expr = "rowid"
+
+    return f"""SELECT {', '.join(select_exprs)}
+        FROM {from_str}
+        WHERE {rowid_expr} > ?"""
+
+
+def parse_sale_timestamps(saledate_values):
+    """
+    Parses saledate values stored either as car_prices text or as epoch seconds.
+
+    Args:
+        saledate_values (array-like): Raw saledate column; ETL_SCHEMA_INFERENCE loads
+            store epoch-second integers, other loads the original strings.
+
+    Returns:
+        pandas.Series: datetime64 values, NaT where unparseable.
+    """
+    saledate_series = pd.Series(saledate_values)
+    epoch_seconds = pd.to_numeric(saledate_series, errors = 'coerce')
+
+    timestamps = pd.to_datetime(epoch_seconds, unit = 's', errors = 'coerce')
+    text_mask = epoch_seconds.isna() & saledate_series.notna()
+    if text_mask.any():
+        timestamps[text_mask] = parse_saledate(saledate_series[text_mask])
+
+    return timestamps
+
+
+def get_period_starts(timestamps, period_type):
+    """
+    Returns the first day of each timestamp's calendar month or Monday-based week.
+    """
+    if period_type == 'month':
+        return timestamps.dt.to_period('M').dt.start_time
+
+    days = timestamps.dt.normalize()
+
+    return days - pd.to_timedelta(days.dt.weekday, unit = 'D')
+
+
+def shift_period_starts(period_starts, period_type, steps):
+    """
+    Moves period start dates forward by a number of months or weeks.
+    """
+    if period_type == 'month':
+        return (period_starts.dt.to_period('M') + steps).dt.start_time
+
+    return period_starts + pd.Timedelta(weeks = steps)
+
+
+def get_price_buckets(prices):
+    """
+    Returns the log-scale histogram bucket of each selling price.
+    """
+    return np.floor(np.log2(prices) * PRICE_BUCKETS_PER_DOUBLING).astype('int64')
+
+
+def get_histogram_medians(histogram_df, group_columns):
+    """
+    Reads per-group median prices off price histograms.
+
+    Args:
+        histogram_df (pandas.DataFrame): group_columns, price_bucket and sales_count.
+        group_columns (list): Columns identifying one histogram.
+
+    Returns:
+        pandas.DataFrame: group_columns and median_price, interpolated (on the log
+            scale) within the bucket holding each group's middle sale.
+    """
+    histogram_df = histogram_df.sort_values([*group_columns, 'price_bucket'])
+    grouped_counts = histogram_df.groupby(group_columns, sort = False)['sales_count']
+
+    histogram_df = histogram_df.assign(cumulative_count = grouped_counts.cumsum(),
+                                       half_count = grouped_counts.transform('sum') / 2)
+    medians_df = histogram_df[histogram_df['cumulative_count'] >= histogram_df['half_count']].groupby(group_columns,
+                                                                                                     as_index = False,
+                                                                                                     sort = False).first()
+    bucket_fraction = ((medians_df['half_count'] - (medians_df['cumulative_count'] - medians_df['sales_count'])) /
+                       medians_df['sales_count'])
+    medians_df['median_price'] = 2 ** ((medians_df['price_bucket'] + bucket_fraction) / PRICE_BUCKETS_PER_DOUBLING)
+
+    return medians_df[[*group_columns, 'median_price']]
+
+
+def get_index_deltas(sales_df):
+    """
+    Aggregates newly added sales into per-period, per-segment sums and price histograms.
+
+    Args:
+        sales_df (pandas.DataFrame): Output of get_new_sales_query().
+
+    Returns:
+        tuple: (sums DataFrame with KEY_COLUMNS and SUM_COLUMNS, histogram DataFrame
+            with KEY_COLUMNS, price_bucket and sales_count). Sales without a parseable
+            sale date or a positive selling price are left out.
+    """
+    timestamps = parse_sale_timestamps(saledate_values = sales_df['saledate'].to_numpy())
+    prices = sales_df['sellingprice'].to_numpy(dtype = 'float64')
+    mmr = sales_df['mmr'].to_numpy(dtype = 'float64')
+
+    valid_mask = (timestamps.notna() & (prices > 0)).to_numpy()
+    matched_mask = valid_mask & (mmr > 0)
+
+    base_df = pd.DataFrame({'sales_count'              : 1,
+                            'sellingprice_sum'         : prices,
+                            'matched_sellingprice_sum' : np.where(matched_mask, prices, 0.0),
+                            'mmr_sum'                  : np.where(matched_mask, mmr, 0.0),
+                            'price_bucket'             : get_price_buckets(np.where(valid_mask, prices, 1.0))})[valid_mask]
+    timestamps = timestamps[valid_mask].reset_index(drop = True)
+    base_df = base_df.reset_index(drop = True)
+
+    sums_dfs = []
+    histogram_dfs = []
+    for period_type in PERIOD_TYPES:
+        period_starts = get_period_starts(timestamps = timestamps, period_type = period_type).dt.strftime('%Y-%m-%d')
+        for segment_type, segment_column in INDEX_SEGMENTS.items():
+            if segment_column is None:
+                segments = 'all'
+            else:
+                segments = (sales_df[segment_column].astype(object)[valid_mask].reset_index(drop = True)
+                                                    .fillna('').astype(str).str.strip().str.lower())
+            keyed_df = base_df.assign(period_type = period_type,
+                                      period_start = period_starts,
+                                      segment_type = segment_type,
+                                      segment = segments)
+
+            sums_dfs.append(keyed_df.groupby(KEY_COLUMNS, as_index = False)[SUM_COLUMNS].sum())
+            histogram_dfs.append(keyed_df.groupby([*KEY_COLUMNS, 'price_bucket'], as_index = False)['sales_count'].sum())
+
+    return pd.concat(sums_dfs, ignore_index = True), pd.concat(histogram_dfs, ignore_index = True)
+
+
+def get_touched_periods_filter(touched_periods):
+    """
+    Returns a WHERE clause and params selecting a list of (period_type, period_start) pairs.
+    """
+    conditions = " OR ".join("(period_type = ? AND period_start = ?)" for _ in touched_periods)
+    params = tuple(value for period in touched_periods for value in period)
+
+    return f"WHERE {conditions}", params
+
+
+def read_frame(conn, query, params = ()):
+    """
+    Runs a query on an open connection and returns the result as a DataFrame.
+
+    Unlike SQLiteDataObject.query_from_database(), this does not commit, so it can read
+    a transaction's own uncommitted writes without ending the transaction.
+    """
+    cursor = conn.execute(query, params)
+
+    return pd.DataFrame(data = cursor.fetchall(),
+                        columns = [_description[0] for _description in cursor.description])
+
+
+def clear_price_indices(conn, source_table):
+    """
+    Deletes every index row and a source's last_sale_id, ahead of a full rebuild.
+    """
+    for table_name in [PRICE_INDEX_TABLE, PRICE_HISTOGRAM_TABLE, PRICE_ROLLING_TABLE]:
+        conn.execute(f"DELETE FROM {table_name}")
+    conn.execute(f"DELETE FROM {PRICE_INDEX_STATE_TABLE} WHERE source_name = ?", (source_table,))
+
+
+def get_rolling_rows(conn, period_type, touched_starts):
+    """
+    Recomputes the rolling windows that include any touched period.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database holding the price index
+            tables, e.g. inside the transaction that updated them.
+        period_type (str): 'month' or 'week'.
+        touched_starts (list): Period start dates ('YYYY-MM-DD') that received sales.
+
+    Returns:
+        pandas.DataFrame: PRICE_ROLLING_TABLE rows for every window ending within
+            ROLLING_WINDOWS[period_type] - 1 periods after a touched period, up to the
+            latest indexed period.
+    """
+    window = ROLLING_WINDOWS[period_type]
+    touched_series = pd.to_datetime(pd.Series(sorted(touched_starts)))
+
+    latest_start = read_frame(conn = conn,
+                              query = f"SELECT MAX(period_start) AS latest FROM {PRICE_INDEX_TABLE} WHERE period_type = ?",
+                              params = (period_type,))['latest'].iloc[0]
+    window_ends = pd.concat([shift_period_starts(period_starts = touched_series, period_type = period_type, steps = steps)
+                             for steps in range(window)])
+    window_ends = set(window_ends[window_ends <= pd.Timestamp(latest_start)].dt.strftime('%Y-%m-%d'))
+    if not window_ends:
+        return pd.DataFrame()
+
+    first_start = shift_period_starts(period_starts = touched_series.iloc[:1], period_type = period_type, steps = 1 - window).dt.strftime('%Y-%m-%d').iloc[0]
+    last_start = max(window_ends)
+    range_params = (period_type, first_start, last_start)
+
+    sums_df = read_frame(conn = conn,
+                         query = f"""SELECT {', '.join(KEY_COLUMNS)}, {', '.join(SUM_COLUMNS)}
+                                     FROM {PRICE_INDEX_TABLE}
+                                     WHERE period_type = ? AND period_start BETWEEN ? AND ?""",
+                         params = range_params)
+    histogram_df = read_frame(conn = conn,
+                              query = f"""SELECT {', '.join(KEY_COLUMNS)}, price_bucket, sales_count
+                                          FROM {PRICE_HISTOGRAM_TABLE}
+                                          WHERE period_type = ? AND period_start BETWEEN ? AND ?""",
+                              params = range_params)
+
+    # Each period contributes to the windows ending 0 .. window - 1 periods later
+    def spread_to_windows(df):
+        period_starts = pd.to_datetime(df['period_start'])
+        return pd.concat([df.assign(period_start = shift_period_starts(period_starts = period_starts,
+                                                                       period_type = period_type,
+                                                                       steps = steps).dt.strftime('%Y-%m-%d'))
+                          for steps in range(window)], ignore_index = True)
+
+    window_sums_df = spread_to_windows(sums_df)
+    window_sums_df = window_sums_df[window_sums_df['period_start'].isin(window_ends)]
+    window_sums_df = window_sums_df.groupby(KEY_COLUMNS, as_index = False)[SUM_COLUMNS].sum()
+
+    window_histogram_df = spread_to_windows(histogram_df)
+    window_histogram_df = window_histogram_df[window_histogram_df['period_start'].isin(window_ends)]
+    window_histogram_df = window_histogram_df.groupby([*KEY_COLUMNS, 'price_bucket'], as_index = False)['sales_count'].sum()
+
+    rolling_df = window_sums_df.merge(get_histogram_medians(histogram_df = window_histogram_df, group_columns = KEY_COLUMNS),
+                                      on = KEY_COLUMNS,
+                                      how = 'left')
+    rolling_df['window_periods'] = window
+    rolling_df['mean_price'] = rolling_df['sellingprice_sum'] / rolling_df['sales_count']
+    rolling_df['price_to_mmr'] = rolling_df['matched_sellingprice_sum'] / rolling_df['mmr_sum'].replace(0, np.nan)
+
+    return rolling_df[[*KEY_COLUMNS, 'window_periods', 'sales_count', *INDEX_COLUMNS]]
+
+
+def update_price_indices(sqlite_object, source_table = 'vehicle_sales_data', full = False):
+    """
+    Adds sales loaded since the last run to the monthly and weekly price indices.
+
+    For every period and segment the index keeps the sales count, price sums and a
+    log-scale price histogram. New sales are parsed once, aggregated and added to the
+    stored sums, after which the mean and median prices, the sellingprice / mmr ratio and
+    the rolling windows are recomputed for the touched periods only.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database holding the sales and index tables.
+        source_table (str, optional): Sales table, or VIEW_NAME when the ETL runs
+            normalized. Defaults to 'vehicle_sales_data'.
+        full (bool, optional): Drop the index and rebuild it from every sale.
+            Defaults to False.
+
+    Returns:
+        int: The number of sales added to the index.
+
+    Notes:
+        - The added sums, the recomputed index values and rolling windows and the new
+          last_sale_id are written in one transaction, so a failed run leaves the
+          index as it was and the next run adds the same sales exactly once
+        - New sales are found by rowid, which upserts keep; a sale whose mmr changes in
+          an upsert keeps its old contribution until the next full rebuild
+        - price_to_mmr is the summed selling price over the summed mmr of sales that
+          have an mmr, which is less sensitive to outliers than a mean of ratios
+    """
+    sqlite_object.execute_sqlite_commands(commands = CREATE_TABLE_COMMANDS)
+
+    last_sale_id = 0
+    if not full:
+        state_df = sqlite_object.query_from_database(query = f"SELECT last_sale_id FROM {PRICE_INDEX_STATE_TABLE} WHERE source_name = ?",
+                                                     params = (source_table,))
+        last_sale_id = int(state_df['last_sale_id'].iloc[0]) if not state_df.empty else 0
+
+    with track_stage("update price indices") as stage_stats:
+        sales_df = sqlite_object.query_to_columns(query = get_new_sales_query(source_table = source_table),
+                                                  params = (last_sale_id,),
+                                                  dtypes = {'sale_id'      : 'int64',
+                                                            'sellingprice' : 'float64',
+                                                            'mmr'          : 'float64'})
+        stage_stats['rows'] = len(sales_df)
+        if sales_df.empty:
+            if full:
+                with sqlite_object.get_sqlite_conn() as conn:
+                    clear_price_indices(conn = conn, source_table = source_table)
+            return 0
+
+        sums_df, histogram_df = get_index_deltas(sales_df = sales_df)
+        touched_periods = sorted(set(zip(sums_df['period_type'], sums_df['period_start'])))
+
+        key_placeholders = ', '.join('?' * len(KEY_COLUMNS))
+        with sqlite_object.get_sqlite_conn() as conn:
+            if full:
+                clear_price_indices(conn = conn, source_table = source_table)
+
+            conn.executemany(f"""INSERT INTO {PRICE_INDEX_TABLE} ({', '.join(KEY_COLUMNS)}, {', '.join(SUM_COLUMNS)})
+                                 VALUES ({key_placeholders}, {', '.join('?' * len(SUM_COLUMNS))})
+                                 ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET
+                                 {', '.join(f"{col} = {col} + excluded.{col}" for col in SUM_COLUMNS)}""",
+                             sums_df[KEY_COLUMNS + SUM_COLUMNS].itertuples(index = False, name = None))
+            conn.executemany(f"""INSERT INTO {PRICE_HISTOGRAM_TABLE} ({', '.join(KEY_COLUMNS)}, price_bucket, sales_count)
+                                 VALUES ({key_placeholders}, ?, ?)
+                                 ON CONFLICT ({', '.join(KEY_COLUMNS)}, price_bucket) DO UPDATE SET
+                                 sales_count = sales_count + excluded.sales_count""",
+                             histogram_df[[*KEY_COLUMNS, 'price_bucket', 'sales_count']].itertuples(index = False, name = None))
+
+            # Index values of the touched periods, from their merged sums and histograms
+            for chunk_start in range(0, len(touched_periods), 200):
+                where_str, params = get_touched_periods_filter(touched_periods = touched_periods[chunk_start:chunk_start + 200])
+                medians_df = get_histogram_medians(histogram_df = read_frame(conn = conn,
+                                                                             query = f"""SELECT {', '.join(KEY_COLUMNS)}, price_bucket, sales_count
+                                                                                         FROM {PRICE_HISTOGRAM_TABLE} {where_str}""",
+                                                                             params = params),
+                                                   group_columns = KEY_COLUMNS)
+                conn.executemany(f"""UPDATE {PRICE_INDEX_TABLE} SET
+                                     median_price = ?,
+                                     mean_price = sellingprice_sum / sales_count,
+                                     price_to_mmr = matched_sellingprice_sum / NULLIF(mmr_sum, 0)
+                                     WHERE {' AND '.join(f"{col} = ?" for col in KEY_COLUMNS)}""",
+                                 medians_df[['median_price', *KEY_COLUMNS]].itertuples(index = False, name = None))
+
+            rolling_dfs = [get_rolling_rows(conn = conn,
+                                            period_type = period_type,
+                                            touched_starts = [period_start for touched_type, period_start in touched_periods
+                                                              if touched_type == period_type])
+                           for period_type in PERIOD_TYPES
+                           if any(touched_type == period_type for touched_type, _ in touched_periods)]
+            rolling_df = pd.concat(rolling_dfs, ignore_index = True) if rolling_dfs else pd.DataFrame()
+
+            if not rolling_df.empty:
+                conn.executemany(f"INSERT OR REPLACE INTO {PRICE_ROLLING_TABLE} VALUES ({', '.join('?' * len(rolling_df.columns))})",
+                                 rolling_df.astype(object).where(rolling_df.notna(), None).itertuples(index = False, name = None))
+            conn.execute(f"INSERT OR REPLACE INTO {PRICE_INDEX_STATE_TABLE} VALUES (?, ?, datetime('now'))",
+                         (source_table, int(sales_df['sale_id'].max())))
+
+    return len(sales_df)
@@ -0,0 +1,398 @@
+import os
+import json
+import math
+import functools
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils.data_transfer import track_stage
+
+# Segment levels tried in order when estimating a price; a vehicle falls back to the
+# next, coarser level when its segment had fewer than min_segment_count sales
+SEGMENT_LEVELS = [['make', 'model', 'year'],
+                  ['make', 'year'],
+                  ['year']]
+
+TEXT_KEY_COLUMNS = ['make', 'model', 'state']
+
+TRAINING_COLUMNS = ['make', 'model', 'year', 'condition', 'odometer', 'state', 'sellingprice']
+
+MODEL_FILE_NAME = 'price_model.npz'
+
+# Odometer deviations are scaled to 10,000-mile units before fitting
+ODOMETER_SCALE = 10000.0
+
+
+def get_default_model_path(sqlite_object):
+    """
+    Returns the default price model path, kept next to the SQLite database.
+    """
+    return os.path.join(sqlite_object.base_dir, MODEL_FILE_NAME)
+
+
+def normalize_key_text(values):
+    """
+    Trims and lowercases text key values so 'Ford ' and 'ford' share a segment.
+
+    Args:
+        values (array-like): Text values; missing values become ''.
+
+    Returns:
+        pandas.Series: The normalized strings.
+    """
+    return pd.Series(values, dtype = object).fillna('').astype(str).str.strip().str.lower()
+
+
+def normalize_condition(condition):
+    """
+    Puts condition scores on car_prices' 10-50 scale.
+
+    Part of car_prices grades condition from 1.0 to 5.0 and the rest from 10 to 49,
+    so scores of 5 or below are multiplied by 10.
+
+    Args:
+        condition (array-like): Raw condition scores.
+
+    Returns:
+        numpy.ndarray: float64 scores, NaN where missing.
+    """
+    condition = np.asarray(condition, dtype = 'float64')
+
+    return np.where(condition <= 5, condition * 10, condition)
+
+
+def get_segment_keys(key_frame, level_columns):
+    """
+    Builds one string key per row for a segment level, e.g. 'ford|f-150|2012'.
+
+    Args:
+        key_frame (pandas.DataFrame): Normalized key columns.
+        level_columns (list): Columns of the segment level.
+
+    Returns:
+        numpy.ndarray: Keys as a unicode array.
+    """
+    key_series = key_frame[level_columns[0]].astype(str)
+    for col in level_columns[1:]:
+        key_series = key_series + '|' + key_frame[col].astype(str)
+
+    return key_series.to_numpy(dtype = str)
+
+
+def get_key_frame(make, model, year, state = None):
+    """
+    Returns the normalized segment key columns for a batch of vehicles.
+    """
+    years = pd.Series(np.asarray(year, dtype = 'float64'))
+
+    return pd.DataFrame({'make'  : normalize_key_text(make),
+                         'model' : normalize_key_text(model),
+                         'year'  : years.fillna(-1).astype('int64').astype(str),
+                         'state' : normalize_key_text(state if state is not None else [None] * len(years))})
+
+
+def train_price_model(sales_df, min_segment_count = 5, state_shrinkage = 50, max_training_rows = 2000000, seed = 0):
+    """
+    Fits the segment statistics and residual regression of a price model.
+
+    The estimate is built in log-price space:
+        log(price) = segment mean log price
+                     + b . [odometer deviation, its square, condition deviation, its square]
+                     + state offset
+    where the deviations are taken from the segment's mean odometer and condition, so
+    a vehicle with more miles or a worse grade than is typical for its make, model
+    and year is priced below its segment.
+
+    Args:
+        sales_df (pandas.DataFrame): Sales with TRAINING_COLUMNS.
+        min_segment_count (int, optional): Sales a segment needs to be kept. Defaults to 5.
+        state_shrinkage (float, optional): Pseudo-count pulling sparse states' offsets
+            towards zero. Defaults to 50.
+        max_training_rows (int, optional): Rows sampled for the regression fit.
+            Defaults to 2,000,000.
+        seed (int, optional): Sampling seed. Defaults to 0.
+
+    Returns:
+        dict: Model arrays, as stored by save_price_model().
+    """
+    prices = sales_df['sellingprice'].to_numpy(dtype = 'float64')
+    valid_mask = np.isfinite(prices) & (prices > 0) & sales_df['year'].notna().to_numpy()
+    sales_df = sales_df.loc[valid_mask]
+
+    key_frame = get_key_frame(make = sales_df['make'].to_numpy(),
+                              model = sales_df['model'].to_numpy(),
+                              year = sales_df['year'].to_numpy(),
+                              state = sales_df['state'].to_numpy())
+    log_prices = np.log(sales_df['sellingprice'].to_numpy(dtype = 'float64'))
+    odometer = sales_df['odometer'].to_numpy(dtype = 'float64')
+    condition = normalize_condition(sales_df['condition'].to_numpy())
+
+    model_arrays = {'global_stats' : np.array([log_prices.mean(), np.nanmean(odometer), np.nanmean(condition)])}
+
+    segment_stats = []
+    for level_index, level_columns in enumerate(SEGMENT_LEVELS):
+        level_df = pd.DataFrame({'key'       : get_segment_keys(key_frame = key_frame, level_columns = level_columns),
+                                 'log_price' : log_prices,
+                                 'odometer'  : odometer,
+                                 'condition' : condition})
+        level_stats = level_df.groupby('key').agg(count = ('log_price', 'size'),
+                                                  log_price = ('log_price', 'mean'),
+                                                  odometer = ('odometer', 'mean'),
+                                                  condition = ('condition', 'mean'))
+        level_stats = level_stats[level_stats['count'] >= min_segment_count]
+
+        model_arrays[f"level{level_index}_keys"] = level_stats.index.to_numpy(dtype = str)
+        model_arrays[f"level{level_index}_stats"] = level_stats[['log_price', 'odometer', 'condition']].to_numpy(dtype = 'float64')
+        segment_stats.append(level_stats)
+
+    baseline = PriceModel(model_arrays = {**model_arrays,
+                                          'coefficients'  : np.zeros(4),
+                                          'state_keys'    : np.array([], dtype = str),
+                                          'state_offsets' : np.array([], dtype = 'float64'),
+                                          'metadata'      : np.array('{}')})
+    segment_values = baseline.get_segment_values(key_frame = key_frame)
+    features = baseline.get_features(segment_values = segment_values,
+                                     odometer = odometer,
+                                     condition = condition)
+    residuals = log_prices - segment_values[:, 0]
+
+    rng = np.random.default_rng(seed)
+    fit_rows = np.arange(len(residuals))
+    if len(fit_rows) > max_training_rows:
+        fit_rows = rng.choice(fit_rows, size = max_training_rows, replace = False)
+    coefficients = np.linalg.lstsq(features[fit_rows], residuals[fit_rows], rcond = None)[0]
+
+    state_residuals = pd.DataFrame({'state'    : key_frame['state'].to_numpy(),
+                                    'residual' : residuals - features @ coefficients})
+    state_stats = state_residuals.groupby('state')['residual'].agg(['sum', 'size'])
+
+    model_arrays['coefficients']  = coefficients
+    model_arrays['state_keys']    = state_stats.index.to_numpy(dtype = str)
+    model_arrays['state_offsets'] = (state_stats['sum'] / (state_stats['size'] + state_shrinkage)).to_numpy(dtype = 'float64')
+    model_arrays['metadata']      = np.array(json.dumps({'trained_at'        : datetime.now(timezone.utc).isoformat(),
+                                                         'training_rows'     : int(len(log_prices)),
+                                                         'min_segment_count' : min_segment_count,
+                                                         'segment_counts'    : [int(len(level_stats)) for level_stats in segment_stats],
+                                                         'residual_std'      : float(np.std(state_residuals['residual']))}))
+
+    return model_arrays
+
+
+def save_price_model(model_arrays, model_path):
+    """
+    Writes model arrays to a compressed .npz file, replacing any previous model atomically.
+    """
+    temp_path = f"{model_path}.tmp.npz"
+    np.savez_compressed(temp_path, **model_arrays)
+    os.replace(temp_path, model_path)
+
+
+def train_price_model_from_database(sqlite_object,
+                                    model_path = None,
+                                    source_table = 'vehicle_sales_data',
+                                    **train_kwargs):
+    """
+    Trains the price model on a sales table and saves it next to the database.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database holding the sales table.
+        model_path (str, optional): Artifact path. Defaults to get_default_model_path().
+        source_table (str, optional): Sales table or view. Defaults to 'vehicle_sales_data'.
+        **train_kwargs: Passed to train_price_model().
+
+    Returns:
+        str: The artifact path.
+    """
+    model_path = model_path or get_default_model_path(sqlite_object = sqlite_object)
+
+    with track_stage("train price model") as stage_stats:
+        sales_df = sqlite_object.query_to_columns(query = f"SELECT {', '.join(TRAINING_COLUMNS)} FROM {source_table}",
+                                                  dtypes = {'year'         : 'float64',
+                                                            'condition'    : 'float64',
+                                                            'odometer'     : 'float64',
+                                                            'sellingprice' : 'float64'},
+                                                  categorical_columns = TEXT_KEY_COLUMNS)
+        save_price_model(model_arrays = train_price_model(sales_df = sales_df, **train_kwargs),
+                         model_path = model_path)
+        stage_stats['rows'] = len(sales_df)
+
+    return model_path
+
+
+class PriceModel:
+    """
+    Estimates selling prices from make, model, year, condition, odometer and state.
+
+    Use load_price_model() to get the process-wide instance for an artifact.
+
+    Attributes:
+        metadata (dict): Training time, row count, segment counts and residual spread.
+    """
+
+    def __init__(self, model_arrays):
+        """
+        Initializes a model from the arrays produced by train_price_model().
+        """
+        self.metadata = json.loads(str(model_arrays['metadata']))
+
+        self._global_stats  = np.asarray(model_arrays['global_stats'], dtype = 'float64')
+        self._coefficients  = np.asarray(model_arrays['coefficients'], dtype = 'float64')
+        self._level_indexes = [pd.Index(model_arrays[f"level{level_index}_keys"])
+                               for level_index in range(len(SEGMENT_LEVELS))]
+        self._level_stats   = [np.asarray(model_arrays[f"level{level_index}_stats"], dtype = 'float64')
+                               for level_index in range(len(SEGMENT_LEVELS))]
+        self._state_index   = pd.Index(model_arrays['state_keys'])
+        self._state_offsets = np.asarray(model_arrays['state_offsets'], dtype = 'float64')
+
+        # Plain dicts for the scalar path of estimate_price()
+        self._level_dicts = [dict(zip(level_index, level_stats))
+                             for level_index, level_stats in zip(self._level_indexes, self._level_stats)]
+        self._state_dict  = dict(zip(self._state_index, self._state_offsets))
+
+    def get_segment_values(self, key_frame):
+        """
+        Returns each vehicle's segment mean log price, odometer and condition.
+
+        Returns:
+            numpy.ndarray: (n, 3) array from the finest segment level that knows the
+                vehicle, or the global means.
+        """
+        segment_values = np.tile(self._global_stats, (len(key_frame), 1))
+        unresolved_mask = np.ones(len(key_frame), dtype = bool)
+
+        for level_columns, level_index, level_stats in zip(SEGMENT_LEVELS, self._level_indexes, self._level_stats):
+            if not unresolved_mask.any():
+                break
+            positions = level_index.get_indexer(get_segment_keys(key_frame = key_frame, level_columns = level_columns))
+            found_mask = unresolved_mask & (positions >= 0)
+            segment_values[found_mask] = level_stats[positions[found_mask]]
+            unresolved_mask &= ~found_mask
+
+        return segment_values
+
+    def get_features(self, segment_values, odometer, condition):
+        """
+        Returns the regression features; missing odometer or condition adds no adjustment.
+        """
+        odometer_deviation = np.nan_to_num((np.asarray(odometer, dtype = 'float64') - segment_values[:, 1]) / ODOMETER_SCALE)
+        condition_deviation = np.nan_to_num(np.asarray(condition, dtype = 'float64') - segment_values[:, 2])
+
+        return np.column_stack([odometer_deviation,
+                                odometer_deviation ** 2,
+                                condition_deviation,
+                                condition_deviation ** 2])
+
+    def predict(self, make, model, year, condition = None, odometer = None, state = None):
+        """
+        Estimates selling prices for a batch of vehicles.
+
+        Args:
+            make (array-like): Makes.
+            model (array-like): Models.
+            year (array-like): Model years.
+            condition (array-like, optional): Condition scores on either car_prices scale.
+                Defaults to None (segment average).
+            odometer (array-like, optional): Odometer readings. Defaults to None
+                (segment average).
+            state (array-like, optional): Two-letter states. Defaults to None (no
+                state adjustment).
+
+        Returns:
+            numpy.ndarray: Estimated selling prices, one per vehicle.
+        """
+        key_frame = get_key_frame(make = make, model = model, year = year, state = state)
+        n_rows = len(key_frame)
+
+        condition = normalize_condition(condition if condition is not None else np.full(n_rows, np.nan))
+        odometer = odometer if odometer is not None else np.full(n_rows, np.nan)
+
+        segment_values = self.get_segment_values(key_frame = key_frame)
+        log_prices = (segment_values[:, 0] +
+                      self.get_features(segment_values = segment_values,
+                                        odometer = odometer,
+                                        condition = condition) @ self._coefficients)
+
+        state_positions = self._state_index.get_indexer(key_frame['state'].to_numpy())
+        log_prices += np.where(state_positions >= 0, self._state_offsets[state_positions], 0.0)
+
+        return np.exp(log_prices)
+
+    def predict_frame(self, df):
+        """
+        Estimates selling prices for a DataFrame with make, model, year and optionally
+        condition, odometer and state columns.
+
+        Returns:
+            numpy.ndarray: Estimated selling prices, in row order.
+        """
+        return self.predict(make = df['make'].to_numpy(),
+                            model = df['model'].to_numpy(),
+                            year = df['year'].to_numpy(),
+                            condition = df['condition'].to_numpy() if 'condition' in df else None,
+                            odometer = df['odometer'].to_numpy() if 'odometer' in df else None,
+                            state = df['state'].to_numpy() if 'state' in df else None)
+
+    def estimate_price(self, make, model, year, condition = None, odometer = None, state = None):
+        """
+        Estimates the selling price of a single vehicle with plain dict lookups.
+
+        Gives the same result as predict() for one vehicle without building arrays,
+        for interactive lookups.
+
+        Returns:
+            float: The estimated selling price.
+        """
+        key_values = {'make'  : str(make or '').strip().lower(),
+                      'model' : str(model or '').strip().lower(),
+                      'year'  : str(int(year)) if year is not None else '-1'}
+
+        segment_values = self._global_stats
+        for level_columns, level_dict in zip(SEGMENT_LEVELS, self._level_dicts):
+            level_values = level_dict.get('|'.join(key_values[col] for col in level_columns))
+            if level_values is not None:
+                segment_values = level_values
+                break
+
+        odometer_deviation = 0.0 if odometer is None or math.isnan(odometer) else (odometer - segment_values[1]) / ODOMETER_SCALE
+        condition_deviation = 0.0
+        if condition is not None and not math.isnan(condition):
+            condition_deviation = (condition * 10 if condition <= 5 else condition) - segment_values[2]
+        if math.isnan(odometer_deviation):
+            odometer_deviation = 0.0
+        if math.isnan(condition_deviation):
+            condition_deviation = 0.0
+
+        b = self._coefficients
+        log_price = (segment_values[0] +
+                     b[0] * odometer_deviation + b[1] * odometer_deviation ** 2 +
+                     b[2] * condition_deviation + b[3] * condition_deviation ** 2 +
+                     self._state_dict.get(str(state or '').strip().lower(), 0.0))
+
+        return math.exp(log_price)
+
+
+@functools.lru_cache(maxsize = 4)
+def _load_price_model(model_path, mtime_ns):
+    with np.load(model_path, allow_pickle = False) as model_file:
+        return PriceModel(model_arrays = {name : model_file[name] for name in model_file.files})
+
+
+def load_price_model(model_path):
+    """
+    Returns the price model stored at a path, loading it at most once per process.
+
+    The cached model is replaced when the artifact's modification time changes, so a
+    long-running dashboard picks up the model retrained by the next ETL run.
+
+    Args:
+        model_path (str): Artifact path, e.g. get_default_model_path(sqlite_object).
+
+    Returns:
+        PriceModel: The loaded model.
+
+    Raises:
+        FileNotFoundError: If the model has not been trained yet.
+    """
+    return _load_price_model(model_path, os.stat(model_path).st_mtime_ns)
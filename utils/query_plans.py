@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import string
+
+from utils.data_transfer import import_sql_script, SQLiteDataObject
+
+# Small reference tables where a full scan is cheaper than any index lookup
+FULL_SCAN_ALLOWED_TABLES = {'ford_stock_data',
+                            'auto_sales_comparison',
+                            'sales_summary_year'}
+
+# Matches plan steps that read a whole table without an index, e.g. 'SCAN vehicle_sales_data'
+# ('SCAN TABLE vehicle_sales_data' on SQLite releases before 3.36)
+FULL_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+# Values filled into templated scripts, e.g. FROM {sales_source} in scatter_points_query.sql,
+# when they are checked; the dashboard fills in the table or view it actually reads
+SQL_TEMPLATE_DEFAULTS = {'sales_source' : 'vehicle_sales_data'}
+
+# String literals, quoted identifiers and comments, which may contain '?' that is not a placeholder
+SQL_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def get_placeholder_count(query):
+    """
+    Counts the positional '?' placeholders of a query, ignoring literals and comments.
+    """
+    return SQL_LITERAL_PATTERN.sub('', query).count('?')
+
+
+def get_query_plan(sqlite_object, query, params = None):
+    """
+    Returns the EXPLAIN QUERY PLAN output for a query.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database the query runs against.
+        query (str): SQL query string to explain.
+        params (tuple, optional): Values bound to the query's '?' placeholders.
+            Defaults to None, which binds NULL to each one; the plan does not
+            depend on the bound values.
+
+    Returns:
+        list: The 'detail' text of each plan step, in plan order.
+
+    Raises:
+        sqlite3.Error: If the query cannot be prepared, e.g. a referenced table is missing.
+    """
+    if params is None:
+        params = (None,) * get_placeholder_count(query = query)
+
+    plan_df = sqlite_object.query_from_database(query = f"EXPLAIN QUERY PLAN {query.strip().rstrip(';')}",
+                                                params = params)
+
+    return plan_df['detail'].tolist()
+
+
+def get_full_scan_tables(plan_details, allowed_tables = FULL_SCAN_ALLOWED_TABLES):
+    """
+    Lists the tables a query plan reads in full without using an index.
+
+    Args:
+        plan_details (list): Plan step details as returned by get_query_plan().
+        allowed_tables (set, optional): Tables whose full scans are acceptable.
+            Defaults to FULL_SCAN_ALLOWED_TABLES.
+
+    Returns:
+        list: Names of the fully scanned tables not in allowed_tables.
+
+    Notes:
+        - 'SCAN <table> USING [COVERING] INDEX' steps are not reported; they read
+          an index in key order rather than the table itself
+    """
+    full_scan_tables = []
+    for detail in plan_details:
+        full_scan_match = FULL_SCAN_PATTERN.match(detail)
+        if full_scan_match and full_scan_match.group(1) not in allowed_tables:
+            full_scan_tables.append(full_scan_match.group(1))
+
+    return full_scan_tables
+
+
+def fill_sql_template(query, template_values = SQL_TEMPLATE_DEFAULTS):
+    """
+    Fills the {name} fields of a templated SQL script; scripts without fields are returned unchanged.
+    """
+    field_names = [field_name for _, field_name, _, _ in string.Formatter().parse(query) if field_name]
+    if not field_names:
+        return query
+
+    return query.format(**template_values)
+
+
+def check_sql_scripts(sqlite_object, sql_dir = 'sql_scripts', allowed_tables = FULL_SCAN_ALLOWED_TABLES):
+    """
+    Runs EXPLAIN QUERY PLAN on every .sql file in a directory and collects full scans.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database the queries run against.
+        sql_dir (str, optional): Directory holding the SQL scripts. Defaults to 'sql_scripts'.
+        allowed_tables (set, optional): Tables whose full scans are acceptable.
+            Defaults to FULL_SCAN_ALLOWED_TABLES.
+
+    Returns:
+        dict: Mapping of script file name to a list of problems; empty when every
+            script uses indexes for its non-allowed tables.
+
+    Notes:
+        - Templated scripts are checked with SQL_TEMPLATE_DEFAULTS filled in, and '?'
+          placeholders are bound to NULL
+    """
+    failures = {}
+    for file_name in sorted(os.listdir(sql_dir)):
+        if not file_name.endswith('.sql'):
+            continue
+
+        query = import_sql_script(sql_script_path = os.path.join(sql_dir, file_name))
+        try:
+            query = fill_sql_template(query = query)
+            plan_details = get_query_plan(sqlite_object = sqlite_object,
+                                          query = query)
+        except Exception as error:
+            failures[file_name] = [f"could not explain query: {error}"]
+            continue
+
+        full_scan_tables = get_full_scan_tables(plan_details = plan_details,
+                                                allowed_tables = allowed_tables)
+        if full_scan_tables:
+            failures[file_name] = [f"full scan of {table_name}" for table_name in full_scan_tables]
+
+    return failures
+
+
+if __name__ == '__main__':
+    sql_dir = sys.argv[1] if len(sys.argv) > 1 else 'sql_scripts'
+
+    failures = check_sql_scripts(sqlite_object = SQLiteDataObject(database_name = "tool_data"),
+                                 sql_dir = sql_dir)
+
+    for file_name, problems in failures.items():
+        for problem in problems:
+            print(f"{file_name}: {problem}")
+
+    if failures:
+        sys.exit(1)
+
+    print(f"All queries in {sql_dir} use indexes")
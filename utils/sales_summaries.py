@@ -0,0 +1,136 @@
+from utils.data_transfer import track_stage, AGGREGATE_EXPRESSIONS
+
+# Summary tables maintained from vehicle_sales_data, keyed by their group-by columns
+SUMMARY_TABLES = {'sales_summary_year'           : ['year'],
+                  'sales_summary_year_make'      : ['year', 'make'],
+                  'sales_summary_year_state'     : ['year', 'state'],
+                  'sales_summary_year_condition' : ['year', 'condition_bucket']}
+
+# Numeric vehicle_sales_data columns aggregated into <col>_sum, <col>_count and <col>_mean
+SUMMARY_MEASURES = ['sellingprice', 'mmr', 'odometer', 'condition']
+
+# Group-by columns that are derived from vehicle_sales_data rather than read directly;
+# sales_summary_year_condition uses CONDITION_BUCKET_WIDTH bands (10-19, 20-29, ...) of
+# conditions on the 10-50 scale
+GROUP_EXPRESSIONS = {'condition_bucket' : AGGREGATE_EXPRESSIONS['condition_bucket']}
+
+GROUP_COLUMN_TYPES = {'year'             : 'int',
+                      'make'             : 'text',
+                      'state'            : 'text',
+                      'condition_bucket' : 'int'}
+
+
+def get_create_summary_table_command(table_name, group_columns):
+    """
+    Generates the CREATE TABLE command for a sales summary table.
+
+    Args:
+        table_name (str): Name of the summary table.
+        group_columns (list): Group-by columns, used as the table's primary key.
+
+    Returns:
+        str: A SQL command string creating the summary table if it does not exist.
+    """
+    column_defs = [f"{col} {GROUP_COLUMN_TYPES[col]}" for col in group_columns]
+    column_defs.append("sales_count int")
+    for measure in SUMMARY_MEASURES:
+        column_defs.extend([f"{measure}_sum float",
+                            f"{measure}_count int",
+                            f"{measure}_mean float"])
+
+    create_table_command = f"""CREATE TABLE IF NOT EXISTS
+        {table_name}({', '.join(column_defs)},
+            PRIMARY KEY ({', '.join(group_columns)}))"""
+
+    return create_table_command
+
+
+def get_refresh_summary_commands(table_name, group_columns, years = None, source_table = 'vehicle_sales_data'):
+    """
+    Generates the commands that recompute a summary table from the raw sales table.
+
+    Args:
+        table_name (str): Name of the summary table.
+        group_columns (list): Group-by columns of the summary table.
+        years (iterable, optional): Model years to recompute. Defaults to None (all years).
+        source_table (str, optional): Raw sales table to aggregate.
+            Defaults to 'vehicle_sales_data'.
+
+    Returns:
+        list: A DELETE command for the affected groups followed by an INSERT ... SELECT
+            that rebuilds them.
+
+    Notes:
+        - Means are sum / count over non-NULL values, matching pandas' mean()
+    """
+    if years is None:
+        year_filter_str = ""
+    else:
+        year_filter_str = f"WHERE year IN ({', '.join(str(int(year)) for year in sorted(years))})"
+
+    select_exprs = [f"{GROUP_EXPRESSIONS.get(col, col)} AS {col}" for col in group_columns]
+    select_exprs.append("COUNT(*)")
+    for measure in SUMMARY_MEASURES:
+        select_exprs.extend([f"SUM({measure})",
+                             f"COUNT({measure})",
+                             f"AVG({measure})"])
+
+    group_by_str = ", ".join(GROUP_EXPRESSIONS.get(col, col) for col in group_columns)
+
+    delete_command = f"DELETE FROM {table_name} {year_filter_str}"
+
+    insert_command = f"""INSERT INTO {table_name}
+        SELECT {', '.join(select_exprs)}
+        FROM {source_table}
+        {year_filter_str}
+        GROUP BY {group_by_str}"""
+
+    return [delete_command, insert_command]
+
+
+def refresh_sales_summaries(sqlite_object, years = None, source_table = 'vehicle_sales_data'):
+    """
+    Creates and refreshes every table in SUMMARY_TABLES.
+
+    Args:
+        sqlite_object (SQLiteDataObject): Database holding the raw and summary tables.
+        years (iterable, optional): Model years touched by the latest load. Only these
+            groups are recomputed. Defaults to None (full rebuild).
+        source_table (str, optional): Raw sales table to aggregate.
+            Defaults to 'vehicle_sales_data'.
+
+    Notes:
+        - A summary table that does not exist yet is always built in full
+        - All tables are refreshed in a single transaction, so readers never see a
+          partially refreshed set of summaries
+        - A row whose year changed in an upsert leaves its old year stale until the
+          next full rebuild
+    """
+    existing_df = sqlite_object.query_from_database(query = "SELECT name FROM sqlite_master WHERE type = 'table'")
+    existing_tables = set(existing_df['name'])
+
+    commands = []
+    for table_name, group_columns in SUMMARY_TABLES.items():
+        if years is None or table_name not in existing_tables:
+            table_years = None
+        elif years:
+            table_years = years
+        else:
+            continue
+
+        commands.append(get_create_summary_table_command(table_name = table_name,
+                                                         group_columns = group_columns))
+        commands.extend(get_refresh_summary_commands(table_name = table_name,
+                                                     group_columns = group_columns,
+                                                     years = table_years,
+                                                     source_table = source_table))
+
+    if not commands:
+        return
+
+    with track_stage("refresh sales summaries") as stage_stats:
+        with sqlite_object.get_sqlite_conn() as conn:
+            for command in commands:
+                cursor = conn.execute(command)
+                if command.lstrip().startswith('INSERT'):
+                    stage_stats['rows'] += cursor.rowcount
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_transfer import get_sql_column_datatypes
+
+# Integer dtypes tried in order when narrowing a column; nullable variants are used
+# when the column holds missing values
+INTEGER_DTYPES = [('int8',  'Int8'),
+                  ('int16', 'Int16'),
+                  ('int32', 'Int32'),
+                  ('int64', 'Int64')]
+
+
+def get_narrowest_integer_dtype(min_value, max_value, nullable = False):
+    """
+    Returns the smallest signed integer dtype that holds a value range.
+
+    Args:
+        min_value (int): Smallest value in the column.
+        max_value (int): Largest value in the column.
+        nullable (bool, optional): Return the pandas nullable variant (e.g. 'Int16').
+            Defaults to False.
+
+    Returns:
+        str: The dtype name.
+    """
+    for numpy_dtype, nullable_dtype in INTEGER_DTYPES:
+        dtype_info = np.iinfo(numpy_dtype)
+        if dtype_info.min <= min_value and max_value <= dtype_info.max:
+            return nullable_dtype if nullable else numpy_dtype
+
+    return 'Int64' if nullable else 'int64'
+
+
+def infer_column_dtype(series, lookup_max_unique = 5000, lookup_max_ratio = 0.5):
+    """
+    Infers the narrowest lossless pandas dtype for a column.
+
+    Args:
+        series (pandas.Series): The column to inspect.
+        lookup_max_unique (int, optional): Maximum distinct values for a text column to
+            count as low-cardinality. Defaults to 5000.
+        lookup_max_ratio (float, optional): Maximum distinct-to-row ratio for a text
+            column to count as low-cardinality. Defaults to 0.5.
+
+    Returns:
+        tuple: (dtype name, lookup candidate flag). Low-cardinality text columns get
+            'category' and are flagged as candidates for lookup tables.
+
+    Notes:
+        - Floats holding only whole numbers become (nullable) integers
+        - Other floats become float32 when that round-trips every value exactly
+    """
+    non_null = series.dropna()
+    kind = series.dtype.kind
+
+    if kind == 'M':
+        return str(series.dtype), False
+
+    if kind in 'iu' and len(non_null):
+        return get_narrowest_integer_dtype(min_value = int(non_null.min()),
+                                           max_value = int(non_null.max()),
+                                           nullable = len(non_null) < len(series)), False
+
+    if kind == 'f' and len(non_null):
+        float_values = non_null.to_numpy(dtype = 'float64')
+        if np.all(np.isfinite(float_values)) and np.all(np.mod(float_values, 1) == 0):
+            return get_narrowest_integer_dtype(min_value = int(float_values.min()),
+                                               max_value = int(float_values.max()),
+                                               nullable = True), False
+        if np.array_equal(float_values.astype('float32').astype('float64'), float_values):
+            return 'float32', False
+        return 'float64', False
+
+    if kind == 'O' or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        unique_count = non_null.nunique()
+        if unique_count <= lookup_max_unique and unique_count <= lookup_max_ratio * len(series):
+            return 'category', True
+        return 'object', False
+
+    return str(series.dtype), False
+
+
+def infer_column_schema(df, date_columns = None, lookup_max_unique = 5000, lookup_max_ratio = 0.5):
+    """
+    Infers pandas and SQLite types for every column of a DataFrame.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        date_columns (dict, optional): Mapping of column name to a parser returning
+            datetime64 values, e.g. {'saledate': parse_saledate}. Defaults to None.
+        lookup_max_unique (int, optional): See infer_column_dtype(). Defaults to 5000.
+        lookup_max_ratio (float, optional): See infer_column_dtype(). Defaults to 0.5.
+
+    Returns:
+        pandas.DataFrame: One row per column with 'pandas_dtype', 'sql_type' and
+            'lookup_candidate'.
+    """
+    date_columns = date_columns or {}
+
+    schema_rows = {}
+    for col in df.columns:
+        if col in date_columns:
+            schema_rows[col] = {'pandas_dtype'     : 'datetime64[s]',
+                                'lookup_candidate' : False}
+            continue
+
+        pandas_dtype, lookup_candidate = infer_column_dtype(series = df[col],
+                                                            lookup_max_unique = lookup_max_unique,
+                                                            lookup_max_ratio = lookup_max_ratio)
+        schema_rows[col] = {'pandas_dtype'     : pandas_dtype,
+                            'lookup_candidate' : lookup_candidate}
+
+    schema_df = pd.DataFrame.from_dict(schema_rows, orient = 'index')
+
+    empty_typed_df = pd.DataFrame({col : pd.Series(dtype = col_dtype)
+                                   for col, col_dtype in schema_df['pandas_dtype'].items()})
+    schema_df['sql_type'] = get_sql_column_datatypes(df = empty_typed_df)
+
+    return schema_df[['pandas_dtype', 'sql_type', 'lookup_candidate']]
+
+
+def optimize_dataframe_dtypes(df, date_columns = None, lookup_max_unique = 5000, lookup_max_ratio = 0.5):
+    """
+    Returns a copy of a DataFrame cast to the types inferred by infer_column_schema().
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        date_columns (dict, optional): Mapping of column name to a datetime parser.
+            Defaults to None.
+        lookup_max_unique (int, optional): See infer_column_dtype(). Defaults to 5000.
+        lookup_max_ratio (float, optional): See infer_column_dtype(). Defaults to 0.5.
+
+    Returns:
+        pandas.DataFrame: The converted frame. Date columns are parsed to datetime64 and
+            are written to SQLite as sortable epoch-second integers.
+
+    Notes:
+        - Types are inferred from the frame itself, so streamed chunks may narrow
+          differently; the table schema is fixed by the first chunk
+    """
+    date_columns = date_columns or {}
+
+    schema_df = infer_column_schema(df = df,
+                                    date_columns = date_columns,
+                                    lookup_max_unique = lookup_max_unique,
+                                    lookup_max_ratio = lookup_max_ratio)
+
+    optimized_columns = {}
+    for col, pandas_dtype in schema_df['pandas_dtype'].items():
+        if col in date_columns:
+            optimized_columns[col] = date_columns[col](df[col])
+        else:
+            optimized_columns[col] = df[col].astype(pandas_dtype)
+
+    return pd.DataFrame(optimized_columns, index = df.index)
@@ -0,0 +1,151 @@
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils.data_transfer import iter_transformed_chunks, parse_saledate
+
+# car_prices text columns whose casing varies between sellers ('Ford' / 'ford',
+# 'SUV' / 'suv'); lowercased so they group and join as one value
+CASE_NORMALIZED_COLUMNS = ['make', 'model', 'trim', 'body', 'transmission', 'state',
+                           'color', 'interior', 'seller']
+
+
+def normalize_text_columns(df, columns = CASE_NORMALIZED_COLUMNS):
+    """
+    Returns a copy of a DataFrame with text columns trimmed, whitespace-collapsed and lowercased.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        columns (list, optional): Columns to normalize; columns missing from df are
+            skipped. Defaults to CASE_NORMALIZED_COLUMNS.
+
+    Returns:
+        pandas.DataFrame: The normalized frame. Missing values stay missing.
+    """
+    df = df.copy()
+    for col in columns:
+        if col not in df.columns:
+            continue
+        df[col] = (df[col].astype(object)
+                          .str.strip()
+                          .str.replace(r'\s+', ' ', regex = True)
+                          .str.lower())
+
+    return df
+
+
+def add_price_difference(df, price_column = 'sellingprice', estimate_column = 'mmr'):
+    """
+    Returns a copy of a DataFrame with 'price_difference' (selling price minus MMR estimate).
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        price_column (str, optional): Sale price column. Defaults to 'sellingprice'.
+        estimate_column (str, optional): Estimated price column. Defaults to 'mmr'.
+
+    Returns:
+        pandas.DataFrame: The frame with the added column.
+    """
+    return df.assign(price_difference = df[price_column] - df[estimate_column])
+
+
+def parse_saledate_column(df, column = 'saledate'):
+    """
+    Returns a copy of a DataFrame with its raw sale date strings parsed to datetime64.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        column (str, optional): Column holding car_prices sale date strings.
+            Defaults to 'saledate'.
+
+    Returns:
+        pandas.DataFrame: The frame with the column parsed by parse_saledate().
+    """
+    return df.assign(**{column : parse_saledate(df[column])})
+
+
+def strip_rank_prefixes(df, column = 'Manufacturer'):
+    """
+    Returns a copy of a DataFrame with leading rank numbers ('1. Toyota') removed from a column.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame, e.g. a scraped auto sales report.
+        column (str, optional): Column to clean. Defaults to 'Manufacturer'.
+
+    Returns:
+        pandas.DataFrame: The frame with the cleaned column.
+    """
+    return df.assign(**{column : df[column].str.replace(r'^\d+\.\s*', '', regex = True).str.strip()})
+
+
+def clean_vehicle_sales(df):
+    """
+    Applies the standard car_prices cleaning: text columns normalized by normalize_text_columns().
+
+    Args:
+        df (pandas.DataFrame): A car_prices shaped chunk.
+
+    Returns:
+        pandas.DataFrame: The cleaned chunk, with the same columns.
+    """
+    return normalize_text_columns(df = df)
+
+
+def apply_transforms(df, transforms):
+    """
+    Applies DataFrame transforms in order.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        transforms (list): Callables taking and returning a DataFrame.
+
+    Returns:
+        pandas.DataFrame: The output of the last transform.
+    """
+    for transform in transforms:
+        df = transform(df)
+
+    return df
+
+
+def shard_dataframe(df, shard_rows = 100000):
+    """
+    Splits a DataFrame into consecutive row slices.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        shard_rows (int, optional): Maximum rows per shard. Defaults to 100000.
+
+    Returns:
+        list: DataFrame slices covering df in order.
+    """
+    return [df.iloc[start:start + shard_rows] for start in range(0, len(df), shard_rows)]
+
+
+def transform_dataframe(df, transforms, max_workers = None, shard_rows = 100000):
+    """
+    Applies transforms to a DataFrame shard by shard across a process pool.
+
+    Args:
+        df (pandas.DataFrame): The input DataFrame.
+        transforms (list): Picklable callables taking and returning a DataFrame, e.g.
+            [clean_vehicle_sales, add_price_difference].
+        max_workers (int, optional): Worker processes. Defaults to None (one per CPU).
+        shard_rows (int, optional): Rows sent to a worker at a time. Defaults to 100000.
+
+    Returns:
+        pandas.DataFrame: The transformed shards concatenated in their original order,
+            so the result does not depend on the worker count.
+    """
+    max_workers = max_workers or os.cpu_count()
+
+    if len(df) == 0:
+        return apply_transforms(df = df, transforms = transforms)
+
+    transformed_shards = iter_transformed_chunks(dfs = shard_dataframe(df = df, shard_rows = shard_rows),
+                                                 transform = partial(apply_transforms, transforms = transforms),
+                                                 max_workers = min(max_workers, int(np.ceil(len(df) / shard_rows))))
+
+    return pd.concat(transformed_shards)